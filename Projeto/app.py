@@ -1,8 +1,10 @@
 from flask import Flask, render_template, session
+import click
 from flask_cors import CORS
 from datetime import timedelta
+import multiprocessing
 import os
-from controllers import auth_controller, user_controller, product_controller, order_controller, backup_controller
+from controllers import auth_controller, user_controller, product_controller, order_controller, backup_controller, metrics_controller
 
 app = Flask(__name__, 
             template_folder='views/templates',
@@ -87,6 +89,10 @@ def listar_produtos():
 def criar_produto():
     return product_controller.criar_produto()
 
+@app.route('/api/produtos/lote', methods=['POST'])
+def salvar_produtos_em_lote():
+    return product_controller.salvar_produtos_em_lote()
+
 @app.route('/api/produtos/<int:id>', methods=['PUT'])
 def atualizar_produto(id):
     return product_controller.atualizar_produto(id)
@@ -99,10 +105,22 @@ def deletar_produto(id):
 def criar_pedido():
     return order_controller.criar_pedido()
 
+@app.route('/api/pedidos/validar', methods=['POST'])
+def validar_pedidos():
+    return order_controller.validar_pedidos()
+
 @app.route('/api/pedidos', methods=['GET'])
 def listar_pedidos():
     return order_controller.listar_pedidos()
 
+@app.route('/api/pedidos/stream', methods=['GET'])
+def stream_pedidos():
+    return order_controller.stream_pedidos()
+
+@app.route('/api/pedidos/status', methods=['PUT'])
+def atualizar_status_pedidos():
+    return order_controller.atualizar_status_pedidos()
+
 @app.route('/api/pedidos/<int:id>/status', methods=['PUT'])
 def atualizar_status_pedido(id):
     return order_controller.atualizar_status_pedido(id)
@@ -119,10 +137,26 @@ def obter_estatisticas():
 def obter_lucros():
     return order_controller.obter_lucros()
 
+@app.route('/api/relatorios/serie', methods=['GET'])
+def serie_relatorio():
+    return order_controller.serie_relatorio()
+
+@app.route('/api/vendas/produtos/top', methods=['GET'])
+def top_produtos():
+    return order_controller.top_produtos()
+
+@app.route('/api/vendas/produtos/<int:id>', methods=['GET'])
+def vendas_produto(id):
+    return order_controller.vendas_produto(id)
+
 @app.route('/api/pedidos/historico', methods=['GET'])
 def listar_historico():
     return order_controller.listar_historico()
 
+@app.route('/api/pedidos/historico/export', methods=['GET'])
+def exportar_historico():
+    return order_controller.exportar_historico()
+
 @app.route('/api/pedidos/historico', methods=['DELETE'])
 def limpar_historico():
     return order_controller.limpar_historico()
@@ -143,6 +177,55 @@ def restaurar_backup():
 def backup_automatico():
     return backup_controller.backup_automatico()
 
+@app.route('/api/backup/status', methods=['GET'])
+def status_backup():
+    return backup_controller.status_backup()
+
+@app.route('/api/metricas', methods=['GET'])
+def obter_metricas():
+    return metrics_controller.obter_metricas()
+
+@app.cli.command('reconstruir-lucros')
+def reconstruir_lucros():
+    """Recalcula lucros_diarios a partir do histórico de pedidos"""
+    from models.database_manager import db
+    dias = db.reconstruir_lucros_diarios()
+    print(f"✅ lucros_diarios reconstruída: {dias} dia(s)")
+
+@app.cli.command('reconstruir-vendas')
+def reconstruir_vendas():
+    """Recalcula vendas_produto_diarias a partir dos itens do histórico"""
+    from models.database_manager import db
+    linhas = db.reconstruir_vendas_produto()
+    print(f"✅ vendas_produto_diarias reconstruída: {linhas} linha(s)")
+
+@app.cli.command('verificar-estatisticas')
+@click.option('--corrigir', is_flag=True, help='Regrava os contadores se divergirem do histórico')
+def verificar_estatisticas(corrigir):
+    """Confere estatisticas_live contra o histórico de pedidos"""
+    from models.database_manager import db
+    resultado = db.verificar_estatisticas(corrigir=corrigir)
+    if resultado['consistente']:
+        print("✅ estatisticas_live consistente com o histórico")
+        return
+    print(f"⚠️ estatisticas_live divergente: armazenado={resultado['armazenado']} calculado={resultado['calculado']}")
+    if resultado['corrigido']:
+        print("🔄 estatisticas_live reconstruída a partir do histórico")
+
+@app.cli.command('arquivar-pedidos')
+def arquivar_pedidos():
+    """Move para o histórico, em lotes, os pedidos entregues que ainda estão em pedidos"""
+    from models.database_manager import db
+    total = db.arquivar_pedidos_entregues()
+    print(f"✅ Pedidos arquivados: {total}")
+
+# Backups agendados (BACKUP_AGENDADO=1); com o reloader do modo debug, só no processo filho. Processos do
+# multiprocessing (o pool de hash de senhas) reimportam este arquivo como __mp_main__, antes mesmo de
+# parent_process() estar definido, e não iniciam outro agendador
+if (os.environ.get('BACKUP_AGENDADO') == '1' and __name__ != '__mp_main__' and multiprocessing.parent_process() is None
+        and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true')):
+    backup_controller.agendador.iniciar()
+
 if __name__ == '__main__':
     app.run(
         host='127.0.0.1',
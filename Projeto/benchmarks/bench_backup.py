@@ -0,0 +1,83 @@
+"""Memória de pico e tempo da exportação de backup: fetchall + indent=2 (antes) x streaming (depois).
+
+Uso: python -m benchmarks.bench_backup [--pedidos 20000]
+Os tempos incluem o custo do tracemalloc; compare-os apenas entre si.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.backup_manager import BackupManager, TABELAS_BACKUP
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'database_schema.sql')
+
+def _popular(db_path, pedidos):
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema = f.read()
+    conn = sqlite3.connect(db_path)
+    conn.executescript(schema)
+    conn.executemany("""INSERT INTO historico_pedidos (id, pedido_id, itens_json, total, status, data_pedido, data_entrega)
+        VALUES (?, ?, '[]', 45.0, 'Entregue', '2024-01-15 10:00:00', '2024-01-15 10:30:00')""",
+        ((i, i) for i in range(1, pedidos + 1)))
+    conn.executemany("""INSERT INTO pedido_itens (historico_id, produto_id, nome, preco, quantidade)
+        VALUES (?, 1, 'Pizza Margherita', 15.0, 3)""", ((i,) for i in range(1, pedidos + 1)))
+    conn.commit()
+    conn.close()
+
+def _exportar_antigo(bm, arquivo):
+    """Implementação anterior: todas as tabelas em listas e json.dump indentado"""
+    conn = bm.get_connection()
+    cursor = conn.cursor()
+    dados = {'metadata': {'data_backup': 'bench', 'versao': '1.0'}}
+    for tabela, consulta in TABELAS_BACKUP:
+        cursor.execute(consulta)
+        dados[tabela] = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+
+def _medir(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'segundos': round(duracao, 3), 'pico_mb': round(pico / 1024 / 1024, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pedidos', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'bench.db')
+        _popular(db_path, args.pedidos)
+        bm = BackupManager(backup_dir=os.path.join(temp_dir, 'backups'), db_path=db_path)
+
+        resultados = {'pedidos': args.pedidos}
+        casos = [
+            ('antes_json_indentado', lambda: _exportar_antigo(bm, os.path.join(temp_dir, 'antigo.json'))),
+            ('depois_json', lambda: bm.exportar_para_json(os.path.join(temp_dir, 'b.json'))),
+            ('depois_json_gz', lambda: bm.exportar_para_json(os.path.join(temp_dir, 'b.json.gz'))),
+            ('depois_ndjson', lambda: bm.exportar_para_json(os.path.join(temp_dir, 'b.ndjson'), formato='ndjson')),
+            ('depois_ndjson_gz', lambda: bm.exportar_para_json(os.path.join(temp_dir, 'b.ndjson.gz'),
+                                                               formato='ndjson')),
+        ]
+        for nome, funcao in casos:
+            resultados[nome] = _medir(funcao)
+        for nome, arquivo in (('antes_json_indentado', 'antigo.json'), ('depois_json', 'b.json'),
+                              ('depois_json_gz', 'b.json.gz'), ('depois_ndjson', 'b.ndjson'),
+                              ('depois_ndjson_gz', 'b.ndjson.gz')):
+            resultados[nome]['arquivo_mb'] = round(os.path.getsize(os.path.join(temp_dir, arquivo)) / 1024 / 1024, 2)
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Compara conexão por chamada (antes) com o pool de conexões WAL (depois).
+
+Uso: python -m benchmarks.bench_conexoes [--operacoes 2000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.connection_pool import ConnectionPool
+
+SCHEMA = """CREATE TABLE pedidos (id INTEGER PRIMARY KEY AUTOINCREMENT, itens_json TEXT NOT NULL,
+    total REAL NOT NULL, status TEXT NOT NULL DEFAULT 'Pendente',
+    data_pedido TIMESTAMP DEFAULT (datetime('now', 'localtime')))"""
+
+def _conexao_por_chamada(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _executar(obter_conexao, operacoes):
+    inicio = time.perf_counter()
+    for i in range(operacoes):
+        conn = obter_conexao()
+        if i % 4 == 0:
+            conn.execute("INSERT INTO pedidos (itens_json, total) VALUES ('[]', ?)", (i,))
+            conn.commit()
+        else:
+            conn.execute("SELECT * FROM pedidos WHERE status = 'Pendente' ORDER BY id DESC LIMIT 20").fetchall()
+        conn.close()
+    return (time.perf_counter() - inicio) / operacoes * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--operacoes', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        antes = os.path.join(temp_dir, 'antes.db')
+        depois = os.path.join(temp_dir, 'depois.db')
+        for caminho in (antes, depois):
+            conn = sqlite3.connect(caminho)
+            conn.execute(SCHEMA)
+            conn.close()
+
+        pool = ConnectionPool(depois)
+        resultados = {
+            'operacoes': args.operacoes,
+            'antes_us_por_op': round(_executar(lambda: _conexao_por_chamada(antes), args.operacoes), 1),
+            'depois_us_por_op': round(_executar(pool.obter, args.operacoes), 1),
+        }
+        pool.fechar()
+
+    resultados['ganho'] = round(resultados['antes_us_por_op'] / resultados['depois_us_por_op'], 2)
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
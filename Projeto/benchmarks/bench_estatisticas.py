@@ -0,0 +1,66 @@
+"""Custo de obter_estatisticas_gerais com histórico grande: COUNT(*)/SUM + DATE() (antes) x estatisticas_live (depois).
+
+Uso: python -m benchmarks.bench_estatisticas [--historico 300000] [--repeticoes 50]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database_manager import DatabaseManager
+
+CONSULTAS_ANTIGAS = [
+    "SELECT COUNT(*) as count, COALESCE(SUM(total), 0) as receita FROM historico_pedidos",
+    """SELECT COUNT(*) as count, COALESCE(SUM(total), 0) as receita
+        FROM historico_pedidos WHERE DATE(data_entrega) = DATE('now')""",
+]
+
+def _popular(db, quantidade):
+    conn = db.get_connection()
+    # Um ano de entregas terminando hoje
+    conn.executemany("""INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+        VALUES (?, ?, 'Entregue', datetime('now', 'localtime', ? || ' minutes'), datetime('now', 'localtime', ? || ' minutes'))""",
+        [(i + 1, 10.0 + i % 50, -(i * 525600 // quantidade) - 20, -(i * 525600 // quantidade)) for i in range(quantidade)])
+    conn.commit()
+    conn.close()
+
+def _antes(db):
+    conn = db.get_connection()
+    resultados = [tuple(conn.execute(sql).fetchone()) for sql in CONSULTAS_ANTIGAS]
+    conn.close()
+    return resultados
+
+def _medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return round((time.perf_counter() - inicio) / repeticoes * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--historico', type=int, default=300000)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseManager(db_path=os.path.join(temp_dir, 'bench.db'))
+        _popular(db, args.historico)
+        antigas = _antes(db)
+        estatisticas = db.obter_estatisticas_gerais()
+        resultados = {
+            'historico': args.historico,
+            'antes_ms': _medir(lambda: _antes(db), args.repeticoes),
+            'depois_ms': _medir(db.obter_estatisticas_gerais, args.repeticoes),
+            'mesmos_totais': (antigas[0][0] == estatisticas['total_pedidos']
+                              and abs(antigas[0][1] - estatisticas['receita_total']) < 0.005),
+            'verificacao_ms': _medir(db.verificar_estatisticas, 5),
+        }
+    resultados['aceleracao'] = round(resultados['antes_ms'] / resultados['depois_ms'], 1)
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
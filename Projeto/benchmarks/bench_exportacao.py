@@ -0,0 +1,68 @@
+"""Exportação do histórico com itens: documento JSON montado em memória (antes) x CSV/NDJSON em streaming (depois).
+
+Uso: python -m benchmarks.bench_exportacao [--historico 200000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database_manager import DatabaseManager
+from models.history_export import exportar_csv, exportar_ndjson, comprimir_gzip
+
+def _popular(db, quantidade):
+    conn = db.get_connection()
+    # Um ano de entregas, dois itens por pedido
+    conn.executemany("""INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+        VALUES (?, ?, 'Entregue', datetime('now', 'localtime', ? || ' minutes'), datetime('now', 'localtime', ? || ' minutes'))""",
+        [(i + 1, 35.0, -(i * 525600 // quantidade) - 20, -(i * 525600 // quantidade)) for i in range(quantidade)])
+    conn.executemany("""INSERT INTO pedido_itens (historico_id, produto_id, nome, preco, quantidade)
+        VALUES (?, ?, 'Produto', ?, 1)""", [(i // 2 + 1, i % 2 + 1, (30.0, 5.0)[i % 2]) for i in range(quantidade * 2)])
+    conn.commit()
+    conn.close()
+
+def _antes(db):
+    yield json.dumps(db.listar_historico(), ensure_ascii=False)
+
+def _medir(criar):
+    """Tempo até o primeiro bloco, tempo total e bytes; o pico de memória vem de uma segunda passada com tracemalloc"""
+    inicio = time.perf_counter()
+    primeiro = None
+    total_bytes = 0
+    for bloco in criar():
+        if primeiro is None:
+            primeiro = time.perf_counter() - inicio
+        total_bytes += len(bloco)
+    duracao = time.perf_counter() - inicio
+    tracemalloc.start()
+    for _ in criar():
+        pass
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'primeiro_bloco_ms': round(primeiro * 1000, 1), 'total_s': round(duracao, 2),
+            'mb': round(total_bytes / 1e6, 1), 'pico_memoria_mb': round(pico / 1e6, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--historico', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseManager(db_path=os.path.join(temp_dir, 'bench.db'))
+        _popular(db, args.historico)
+        resultados = {
+            'historico': args.historico,
+            'antes_json_em_memoria': _medir(lambda: _antes(db)),
+            'csv': _medir(lambda: exportar_csv(db.exportar_historico())),
+            'ndjson': _medir(lambda: exportar_ndjson(db.exportar_historico())),
+            'csv_gzip': _medir(lambda: comprimir_gzip(exportar_csv(db.exportar_historico()))),
+        }
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Tempo e tamanho de um backup completo x incremental após poucas alterações.
+
+Uso: python -m benchmarks.bench_incremental [--pedidos 50000] [--alterados 50]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_restauracao import _criar_banco, _popular
+from models.backup_manager import BackupManager
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pedidos', type=int, default=50000)
+    parser.add_argument('--alterados', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'bench.db')
+        _criar_banco(db_path)
+        _popular(db_path, args.pedidos)
+        bm = BackupManager(backup_dir=os.path.join(temp_dir, 'backups'), db_path=db_path)
+
+        inicio = time.perf_counter()
+        completo, _ = bm.exportar_para_json(formato='ndjson', comprimir=True)
+        tempo_completo = time.perf_counter() - inicio
+        bm.backup_incremental()
+
+        conn = bm.get_connection()
+        for i in range(args.alterados):
+            conn.execute("""INSERT INTO pedidos (itens_json, total, status) VALUES ('[]', 20.0, 'Pendente')""")
+            conn.execute("UPDATE historico_pedidos SET total = total + 1 WHERE id = ?", (i + 1,))
+        conn.commit()
+        conn.close()
+
+        inicio = time.perf_counter()
+        delta, stats = bm.backup_incremental()
+        tempo_delta = time.perf_counter() - inicio
+
+        resultados = {
+            'pedidos': args.pedidos,
+            'registros_alterados': args.alterados * 2,
+            'completo': {'segundos': round(tempo_completo, 3), 'bytes': os.path.getsize(completo)},
+            'incremental': {'segundos': round(tempo_delta, 4), 'bytes': os.path.getsize(delta), 'estatisticas': stats},
+        }
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
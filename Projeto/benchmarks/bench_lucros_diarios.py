@@ -0,0 +1,77 @@
+"""Custo por entrega do trigger de lucros_diarios: recontagem do dia (antes) x upsert (depois).
+
+Uso: python -m benchmarks.bench_lucros_diarios [--pedidos 5000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'database_schema.sql')
+
+TRIGGER_ANTIGO = """DROP TRIGGER atualizar_lucros_diarios;
+CREATE TRIGGER atualizar_lucros_diarios
+AFTER INSERT ON historico_pedidos
+BEGIN
+    INSERT OR REPLACE INTO lucros_diarios (data, total_pedidos, receita_total, ticket_medio, atualizado_em)
+    SELECT
+        DATE(NEW.data_entrega),
+        COUNT(*) + COALESCE(ld.total_pedidos, 0),
+        NEW.total + COALESCE(ld.receita_total, 0),
+        (NEW.total + COALESCE(ld.receita_total, 0)) / (COUNT(*) + COALESCE(ld.total_pedidos, 0)),
+        CURRENT_TIMESTAMP
+    FROM historico_pedidos hp
+    LEFT JOIN lucros_diarios ld ON ld.data = DATE(NEW.data_entrega)
+    WHERE DATE(hp.data_entrega) = DATE(NEW.data_entrega);
+END;"""
+
+def _criar_banco(caminho, antigo):
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema = f.read()
+    conn = sqlite3.connect(caminho)
+    conn.executescript(schema)
+    if antigo:
+        conn.executescript(TRIGGER_ANTIGO)
+    conn.commit()
+    return conn
+
+def _entregar(conn, pedidos, faixa):
+    """Insere um dia de entregas, uma transação por entrega; retorna µs por entrega no início e no fim"""
+    tempos = []
+    for i in range(pedidos):
+        inicio = time.perf_counter()
+        conn.execute("""INSERT INTO historico_pedidos (pedido_id, itens_json, total, status, data_pedido, data_entrega)
+            VALUES (?, '[]', ?, 'Entregue', '2024-01-15 10:00:00', ?)""",
+            (i + 1, 10.0 + i % 7, f"2024-01-15 {10 + i * 12 // pedidos:02d}:00:00"))
+        conn.commit()
+        tempos.append(time.perf_counter() - inicio)
+    primeiras = sum(tempos[:faixa]) / faixa * 1e6
+    ultimas = sum(tempos[-faixa:]) / faixa * 1e6
+    return round(primeiras, 1), round(ultimas, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pedidos', type=int, default=5000)
+    args = parser.parse_args()
+    faixa = max(args.pedidos // 10, 1)
+
+    resultados = {'pedidos_no_dia': args.pedidos, 'faixa': faixa}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for nome, antigo in (('antes', True), ('depois', False)):
+            conn = _criar_banco(os.path.join(temp_dir, f'{nome}.db'), antigo)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            inicio_us, fim_us = _entregar(conn, args.pedidos, faixa)
+            lucro = conn.execute("SELECT total_pedidos, receita_total FROM lucros_diarios").fetchone()
+            conn.close()
+            resultados[nome] = {'us_primeiras_entregas': inicio_us, 'us_ultimas_entregas': fim_us,
+                                'total_pedidos_registrado': lucro[0], 'receita_registrada': lucro[1]}
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Precificação de carrinhos grandes: consulta por item (antes) x índice do MotorPrecos (depois).
+
+Uso: python -m benchmarks.bench_precos [--produtos 500] [--itens 1000] [--carrinhos 200]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database_manager import DatabaseManager
+
+def _carrinhos(ids, itens, quantidade):
+    aleatorio = random.Random(42)
+    return [[{'id': aleatorio.choice(ids), 'quantidade': aleatorio.randint(1, 5)} for _ in range(itens)]
+            for _ in range(quantidade)]
+
+def _precificar_consultando(db, itens):
+    """Abordagem ingênua: um SELECT por item para obter nome e preço"""
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    total = 0.0
+    linhas = []
+    for item in itens:
+        cursor.execute("SELECT nome, preco FROM produtos WHERE id = ? AND ativo = 1", (item['id'],))
+        nome, preco = cursor.fetchone()
+        linhas.append((item['id'], nome, preco, item['quantidade']))
+        total += preco * item['quantidade']
+    conn.close()
+    return linhas, round(total, 2)
+
+def _medir(funcao, carrinhos):
+    inicio = time.perf_counter()
+    totais = [funcao(itens)[1] for itens in carrinhos]
+    return time.perf_counter() - inicio, totais
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--produtos', type=int, default=500)
+    parser.add_argument('--itens', type=int, default=1000)
+    parser.add_argument('--carrinhos', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseManager(db_path=os.path.join(temp_dir, 'bench.db'))
+        produtos = db.salvar_produtos_em_lote([{'nome': f'Produto {i}', 'descricao': '', 'preco': 5 + (i % 40) * 0.35}
+                                               for i in range(args.produtos)])
+        carrinhos = _carrinhos([p['id'] for p in produtos], args.itens, args.carrinhos)
+
+        antes, totais_antes = _medir(lambda itens: _precificar_consultando(db, itens), carrinhos)
+        db.motor_precos.invalidar()
+        depois, totais_depois = _medir(db.motor_precos.precificar, carrinhos)
+
+        inicio = time.perf_counter()
+        resultados_lote = db.motor_precos.validar_lote(carrinhos)
+        lote = time.perf_counter() - inicio
+
+    itens_total = args.itens * args.carrinhos
+    print(json.dumps({
+        'itens_por_carrinho': args.itens,
+        'carrinhos': args.carrinhos,
+        'antes': {'ms_por_carrinho': round(antes / args.carrinhos * 1000, 3),
+                  'itens_por_s': round(itens_total / antes)},
+        'depois': {'ms_por_carrinho': round(depois / args.carrinhos * 1000, 3),
+                   'itens_por_s': round(itens_total / depois)},
+        'validar_lote': {'ms_total': round(lote * 1000, 1),
+                         'validos': sum(1 for r in resultados_lote if r['valido'])},
+        'totais_iguais': all(abs(a - d) < 0.005 for a, d in zip(totais_antes, totais_depois)),
+        'aceleracao': round(antes / depois, 1)
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Consulta do quadro de pedidos com entregues acumulados em pedidos (antes) x arquivados (depois).
+
+Uso: python -m benchmarks.bench_quadro [--entregues 200000] [--ativos 40] [--repeticoes 200]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.order_archive import FILTRO_ATIVOS
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'database_schema.sql')
+
+CONSULTAS = {
+    'antes': "SELECT id, total, status, data_pedido, data_entrega FROM pedidos "
+             "WHERE status NOT IN ('Entregue', 'Cancelado') ORDER BY data_pedido DESC",
+    'depois': f"SELECT id, total, status, data_pedido, data_entrega FROM pedidos "
+              f"WHERE {FILTRO_ATIVOS} ORDER BY data_pedido DESC",
+}
+
+def _criar_banco(caminho, entregues, ativos, arquivado):
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema = f.read()
+    conn = sqlite3.connect(caminho)
+    conn.executescript(schema)
+    if not arquivado:
+        # Estado anterior: entregues ficavam em pedidos, com o índice simples de status
+        conn.execute("DROP INDEX idx_pedidos_ativos")
+        conn.execute("CREATE INDEX idx_pedido_status ON pedidos(status)")
+        conn.executemany("""INSERT INTO pedidos (total, status, data_pedido, data_entrega)
+            VALUES (?, 'Entregue', datetime('2024-01-01', ? || ' minutes'), datetime('2024-01-01', ? || ' minutes'))""",
+            [(10.0 + i % 7, i, i + 20) for i in range(entregues)])
+    conn.executemany("INSERT INTO pedidos (total, status, data_pedido) VALUES (?, ?, datetime('now', ? || ' minutes'))",
+                     [(15.0, ('Pendente', 'Preparando', 'Pronto')[i % 3], -i) for i in range(ativos)])
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entregues', type=int, default=200000)
+    parser.add_argument('--ativos', type=int, default=40)
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    resultados = {'entregues': args.entregues, 'ativos': args.ativos}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for nome in ('antes', 'depois'):
+            conn = _criar_banco(os.path.join(temp_dir, f'{nome}.db'), args.entregues, args.ativos, nome == 'depois')
+            plano = ' '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {CONSULTAS[nome]}"))
+            inicio = time.perf_counter()
+            for _ in range(args.repeticoes):
+                linhas = conn.execute(CONSULTAS[nome]).fetchall()
+            decorrido = time.perf_counter() - inicio
+            paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+            conn.close()
+            resultados[nome] = {'us_por_consulta': round(decorrido / args.repeticoes * 1e6, 1),
+                                'linhas': len(linhas), 'paginas_banco': paginas, 'plano': plano}
+    resultados['aceleracao'] = round(resultados['antes']['us_por_consulta'] / resultados['depois']['us_por_consulta'], 1)
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Série diária de receita de um ano: GROUP BY sobre o histórico (antes) x RelatorioVendas com cache de dias fechados (depois).
+
+Uso: python -m benchmarks.bench_relatorios [--historico 300000] [--repeticoes 20]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database_manager import DatabaseManager
+
+# Cada relatório reagrupava o histórico inteiro do período
+CONSULTA_ANTIGA = """SELECT DATE(data_entrega) as dia, COUNT(*), SUM(total), AVG(total)
+    FROM historico_pedidos WHERE data_entrega >= ? AND data_entrega < ?
+    GROUP BY DATE(data_entrega) ORDER BY dia"""
+
+def _popular(db, quantidade):
+    conn = db.get_connection()
+    # Um ano de entregas terminando agora
+    conn.executemany("""INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+        VALUES (?, ?, 'Entregue', datetime('now', 'localtime', ? || ' minutes'), datetime('now', 'localtime', ? || ' minutes'))""",
+        [(i + 1, 10.0 + i % 50, -(i * 525600 // quantidade) - 20, -(i * 525600 // quantidade)) for i in range(quantidade)])
+    conn.commit()
+    conn.close()
+
+def _medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return round((time.perf_counter() - inicio) / repeticoes * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--historico', type=int, default=300000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    hoje = date.today()
+    inicio = (hoje - timedelta(days=364)).isoformat()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseManager(db_path=os.path.join(temp_dir, 'bench.db'))
+        _popular(db, args.historico)
+        
+        def antes():
+            conn = db.get_connection()
+            linhas = conn.execute(CONSULTA_ANTIGA, (inicio, (hoje + timedelta(days=1)).isoformat())).fetchall()
+            conn.close()
+            return linhas
+        
+        relatorio = db.relatorio_vendas
+        primeira_ms = _medir(lambda: relatorio.serie('dia', inicio), 1)
+        antigas = antes()
+        serie = relatorio.serie('dia', inicio)
+        resultados = {
+            'historico': args.historico,
+            'antes_ms': _medir(antes, args.repeticoes),
+            'primeira_consulta_ms': primeira_ms,
+            'dia_ms': _medir(lambda: relatorio.serie('dia', inicio), args.repeticoes),
+            'semana_ms': _medir(lambda: relatorio.serie('semana', inicio), args.repeticoes),
+            'hora_7_dias_ms': _medir(lambda: relatorio.serie('hora', (hoje - timedelta(days=6)).isoformat()), args.repeticoes),
+            'mesmos_totais': sum(linha[1] for linha in antigas) == serie['totais']['pedidos'],
+            'cache': relatorio.estatisticas(),
+        }
+    resultados['aceleracao'] = round(resultados['antes_ms'] / resultados['dia_ms'], 1)
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Registros/s na restauração de backup: json.load + INSERT por linha (antes) x streaming em lotes (depois).
+
+Uso: python -m benchmarks.bench_restauracao [--pedidos 50000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.backup_manager import BackupManager, RESTAURACAO
+from models.migrations import migrar_itens_json
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'database_schema.sql')
+
+def _criar_banco(db_path):
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema = f.read()
+    conn = sqlite3.connect(db_path)
+    conn.executescript(schema)
+    conn.close()
+
+def _popular(db_path, pedidos):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""INSERT INTO historico_pedidos (id, pedido_id, itens_json, total, status, data_pedido, data_entrega)
+        VALUES (?, ?, '[]', 45.0, 'Entregue', ?, ?)""",
+        ((i, i, f"2024-01-{1 + i % 28:02d} 10:00:00", f"2024-01-{1 + i % 28:02d} 10:30:00")
+         for i in range(1, pedidos + 1)))
+    conn.executemany("""INSERT INTO pedido_itens (historico_id, produto_id, nome, preco, quantidade)
+        VALUES (?, 1, 'Pizza Margherita', 15.0, 3)""", ((i,) for i in range(1, pedidos + 1)))
+    conn.commit()
+    conn.close()
+
+def _restaurar_antigo(bm, arquivo):
+    """Implementação anterior: documento inteiro em memória, um INSERT por registro com triggers ativos"""
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    conn = bm.get_connection()
+    cursor = conn.cursor()
+    for tabela in ('pedido_itens', 'lucros_diarios', 'historico_pedidos', 'pedidos', 'produtos'):
+        cursor.execute(f"DELETE FROM {tabela}")
+    for tabela in ('produtos', 'pedidos', 'historico_pedidos', 'pedido_itens'):
+        sql, parametros = RESTAURACAO[tabela]
+        for registro in dados.get(tabela, []):
+            cursor.execute(sql, parametros(registro))
+    migrar_itens_json(cursor)
+    conn.commit()
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pedidos', type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        origem = os.path.join(temp_dir, 'origem.db')
+        _criar_banco(origem)
+        _popular(origem, args.pedidos)
+        bm_origem = BackupManager(backup_dir=os.path.join(temp_dir, 'backups'), db_path=origem)
+        arquivo_json, stats = bm_origem.exportar_para_json(os.path.join(temp_dir, 'b.json'))
+        arquivo_ndjson, _ = bm_origem.exportar_para_json(os.path.join(temp_dir, 'b.ndjson'), formato='ndjson')
+        registros = stats['produtos'] + stats['pedidos'] + stats['historico'] + stats['itens']
+
+        resultados = {'registros': registros}
+        casos = [
+            ('antes_json', _restaurar_antigo, arquivo_json),
+            ('depois_json', lambda bm, arquivo: bm.importar_de_json(arquivo), arquivo_json),
+            ('depois_ndjson', lambda bm, arquivo: bm.importar_de_json(arquivo), arquivo_ndjson),
+        ]
+        for nome, restaurar, arquivo in casos:
+            destino = os.path.join(temp_dir, f'{nome}.db')
+            _criar_banco(destino)
+            bm = BackupManager(backup_dir=os.path.join(temp_dir, 'backups'), db_path=destino)
+            inicio = time.perf_counter()
+            restaurar(bm, arquivo)
+            duracao = time.perf_counter() - inicio
+            resultados[nome] = {'segundos': round(duracao, 3), 'registros_por_s': int(registros / duracao)}
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Entrega de vários pedidos: um PUT por pedido (antes) x PUT /api/pedidos/status em lote (depois).
+
+Uso: python -m benchmarks.bench_status_lote [--pedidos 500]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database_manager import DatabaseManager
+
+def _criar_pedidos(db, quantidade):
+    itens = [{'nome': 'Pizza', 'preco': 30.0, 'quantidade': 1}, {'nome': 'Suco', 'preco': 5.0, 'quantidade': 2}]
+    return [db.criar_pedido(itens, 40.0)['id'] for _ in range(quantidade)]
+
+def _lucros(db):
+    conn = db.get_connection()
+    linha = conn.execute("SELECT SUM(total_pedidos), SUM(receita_total) FROM lucros_diarios").fetchone()
+    conn.close()
+    return tuple(linha)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pedidos', type=int, default=500)
+    args = parser.parse_args()
+
+    resultados = {'pedidos': args.pedidos}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for nome in ('antes', 'depois'):
+            db = DatabaseManager(db_path=os.path.join(temp_dir, f'{nome}.db'))
+            ids = _criar_pedidos(db, args.pedidos)
+            inicio = time.perf_counter()
+            if nome == 'antes':
+                for pedido_id in ids:
+                    db.atualizar_status_pedido(pedido_id, 'Entregue')
+                commits = len(ids)
+            else:
+                db.atualizar_status_pedidos([(pedido_id, 'Entregue') for pedido_id in ids])
+                commits = 1
+            decorrido = time.perf_counter() - inicio
+            resultados[nome] = {'ms_total': round(decorrido * 1000, 1),
+                                'us_por_pedido': round(decorrido / args.pedidos * 1e6, 1),
+                                'commits': commits, 'lucros': _lucros(db)}
+    resultados['aceleracao'] = round(resultados['antes']['ms_total'] / resultados['depois']['ms_total'], 1)
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Ranking de produtos com um ano de histórico: agregação sobre pedido_itens (antes) x vendas_produto_diarias (depois).
+
+Uso: python -m benchmarks.bench_vendas_produto [--historico 200000] [--produtos 200] [--repeticoes 20]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database_manager import DatabaseManager
+
+# A antiga view vendas_por_produto, varrendo todos os itens entregues a cada consulta
+CONSULTA_ANTIGA = """SELECT p.id, p.nome, SUM(i.quantidade) as total_vendido, SUM(i.preco * i.quantidade) as receita_gerada
+    FROM produtos p
+    JOIN pedido_itens i ON i.produto_id = p.id AND i.historico_id IS NOT NULL
+    GROUP BY p.id, p.nome
+    ORDER BY receita_gerada DESC, p.id
+    LIMIT 10"""
+
+def _popular(db, quantidade, produtos):
+    db.salvar_produtos_em_lote([{'nome': f'Produto {i}', 'descricao': '', 'preco': 5.0 + i % 40} for i in range(produtos)])
+    conn = db.get_connection()
+    # Um ano de entregas terminando hoje, com 3 itens por pedido
+    conn.executemany("""INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+        VALUES (?, 0, 'Entregue', datetime('now', 'localtime', ? || ' minutes'), datetime('now', 'localtime', ? || ' minutes'))""",
+        [(i + 1, -(i * 525600 // quantidade) - 20, -(i * 525600 // quantidade)) for i in range(quantidade)])
+    conn.executemany("""INSERT INTO pedido_itens (historico_id, produto_id, nome, preco, quantidade)
+        VALUES (?, ?, '', ?, ?)""",
+        [(i // 3 + 1, (i * 7) % produtos + 1, 5.0 + ((i * 7) % produtos) % 40, 1 + i % 4) for i in range(quantidade * 3)])
+    conn.commit()
+    conn.close()
+
+def _antes(db):
+    conn = db.get_connection()
+    linhas = [tuple(r) for r in conn.execute(CONSULTA_ANTIGA)]
+    conn.close()
+    return linhas
+
+def _medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return round((time.perf_counter() - inicio) / repeticoes * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--historico', type=int, default=200000)
+    parser.add_argument('--produtos', type=int, default=200)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseManager(db_path=os.path.join(temp_dir, 'bench.db'))
+        _popular(db, args.historico, args.produtos)
+        antes = [(linha[0], round(linha[3], 2)) for linha in _antes(db)]
+        depois = [(p['produto_id'], round(p['receita'], 2)) for p in db.top_produtos()]
+        resultados = {
+            'historico': args.historico,
+            'itens': args.historico * 3,
+            'antes_ms': _medir(lambda: _antes(db), args.repeticoes),
+            'top_ms': _medir(db.top_produtos, args.repeticoes),
+            'top_30_dias_ms': _medir(lambda: db.top_produtos(inicio=time.strftime('%Y-%m-%d', time.localtime(time.time() - 30 * 86400))),
+                                     args.repeticoes),
+            'mesmo_ranking': antes == depois,
+            'reconstrucao_ms': _medir(db.reconstruir_vendas_produto, 1),
+        }
+    resultados['aceleracao'] = round(resultados['antes_ms'] / resultados['top_ms'], 1)
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == '__main__':
+    main()
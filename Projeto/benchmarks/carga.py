@@ -0,0 +1,354 @@
+"""Teste de carga HTTP da API: usuários virtuais concorrentes, com vazão e latência p50/p95/p99 por rota.
+
+Uso:
+    python -m benchmarks.carga [--usuarios quiosque=8,cozinha=2,gerente=1] [--duracao 30] [--aquecimento 5]
+    python -m benchmarks.carga --url http://127.0.0.1:5000 --usuario admin --senha ...   # servidor já em execução
+    python -m benchmarks.carga --comparar base.json [--tolerancia 0.25]                 # roda e compara
+    python -m benchmarks.carga --comparar base.json --atual outro.json                  # só compara dois arquivos
+
+Cenários: quiosques carregam o cardápio (/api/produtos, revalidado por ETag) e enviam pedidos; telas da
+cozinha acompanham /api/pedidos?since= e avançam os pedidos até a entrega; gerentes consultam
+estatísticas, lucros, ranking de produtos e a série de receita. Cada usuário virtual é uma thread com sua
+própria sessão, autenticada por /api/login antes de a medição começar.
+
+Sem --url, o banco é gerado pelo gerar_dados.py em um diretório temporário, os usuários de carga são
+cadastrados e o servidor (flask run, com threads) sobe numa porta livre. Com --url, a conta informada é
+usada por todos os usuários virtuais e precisa ser admin. Sai com código 1 se o p95 de alguma rota
+piorar além da tolerância em relação à base.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database_manager import DatabaseManager
+from benchmarks.run import DIRETORIO_RESULTADOS, _commit
+from gerar_dados import gerar
+
+APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app.py'))
+SEMENTE = 42
+SENHA_CARGA = 'carga-123'
+# Conta usada por cada cenário no servidor local: pedidos e cozinha como gerente, relatórios como admin
+CONTAS_LOCAIS = {'quiosque': 'carga_gerente', 'cozinha': 'carga_gerente', 'gerente': 'carga_admin'}
+PROXIMO_STATUS = {'Pendente': 'Preparando', 'Preparando': 'Pronto', 'Pronto': 'Entregue'}
+
+class UsuarioVirtual:
+    """Sessão HTTP de um usuário virtual; cada requisição vira uma amostra (rota, início, duração, status)"""
+
+    def __init__(self, url, cenario, indice, aleatorio, timeout=30):
+        self.url = url.rstrip('/')
+        self.cenario = cenario
+        self.indice = indice
+        self.aleatorio = aleatorio
+        self.timeout = timeout
+        self.sessao = requests.Session()
+        self.amostras = []
+        # Estado local de cada cenário (ETag do cardápio, pedidos vistos pela cozinha, ...)
+        self.estado = {}
+
+    def requisitar(self, metodo, caminho, rota=None, **kwargs):
+        """Executa e cronometra a requisição; falhas de conexão entram com status 0"""
+        inicio = time.perf_counter()
+        try:
+            resposta = self.sessao.request(metodo, self.url + caminho, timeout=self.timeout, **kwargs)
+            status = resposta.status_code
+        except requests.RequestException:
+            resposta, status = None, 0
+        self.amostras.append((f"{metodo} {rota or caminho}", inicio, time.perf_counter() - inicio, status))
+        return resposta
+
+    def entrar(self, usuario, senha):
+        resposta = self.requisitar('POST', '/api/login', json={'usuario': usuario, 'senha': senha})
+        if resposta is None or resposta.status_code != 200:
+            raise RuntimeError(f"Login de {usuario} falhou ({resposta.status_code if resposta is not None else 'sem resposta'})")
+
+
+def _quiosque(vu):
+    """Carrega o cardápio (304 enquanto o ETag conferir) e envia um pedido com 1 a 3 itens"""
+    cabecalhos = {'If-None-Match': vu.estado['etag']} if 'etag' in vu.estado else {}
+    resposta = vu.requisitar('GET', '/api/produtos', headers=cabecalhos)
+    if resposta is not None and resposta.status_code == 200:
+        vu.estado['etag'] = resposta.headers.get('ETag')
+        vu.estado['produtos'] = [p['id'] for p in resposta.json()]
+    produtos = vu.estado.get('produtos')
+    if not produtos:
+        return
+    itens = [{'id': vu.aleatorio.choice(produtos), 'quantidade': vu.aleatorio.randint(1, 2)}
+             for _ in range(vu.aleatorio.randint(1, 3))]
+    vu.requisitar('POST', '/api/pedidos', json={'itens': itens})
+
+def _cozinha(vu):
+    """Sincroniza o quadro por delta (?since=) e avança um status; cada tela cuida dos pedidos id % telas"""
+    resposta = vu.requisitar('GET', f"/api/pedidos?since={vu.estado.get('versao', 0)}", rota='/api/pedidos')
+    if resposta is None or resposta.status_code != 200:
+        return
+    delta = resposta.json()
+    pedidos = vu.estado.setdefault('pedidos', {})
+    if delta['completo']:
+        pedidos.clear()
+    for pedido_id in delta['removidos']:
+        pedidos.pop(pedido_id, None)
+    pedidos.update((p['id'], p['status']) for p in delta['pedidos'])
+    vu.estado['versao'] = delta['versao']
+
+    telas, tela = vu.estado['telas'], vu.indice
+    meus = [pid for pid, status in pedidos.items() if pid % telas == tela and status in PROXIMO_STATUS]
+    if not meus:
+        return
+    pedido_id = min(meus)
+    novo_status = PROXIMO_STATUS[pedidos[pedido_id]]
+    resposta = vu.requisitar('PUT', f"/api/pedidos/{pedido_id}/status", rota='/api/pedidos/<id>/status',
+                             json={'status': novo_status})
+    if resposta is not None and resposta.status_code == 200:
+        pedidos[pedido_id] = novo_status
+
+def _gerente(vu):
+    """Painel gerencial: estatísticas sempre; lucros, ranking e série de receita alternados"""
+    vu.requisitar('GET', '/api/estatisticas')
+    ha_30_dias = (date.today() - timedelta(days=30)).isoformat()
+    consulta = vu.aleatorio.randrange(3)
+    if consulta == 0:
+        vu.requisitar('GET', '/api/lucros')
+    elif consulta == 1:
+        vu.requisitar('GET', f"/api/vendas/produtos/top?inicio={ha_30_dias}", rota='/api/vendas/produtos/top')
+    else:
+        vu.requisitar('GET', f"/api/relatorios/serie?granularidade=dia&inicio={ha_30_dias}", rota='/api/relatorios/serie')
+
+# Cenário -> (uma iteração, pausa média entre iterações em segundos)
+CENARIOS = {
+    'quiosque': (_quiosque, 1.0),
+    'cozinha': (_cozinha, 2.0),
+    'gerente': (_gerente, 5.0),
+}
+
+def _percentil(ordenadas, p):
+    """Percentil por posição mais próxima (nearest-rank) de uma lista ordenada"""
+    return ordenadas[max(0, min(len(ordenadas) - 1, -(-len(ordenadas) * p // 100) - 1))]
+
+def _resumo(amostras, duracao):
+    duracoes = sorted(a[2] for a in amostras)
+    status = {}
+    for amostra in amostras:
+        status[str(amostra[3])] = status.get(str(amostra[3]), 0) + 1
+    return {
+        'requisicoes': len(duracoes),
+        'erros': sum(1 for a in amostras if not 200 <= a[3] < 400),
+        'status': dict(sorted(status.items())),
+        'vazao_rps': round(len(duracoes) / duracao, 2) if duracao else None,
+        'p50_ms': round(_percentil(duracoes, 50) * 1000, 3),
+        'p95_ms': round(_percentil(duracoes, 95) * 1000, 3),
+        'p99_ms': round(_percentil(duracoes, 99) * 1000, 3),
+        'max_ms': round(duracoes[-1] * 1000, 3),
+    }
+
+def _executar_usuario(vu, iteracao, pausa, fim):
+    while time.perf_counter() < fim:
+        iteracao(vu)
+        if pausa:
+            # Pausa aleatória em torno da média para os usuários não andarem sincronizados
+            time.sleep(min(vu.aleatorio.uniform(0.5, 1.5) * pausa, max(0, fim - time.perf_counter())))
+
+def executar_carga(url, usuarios, duracao, aquecimento, pausa, contas, semente=SEMENTE):
+    """Autentica todos os usuários virtuais, roda aquecimento + duração e resume as amostras da janela medida"""
+    virtuais = []
+    for cenario, quantidade in usuarios.items():
+        for indice in range(quantidade):
+            vu = UsuarioVirtual(url, cenario, indice, random.Random(f"{semente}-{cenario}-{indice}"))
+            vu.estado['telas'] = quantidade
+            vu.entrar(*contas[cenario])
+            virtuais.append(vu)
+    logins = [a for vu in virtuais for a in vu.amostras]
+    for vu in virtuais:
+        vu.amostras = []
+
+    inicio = time.perf_counter()
+    janela = inicio + aquecimento
+    fim = janela + duracao
+    threads = []
+    for vu in virtuais:
+        iteracao, pausa_media = CENARIOS[vu.cenario]
+        thread = threading.Thread(target=_executar_usuario, args=(vu, iteracao, pausa_media * pausa, fim), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    # Só entram as requisições iniciadas depois do aquecimento
+    medidas = [a for vu in virtuais for a in vu.amostras if a[1] >= janela]
+    por_rota = {}
+    for amostra in medidas:
+        por_rota.setdefault(amostra[0], []).append(amostra)
+    return {
+        'rotas': {rota: _resumo(amostras, duracao) for rota, amostras in sorted(por_rota.items())},
+        'total': _resumo(medidas, duracao) if medidas else None,
+        'login': _resumo(logins, None),
+    }
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _aguardar_servidor(url, processo, limite=60):
+    prazo = time.monotonic() + limite
+    while time.monotonic() < prazo:
+        if processo.poll() is not None:
+            return False
+        try:
+            requests.get(url + '/api/verificar-auth', timeout=1)
+            return True
+        except requests.RequestException:
+            time.sleep(0.2)
+    return False
+
+def preparar_servidor(temp_dir, dias, pedidos_por_dia, semente=SEMENTE):
+    """Gera o banco (cardapio.db no diretório de trabalho do servidor), cadastra as contas e sobe o servidor"""
+    db_path = os.path.join(temp_dir, 'cardapio.db')
+    dados = gerar(db_path, produtos=200, dias=dias, pedidos_por_dia=pedidos_por_dia, semente=semente,
+                  ate=date.today() - timedelta(days=1))
+    db = DatabaseManager(db_path=db_path)
+    db.criar_usuario('carga_gerente', SENHA_CARGA, 'gerente')
+    db.criar_usuario('carga_admin', SENHA_CARGA, 'admin')
+
+    porta = _porta_livre()
+    log = open(os.path.join(temp_dir, 'servidor.log'), 'w', encoding='utf-8')
+    env = {k: v for k, v in os.environ.items() if k != 'BACKUP_AGENDADO'}
+    processo = subprocess.Popen([sys.executable, '-m', 'flask', '--app', APP_PATH, 'run', '--port', str(porta),
+                                 '--with-threads', '--no-reload', '--no-debugger'],
+                                cwd=temp_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{porta}"
+    if not _aguardar_servidor(url, processo):
+        processo.terminate()
+        log.close()
+        with open(log.name, 'r', encoding='utf-8') as f:
+            raise RuntimeError(f"Servidor não respondeu:\n{f.read()[-2000:]}")
+    return url, processo, log, dados
+
+def executar(url, usuarios, duracao, aquecimento, pausa, credenciais=None, dias=30, pedidos_por_dia=500):
+    resultado = {
+        'metadata': {
+            'commit': _commit(),
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'servidor': url or 'local',
+            'usuarios': usuarios,
+            'duracao_s': duracao,
+            'aquecimento_s': aquecimento,
+            'pausa': pausa,
+            'semente': SEMENTE,
+        }
+    }
+    if url:
+        contas = {cenario: credenciais for cenario in usuarios}
+        resultado.update(executar_carga(url, usuarios, duracao, aquecimento, pausa, contas))
+        return resultado
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        url, processo, log, dados = preparar_servidor(temp_dir, dias, pedidos_por_dia)
+        resultado['metadata']['dados'] = dados
+        print(f"servidor local em {url} ({dados['historico']} pedidos no histórico)", file=sys.stderr)
+        try:
+            contas = {cenario: (CONTAS_LOCAIS[cenario], SENHA_CARGA) for cenario in usuarios}
+            resultado.update(executar_carga(url, usuarios, duracao, aquecimento, pausa, contas))
+        finally:
+            processo.terminate()
+            processo.wait(timeout=10)
+            log.close()
+    return resultado
+
+def comparar(base, atual, tolerancia):
+    """Razão atual/base do p95 por rota; retorna as regressões acima da tolerância"""
+    regressoes = []
+    print(f"{'rota':<40} {'base p95':>10} {'atual p95':>10} {'razão':>7} {'base rps':>9} {'atual rps':>9}")
+    for rota, medida in atual['rotas'].items():
+        anterior = base.get('rotas', {}).get(rota)
+        if anterior is None or anterior['p95_ms'] <= 0:
+            continue
+        razao = medida['p95_ms'] / anterior['p95_ms']
+        marca = ' ⚠️' if razao > 1 + tolerancia else ''
+        print(f"{rota:<40} {anterior['p95_ms']:>10.3f} {medida['p95_ms']:>10.3f} {razao:>7.2f} "
+              f"{anterior['vazao_rps']:>9.2f} {medida['vazao_rps']:>9.2f}{marca}")
+        if marca:
+            regressoes.append({'rota': rota, 'razao': round(razao, 2)})
+    return regressoes
+
+def _ler_usuarios(texto):
+    """Converte 'quiosque=8,cozinha=2' em usuários virtuais por cenário"""
+    usuarios = {}
+    for parte in filter(None, (p.strip() for p in texto.split(','))):
+        cenario, _, quantidade = parte.partition('=')
+        if cenario not in CENARIOS:
+            raise argparse.ArgumentTypeError(f"Cenário inválido: {cenario} (use {', '.join(CENARIOS)})")
+        usuarios[cenario] = int(quantidade or 1)
+    return {cenario: quantidade for cenario, quantidade in usuarios.items() if quantidade > 0}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--usuarios', type=_ler_usuarios, default='quiosque=8,cozinha=2,gerente=1',
+                        help='Usuários virtuais por cenário (quiosque, cozinha, gerente)')
+    parser.add_argument('--duracao', type=float, default=30, help='Segundos medidos')
+    parser.add_argument('--aquecimento', type=float, default=5, help='Segundos iniciais descartados')
+    parser.add_argument('--pausa', type=float, default=1.0,
+                        help='Multiplica as pausas entre iterações (0 = sem pausa, carga máxima)')
+    parser.add_argument('--url', help='Servidor já em execução (padrão: sobe um servidor local com dados gerados)')
+    parser.add_argument('--usuario', help='Com --url, conta admin usada por todos os usuários virtuais')
+    parser.add_argument('--senha')
+    parser.add_argument('--dias', type=int, default=30, help='Servidor local: dias de histórico gerados')
+    parser.add_argument('--pedidos-por-dia', type=int, default=500, help='Servidor local: pedidos por dia gerados')
+    parser.add_argument('--saida', help='Arquivo JSON de resultados (padrão: benchmarks/resultados/carga_<data>_<commit>.json)')
+    parser.add_argument('--comparar', help='Resultado anterior usado como base')
+    parser.add_argument('--atual', help='Com --comparar, compara este arquivo em vez de executar a carga')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Aumento relativo do p95 tolerado (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    if args.atual:
+        if not args.comparar:
+            parser.error('--atual exige --comparar')
+        with open(args.atual, 'r', encoding='utf-8') as f:
+            atual = json.load(f)
+    else:
+        if args.url and not (args.usuario and args.senha):
+            parser.error('--url exige --usuario e --senha')
+        if not args.usuarios:
+            parser.error('nenhum usuário virtual em --usuarios')
+        try:
+            atual = executar(args.url, args.usuarios, args.duracao, args.aquecimento, args.pausa,
+                             credenciais=(args.usuario, args.senha), dias=args.dias, pedidos_por_dia=args.pedidos_por_dia)
+        except RuntimeError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        for rota, medida in atual['rotas'].items():
+            print(f"  {rota}: {medida['vazao_rps']} req/s, p50 {medida['p50_ms']} ms, p95 {medida['p95_ms']} ms, "
+                  f"p99 {medida['p99_ms']} ms, {medida['erros']} erro(s)", file=sys.stderr)
+        saida = args.saida
+        if saida is None:
+            os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+            nome = f"carga_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{atual['metadata']['commit'] or 'sem_commit'}.json"
+            saida = os.path.join(DIRETORIO_RESULTADOS, nome)
+        with open(saida, 'w', encoding='utf-8') as f:
+            json.dump(atual, f, indent=2, ensure_ascii=False)
+        print(f"✅ Resultados gravados em {saida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        regressoes = comparar(base, atual, args.tolerancia)
+        if regressoes:
+            print(f"❌ {len(regressoes)} rota(s) mais lenta(s) que a base", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
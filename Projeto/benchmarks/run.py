@@ -0,0 +1,211 @@
+"""Suíte de benchmarks do DatabaseManager em escalas realistas, com resultados em JSON comparáveis entre commits.
+
+Uso:
+    python -m benchmarks.run [--escalas 10000,100000,1000000] [--repeticoes 20] [--saida resultados.json]
+    python -m benchmarks.run --comparar base.json [--tolerancia 0.25]       # roda e compara com uma execução anterior
+    python -m benchmarks.run --comparar base.json --atual outro.json        # só compara dois arquivos
+
+Cada escala é o número de pedidos no histórico; o banco é semeado do zero (determinístico) em um diretório
+temporário pelo gerar_dados.py. Sai com código 1 se alguma operação ficar mais lenta que a base além da tolerância.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database_manager import DatabaseManager
+from models.backup_manager import BackupManager
+from models.history_export import exportar_csv
+from gerar_dados import gerar
+
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+PRODUTOS = 200
+SEMENTE = 42
+DIAS = 365
+MIX_ABERTO = {'Entregue': 0.5, 'Pronto': 0.15, 'Preparando': 0.2, 'Pendente': 0.15}
+
+def semear(db_path, escala, semente=SEMENTE):
+    """Gera o banco com cerca de 'escala' pedidos ao longo do último ano; no último dia metade ainda está em andamento"""
+    return gerar(db_path, produtos=PRODUTOS, dias=DIAS, pedidos_por_dia=max(1, escala // DIAS), itens=(1, 3),
+                 mix=MIX_ABERTO, semente=semente, ate=date.today() - timedelta(days=1))
+
+def _novos_pedidos(db, contexto, quantidade):
+    return [db.criar_pedido([{'id': 1, 'quantidade': 2}])['id'] for _ in range(quantidade)]
+
+def _lotes_de_pedidos(db, contexto, quantidade):
+    return [_novos_pedidos(db, contexto, 100) for _ in range(quantidade)]
+
+def _inserir_no_historico(db, registro_id):
+    # Caminho dos triggers de agregados (lucros_diarios, estatisticas_live) sem o resto da entrega
+    conn = db.get_connection()
+    conn.execute("""INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+        VALUES (?, 25.0, 'Entregue', datetime('now', 'localtime'), datetime('now', 'localtime'))""", (registro_id,))
+    conn.commit()
+    conn.close()
+
+def _exportar_backup(contexto):
+    arquivo, _ = contexto['backup'].exportar_para_json(formato='ndjson', comprimir=True)
+    return arquivo
+
+def _backups_para_importar(db, contexto, quantidade):
+    # Exporta fora do cronômetro: a importação não depende de a exportação ter sido medida antes
+    return [_exportar_backup(contexto)] * quantidade
+
+# (nome, preparar, executar, limite de repetições). preparar roda fora do cronômetro e devolve
+# um argumento por repetição; sem preparar, a primeira chamada é um aquecimento medido à parte.
+OPERACOES = [
+    ('listar_pedidos', None, lambda db, c, _: db.listar_pedidos(), None),
+    ('listar_historico_paginado', None, lambda db, c, _: db.listar_historico_paginado(limite=50), None),
+    ('listar_historico', None, lambda db, c, _: db.listar_historico(), 3),
+    ('obter_estatisticas_gerais', None, lambda db, c, _: db.obter_estatisticas_gerais(), None),
+    ('obter_lucros_periodo', None, lambda db, c, _: db.obter_lucros_periodo(), None),
+    ('top_produtos_30_dias', None, lambda db, c, _: db.top_produtos(inicio=c['ha_30_dias']), None),
+    ('relatorio_serie_dia', None, lambda db, c, _: db.relatorio_vendas.serie('dia'), None),
+    ('exportar_historico_csv_30_dias', None,
+     lambda db, c, _: sum(len(b) for b in exportar_csv(db.exportar_historico(inicio=c['ha_30_dias']))), 5),
+    ('criar_pedido', None, lambda db, c, _: db.criar_pedido([{'id': 1, 'quantidade': 2}, {'id': 2}]), None),
+    ('atualizar_status_pedido', _novos_pedidos, lambda db, c, pid: db.atualizar_status_pedido(pid, 'Preparando'), None),
+    ('entregar_pedido', _novos_pedidos, lambda db, c, pid: db.atualizar_status_pedido(pid, 'Entregue'), None),
+    ('atualizar_status_pedidos_lote_100', _lotes_de_pedidos,
+     lambda db, c, ids: db.atualizar_status_pedidos([(pid, 'Entregue') for pid in ids]), 5),
+    ('gatilhos_insercao_historico', None, lambda db, c, i: _inserir_no_historico(db, i), None),
+    ('backup_exportar_ndjson_gzip', None, lambda db, c, _: _exportar_backup(c), 1),
+    ('backup_importar', _backups_para_importar, lambda db, c, arquivo: c['backup'].importar_de_json(arquivo), 1),
+]
+
+def _resumo(duracoes):
+    ordenadas = sorted(duracoes)
+    return {
+        'repeticoes': len(ordenadas),
+        'mediana_ms': round(statistics.median(ordenadas) * 1000, 3),
+        'p95_ms': round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))] * 1000, 3),
+        'min_ms': round(ordenadas[0] * 1000, 3),
+    }
+
+def medir(db, contexto, repeticoes, filtro=None):
+    resultados = {}
+    for nome, preparar, executar, limite in OPERACOES:
+        if filtro and nome not in filtro:
+            continue
+        vezes = min(repeticoes, limite) if limite else repeticoes
+        primeira = None
+        if preparar:
+            argumentos = preparar(db, contexto, vezes)
+        else:
+            argumentos = list(range(vezes))
+            if vezes > 1:
+                inicio = time.perf_counter()
+                executar(db, contexto, -1)
+                primeira = time.perf_counter() - inicio
+        duracoes = []
+        for argumento in argumentos:
+            inicio = time.perf_counter()
+            executar(db, contexto, argumento)
+            duracoes.append(time.perf_counter() - inicio)
+        resultados[nome] = _resumo(duracoes)
+        if primeira is not None:
+            resultados[nome]['primeira_ms'] = round(primeira * 1000, 3)
+        print(f"  {nome}: {resultados[nome]['mediana_ms']} ms", file=sys.stderr)
+    return resultados
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def executar(escalas, repeticoes, filtro=None):
+    resultado = {
+        'metadata': {
+            'commit': _commit(),
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+            'repeticoes': repeticoes,
+            'semente': SEMENTE,
+        },
+        'escalas': {}
+    }
+    for escala in escalas:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, 'bench.db')
+            inicio = time.perf_counter()
+            dados = semear(db_path, escala)
+            dados['semeadura_s'] = round(time.perf_counter() - inicio, 2)
+            db = DatabaseManager(db_path=db_path)
+            print(f"escala {escala}: semeada em {dados['semeadura_s']} s", file=sys.stderr)
+            contexto = {'backup': BackupManager(backup_dir=os.path.join(temp_dir, 'backups'), db_path=db_path),
+                        'ha_30_dias': (date.today() - timedelta(days=30)).isoformat()}
+            resultado['escalas'][str(escala)] = {'dados': dados, 'operacoes': medir(db, contexto, repeticoes, filtro)}
+    return resultado
+
+def comparar(base, atual, tolerancia):
+    """Razão atual/base da mediana por escala e operação; retorna as regressões acima da tolerância"""
+    regressoes = []
+    print(f"{'escala':>9}  {'operação':<36} {'base ms':>10} {'atual ms':>10} {'razão':>7}")
+    for escala, dados in atual['escalas'].items():
+        referencia = base.get('escalas', {}).get(escala)
+        if referencia is None:
+            continue
+        for nome, medida in dados['operacoes'].items():
+            anterior = referencia['operacoes'].get(nome)
+            if anterior is None or anterior['mediana_ms'] <= 0:
+                continue
+            razao = medida['mediana_ms'] / anterior['mediana_ms']
+            marca = ' ⚠️' if razao > 1 + tolerancia else ''
+            print(f"{escala:>9}  {nome:<36} {anterior['mediana_ms']:>10.3f} {medida['mediana_ms']:>10.3f} {razao:>7.2f}{marca}")
+            if marca:
+                regressoes.append({'escala': escala, 'operacao': nome, 'razao': round(razao, 2)})
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', default='10000,100000',
+                        help='Pedidos no histórico, separados por vírgula (ex.: 10000,100000,1000000)')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--operacoes', help='Executa só estas operações (separadas por vírgula)')
+    parser.add_argument('--saida', help='Arquivo JSON de resultados (padrão: benchmarks/resultados/<data>_<commit>.json)')
+    parser.add_argument('--comparar', help='Resultado anterior usado como base')
+    parser.add_argument('--atual', help='Com --comparar, compara este arquivo em vez de executar a suíte')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Aumento relativo da mediana tolerado (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    if args.atual:
+        if not args.comparar:
+            parser.error('--atual exige --comparar')
+        with open(args.atual, 'r', encoding='utf-8') as f:
+            atual = json.load(f)
+    else:
+        escalas = [int(e) for e in args.escalas.split(',') if e.strip()]
+        filtro = set(args.operacoes.split(',')) if args.operacoes else None
+        atual = executar(escalas, args.repeticoes, filtro)
+        saida = args.saida
+        if saida is None:
+            os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+            nome = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{atual['metadata']['commit'] or 'sem_commit'}.json"
+            saida = os.path.join(DIRETORIO_RESULTADOS, nome)
+        with open(saida, 'w', encoding='utf-8') as f:
+            json.dump(atual, f, indent=2, ensure_ascii=False)
+        print(f"✅ Resultados gravados em {saida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        regressoes = comparar(base, atual, args.tolerancia)
+        if regressoes:
+            print(f"❌ {len(regressoes)} operação(ões) mais lenta(s) que a base", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,19 @@
 from flask import request, jsonify, session
 from models.database_manager import db
+from models.password_hasher import SobrecargaHash
 
 def login():
     dados = request.get_json()
     usuario = dados.get('usuario')
     senha = dados.get('senha')
     
-    sucesso, tipo = db.verificar_login(usuario, senha)
+    try:
+        sucesso, tipo = db.verificar_login(usuario, senha)
+    except SobrecargaHash:
+        return jsonify({
+            "sucesso": False,
+            "mensagem": "Servidor ocupado, tente novamente em instantes"
+        }), 503, {'Retry-After': '1'}
     
     if sucesso:
         session['autenticado'] = True
@@ -1,15 +1,47 @@
+import os
 from flask import request, jsonify, session
-from models.backup_manager import BackupManager
+from models.backup_manager import BackupManager, FORMATOS_BACKUP
+from models.backup_scheduler import AgendadorBackup
+from models.database_manager import db
 
 # Instância do gerenciador de backups
 backup_manager = BackupManager()
 
+def _criar_agendador():
+    """Agendador configurado por variáveis de ambiente BACKUP_*"""
+    max_dias = os.environ.get('BACKUP_MAX_DIAS')
+    max_mb = os.environ.get('BACKUP_MAX_MB')
+    return AgendadorBackup(
+        backup_manager,
+        intervalo=int(os.environ.get('BACKUP_INTERVALO', 3600)),
+        horarios=[h.strip() for h in os.environ.get('BACKUP_HORARIOS', '').split(',') if h.strip()],
+        formato=os.environ.get('BACKUP_FORMATO', 'json'),
+        comprimir=os.environ.get('BACKUP_COMPRIMIR') == '1',
+        jitter=int(os.environ.get('BACKUP_JITTER', 60)),
+        max_backups=int(os.environ.get('BACKUP_MAX_ARQUIVOS', 10)),
+        max_idade_dias=float(max_dias) if max_dias else None,
+        max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else None,
+    )
+
+agendador = _criar_agendador()
+
 def criar_backup():
     if not session.get('autenticado') or session.get('tipo') != 'admin':
         return jsonify({"erro": "Apenas administradores podem criar backups"}), 403
     
+    opcoes = request.get_json(silent=True) or {}
+    formato = opcoes.get('formato', 'json')
+    if formato not in FORMATOS_BACKUP:
+        return jsonify({"erro": "Formato inválido"}), 400
+    
     try:
-        arquivo, stats = backup_manager.exportar_para_json()
+        if formato == 'sqlite':
+            arquivo, stats = backup_manager.criar_snapshot()
+        elif formato == 'incremental':
+            arquivo, stats = backup_manager.backup_incremental()
+        else:
+            arquivo, stats = backup_manager.exportar_para_json(formato=formato,
+                                                               comprimir=bool(opcoes.get('comprimir')))
         return jsonify({
             "sucesso": True,
             "mensagem": "Backup criado com sucesso",
@@ -20,7 +52,7 @@ def criar_backup():
         return jsonify({"erro": f"Erro ao criar backup: {str(e)}"}), 500
 
 def restaurar_backup():
-    """Restaura dados de um backup JSON"""
+    """Restaura um backup JSON/NDJSON, um snapshot .db ou a cadeia incremental (manifesto.json)"""
     if not session.get('autenticado') or session.get('tipo') != 'admin':
         return jsonify({"erro": "Apenas administradores podem restaurar backups"}), 403
     
@@ -31,7 +63,13 @@ def restaurar_backup():
         return jsonify({"erro": "Nome do arquivo não fornecido"}), 400
     
     try:
-        backup_manager.importar_de_json(arquivo)
+        if arquivo.endswith('.db'):
+            backup_manager.restaurar_snapshot(arquivo)
+        elif os.path.basename(arquivo) == 'manifesto.json':
+            backup_manager.restaurar_incremental()
+        else:
+            backup_manager.importar_de_json(arquivo)
+        db.invalidar_produtos()
         return jsonify({
             "sucesso": True,
             "mensagem": "Backup restaurado com sucesso"
@@ -42,16 +80,27 @@ def restaurar_backup():
         return jsonify({"erro": f"Erro ao restaurar backup: {str(e)}"}), 500
 
 def backup_automatico():
-    """Cria backup automático com limpeza de antigos"""
+    """Dispara um backup em segundo plano (com a retenção do agendador) e responde imediatamente"""
     if not session.get('autenticado') or session.get('tipo') != 'admin':
         return jsonify({"erro": "Apenas administradores podem criar backups"}), 403
     
-    try:
-        arquivo = backup_manager.backup_automatico()
-        return jsonify({
-            "sucesso": True,
-            "mensagem": "Backup automático criado",
-            "arquivo": arquivo
-        }), 200
-    except Exception as e:
-        return jsonify({"erro": f"Erro ao criar backup: {str(e)}"}), 500
+    opcoes = request.get_json(silent=True) or {}
+    formato = opcoes.get('formato', agendador.formato)
+    if formato not in FORMATOS_BACKUP:
+        return jsonify({"erro": "Formato inválido"}), 400
+    
+    comprimir = opcoes['comprimir'] if 'comprimir' in opcoes else None
+    if not agendador.executar_agora(formato=formato, comprimir=comprimir):
+        return jsonify({"erro": "Já existe um backup em andamento"}), 409
+    return jsonify({
+        "sucesso": True,
+        "mensagem": "Backup automático iniciado",
+        "status": "/api/backup/status"
+    }), 202
+
+def status_backup():
+    """Última execução, duração, bytes gravados e próxima execução agendada"""
+    if not session.get('autenticado') or session.get('tipo') != 'admin':
+        return jsonify({"erro": "Apenas administradores podem ver o status dos backups"}), 403
+    
+    return jsonify(agendador.status()), 200
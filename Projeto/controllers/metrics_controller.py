@@ -0,0 +1,14 @@
+from flask import jsonify, session
+from models.database_manager import db
+
+def obter_metricas():
+    """Retorna métricas internas para monitoramento (apenas admin)"""
+    if not session.get('autenticado') or session.get('tipo') != 'admin':
+        return jsonify({"erro": "Apenas administradores podem ver métricas"}), 403
+    
+    return jsonify({
+        "cache_cardapio": db.cache_cardapio.estatisticas(),
+        "motor_precos": db.motor_precos.estatisticas(),
+        "relatorio_vendas": db.relatorio_vendas.estatisticas(),
+        "hash_senhas": db.hasher.estatisticas()
+    }), 200
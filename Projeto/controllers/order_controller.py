@@ -1,33 +1,87 @@
-from flask import request, jsonify, session
+from flask import request, jsonify, session, Response
 from models.database_manager import db
+from models.event_broker import broker
+from models.price_engine import ItensInvalidos
+from models.history_export import FORMATOS_EXPORTACAO, exportar_csv, exportar_ndjson, comprimir_gzip
+
+MAX_PEDIDOS_VALIDACAO = 1000
+MAX_TRANSICOES_LOTE = 1000
+STATUS_VALIDOS = ['Pendente', 'Preparando', 'Pronto', 'Entregue', 'Cancelado']
 
 def criar_pedido():
-    """Cria um novo pedido"""
+    """Cria um novo pedido; preços e total são calculados no servidor a partir de id e quantidade"""
     if not session.get('autenticado'):
         return jsonify({"erro": "Não autorizado"}), 401
     
     dados = request.get_json()
+    itens = dados.get('itens')
     
-    if not dados.get('itens') or not dados.get('total'):
+    if not itens or not isinstance(itens, list):
         return jsonify({"erro": "Dados incompletos"}), 400
     
     try:
-        pedido = db.criar_pedido(dados.get('itens'), float(dados.get('total')))
+        pedido = db.criar_pedido(itens)
+        broker.publicar('criado', pedido)
         return jsonify({"sucesso": True, "pedido": pedido}), 201
-    except (ValueError, TypeError) as e:
-        return jsonify({"erro": "Dados inválidos: total deve ser um número válido"}), 400
+    except ItensInvalidos as e:
+        return jsonify({"erro": "Itens inválidos", "detalhes": e.erros}), 400
     except Exception as e:
         return jsonify({"erro": f"Erro ao criar pedido: {str(e)}"}), 500
 
+def validar_pedidos():
+    """Valida e precifica vários pedidos de uma vez, sem gravar nada"""
+    if not session.get('autenticado'):
+        return jsonify({"erro": "Não autorizado"}), 401
+    
+    dados = request.get_json()
+    pedidos = dados.get('pedidos') if isinstance(dados, dict) else None
+    
+    if not isinstance(pedidos, list) or not pedidos:
+        return jsonify({"erro": "Dados incompletos"}), 400
+    if len(pedidos) > MAX_PEDIDOS_VALIDACAO:
+        return jsonify({"erro": f"Máximo de {MAX_PEDIDOS_VALIDACAO} pedidos por validação"}), 400
+    
+    listas = [p.get('itens') if isinstance(p, dict) else None for p in pedidos]
+    resultados = db.motor_precos.validar_lote([itens if isinstance(itens, list) else [] for itens in listas])
+    return jsonify({
+        "validos": sum(1 for r in resultados if r['valido']),
+        "invalidos": sum(1 for r in resultados if not r['valido']),
+        "resultados": resultados
+    }), 200
+
 def listar_pedidos():
     """Lista pedidos (apenas para usuários autenticados)"""
     if not session.get('autenticado'):
         return jsonify({"erro": "Não autorizado"}), 401
     
     incluir_entregues = request.args.get('incluir_entregues', 'false').lower() == 'true'
+    
+    # Sincronização incremental: ?since=<versao> devolve só o que mudou
+    desde = request.args.get('since')
+    if desde is not None:
+        try:
+            desde = int(desde)
+        except ValueError:
+            return jsonify({"erro": "Versão inválida"}), 400
+        return jsonify(db.listar_pedidos_alterados(desde, incluir_entregues=incluir_entregues)), 200
+    
     pedidos_lista = db.listar_pedidos(incluir_entregues=incluir_entregues)
     return jsonify(pedidos_lista), 200
 
+def stream_pedidos():
+    """Stream SSE com eventos de pedidos (criado, status_alterado, deletado)"""
+    if not session.get('autenticado'):
+        return jsonify({"erro": "Não autorizado"}), 401
+    
+    ultimo_id = request.headers.get('Last-Event-ID') or request.args.get('ultimo_id')
+    try:
+        ultimo_id = int(ultimo_id) if ultimo_id else None
+    except ValueError:
+        ultimo_id = None
+    
+    return Response(broker.transmitir(ultimo_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def atualizar_status_pedido(id):
     """Atualiza o status de um pedido"""
     if not session.get('autenticado'):
@@ -36,22 +90,65 @@ def atualizar_status_pedido(id):
     dados = request.get_json()
     novo_status = dados.get('status')
     
-    if novo_status not in ['Pendente', 'Preparando', 'Pronto', 'Entregue', 'Cancelado']:
+    if novo_status not in STATUS_VALIDOS:
         return jsonify({"erro": "Status inválido"}), 400
     
     pedido = db.atualizar_status_pedido(id, novo_status)
     
     if pedido:
+        broker.publicar('status_alterado', pedido)
         return jsonify(pedido), 200
     
     return jsonify({"erro": "Pedido não encontrado"}), 404
 
+def atualizar_status_pedidos():
+    """Atualiza o status de vários pedidos em uma única transação.
+    Aceita {"ids": [...], "status": "..."} ou {"transicoes": [{"id": 1, "status": "..."}, ...]}"""
+    if not session.get('autenticado'):
+        return jsonify({"erro": "Não autorizado"}), 401
+    
+    dados = request.get_json(silent=True) or {}
+    if 'transicoes' in dados:
+        transicoes = dados.get('transicoes')
+        if not isinstance(transicoes, list):
+            return jsonify({"erro": "Dados incompletos"}), 400
+        transicoes = [(t.get('id'), t.get('status')) if isinstance(t, dict) else (None, None) for t in transicoes]
+    else:
+        ids = dados.get('ids')
+        if not isinstance(ids, list):
+            return jsonify({"erro": "Dados incompletos"}), 400
+        transicoes = [(pedido_id, dados.get('status')) for pedido_id in ids]
+    
+    if not transicoes:
+        return jsonify({"erro": "Dados incompletos"}), 400
+    if len(transicoes) > MAX_TRANSICOES_LOTE:
+        return jsonify({"erro": f"Máximo de {MAX_TRANSICOES_LOTE} pedidos por requisição"}), 400
+    if any(status not in STATUS_VALIDOS for _, status in transicoes):
+        return jsonify({"erro": "Status inválido"}), 400
+    if any(not isinstance(pedido_id, int) or isinstance(pedido_id, bool) for pedido_id, _ in transicoes):
+        return jsonify({"erro": "Ids de pedido inválidos"}), 400
+    
+    try:
+        pedidos = db.atualizar_status_pedidos(transicoes)
+    except Exception as e:
+        return jsonify({"erro": f"Erro ao atualizar pedidos: {str(e)}"}), 500
+    
+    for pedido in pedidos:
+        broker.publicar('status_alterado', pedido)
+    
+    encontrados = {pedido['id'] for pedido in pedidos}
+    return jsonify({
+        "pedidos": pedidos,
+        "nao_encontrados": [pedido_id for pedido_id in dict.fromkeys(i for i, _ in transicoes) if pedido_id not in encontrados]
+    }), 200
+
 def deletar_pedido(id):
     """Deleta um pedido"""
     if not session.get('autenticado') or session.get('tipo') != 'admin':
         return jsonify({"erro": "Apenas administradores podem deletar pedidos"}), 403
     
     if db.deletar_pedido(id):
+        broker.publicar('deletado', {'id': id})
         return jsonify({"mensagem": "Pedido deletado com sucesso"}), 200
     return jsonify({"erro": "Pedido não encontrado"}), 404
 
@@ -74,14 +171,100 @@ def obter_lucros():
     lucros = db.obter_lucros_periodo(data_inicio, data_fim)
     return jsonify(lucros), 200
 
+def top_produtos():
+    """Ranking dos produtos mais vendidos no período (apenas admin)"""
+    if not session.get('autenticado') or session.get('tipo') != 'admin':
+        return jsonify({"erro": "Apenas administradores podem ver vendas"}), 403
+    
+    try:
+        ranking = db.top_produtos(limite=request.args.get('limite', 10),
+                                  inicio=request.args.get('inicio'),
+                                  fim=request.args.get('fim'),
+                                  ordem=request.args.get('ordem', 'receita'))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    return jsonify(ranking), 200
+
+def vendas_produto(id):
+    """Vendas diárias de um produto no período (apenas admin)"""
+    if not session.get('autenticado') or session.get('tipo') != 'admin':
+        return jsonify({"erro": "Apenas administradores podem ver vendas"}), 403
+    
+    try:
+        vendas = db.vendas_produto(id, inicio=request.args.get('inicio'), fim=request.args.get('fim'))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    return jsonify(vendas), 200
+
+def serie_relatorio():
+    """Série de receita, pedidos e ticket médio por hora, dia, semana ou mês (apenas admin)"""
+    if not session.get('autenticado') or session.get('tipo') != 'admin':
+        return jsonify({"erro": "Apenas administradores podem ver relatórios"}), 403
+    
+    try:
+        serie = db.relatorio_vendas.serie(granularidade=request.args.get('granularidade', 'dia'),
+                                          inicio=request.args.get('inicio'),
+                                          fim=request.args.get('fim'))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    return jsonify(serie), 200
+
 def listar_historico():
     """Lista histórico de pedidos entregues"""
     if not session.get('autenticado'):
         return jsonify({"erro": "Não autorizado"}), 401
     
+    desde = request.args.get('since')
+    if desde is not None:
+        try:
+            desde = int(desde)
+        except ValueError:
+            return jsonify({"erro": "Versão inválida"}), 400
+        return jsonify(db.listar_historico_alterado(desde)), 200
+    
+    # Paginação por cursor: ?limite=&cursor=&inicio=&fim=
+    if any(chave in request.args for chave in ('limite', 'cursor', 'inicio', 'fim')):
+        try:
+            limite = int(request.args.get('limite', 50))
+        except ValueError:
+            return jsonify({"erro": "Limite inválido"}), 400
+        try:
+            pagina = db.listar_historico_paginado(limite=limite,
+                                                  cursor=request.args.get('cursor'),
+                                                  inicio=request.args.get('inicio'),
+                                                  fim=request.args.get('fim'))
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+        return jsonify(pagina), 200
+    
     historico = db.listar_historico()
     return jsonify(historico), 200
 
+def exportar_historico():
+    """Exporta o histórico com os itens em CSV ou NDJSON, em streaming (apenas admin)"""
+    if not session.get('autenticado') or session.get('tipo') != 'admin':
+        return jsonify({"erro": "Apenas administradores podem exportar o histórico"}), 403
+    
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({"erro": "Formato inválido (use csv ou ndjson)"}), 400
+    comprimir = request.args.get('gzip', 'false').lower() == 'true'
+    try:
+        lotes = db.exportar_historico(inicio=request.args.get('inicio'), fim=request.args.get('fim'))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    
+    corpo = exportar_csv(lotes) if formato == 'csv' else exportar_ndjson(lotes)
+    arquivo = f"historico.{formato}"
+    mimetype = FORMATOS_EXPORTACAO[formato]
+    if comprimir:
+        corpo = comprimir_gzip(corpo)
+        arquivo += '.gz'
+        mimetype = 'application/gzip'
+    return Response(corpo, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{arquivo}"',
+                             'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def limpar_historico():
     """Limpa todo o histórico de pedidos (apenas admin)"""
     if not session.get('autenticado'):
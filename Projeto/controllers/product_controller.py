@@ -1,10 +1,14 @@
-from flask import request, jsonify, session
+from flask import request, jsonify, session, Response
 from models.database_manager import db
 
 def listar_produtos():
-    """Lista todos os produtos (acesso público para clientes)"""
-    produtos = db.listar_produtos()
-    return jsonify(produtos), 200
+    """Lista todos os produtos (acesso público para clientes), servido do cache com ETag"""
+    corpo, etag = db.cache_cardapio.obter()
+    resposta = Response(corpo, mimetype='application/json')
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    # Devolve 304 Not Modified quando o If-None-Match do cliente confere
+    return resposta.make_conditional(request)
 
 def criar_produto():
     """Cria um novo produto"""
@@ -24,9 +28,7 @@ def criar_produto():
     except (ValueError, TypeError):
         return jsonify({"erro": "Preço inválido"}), 400
     
-    produto_id = db.criar_produto(dados['nome'], dados['descricao'], preco)
-    produtos = db.listar_produtos()
-    produto = next((p for p in produtos if p['id'] == produto_id), None)
+    produto = db.criar_produto(dados['nome'], dados['descricao'], preco, retornar_produto=True)
     
     return jsonify(produto), 201
 
@@ -38,17 +40,48 @@ def atualizar_produto(id):
     dados = request.get_json()
     
     try:
-        sucesso = db.atualizar_produto(id, dados.get('nome'), dados.get('descricao'), float(dados.get('preco')))
+        produto = db.atualizar_produto(id, dados.get('nome'), dados.get('descricao'), float(dados.get('preco')),
+                                       retornar_produto=True)
     except (ValueError, TypeError) as e:
         return jsonify({"erro": "Dados inválidos: preço deve ser um número válido"}), 400
     
-    if sucesso:
-        produtos = db.listar_produtos()
-        produto = next((p for p in produtos if p['id'] == id), None)
+    if produto:
         return jsonify(produto)
     
     return jsonify({"erro": "Produto não encontrado"}), 404
 
+def salvar_produtos_em_lote():
+    """Cria e atualiza vários produtos em uma única transação"""
+    if not session.get('autenticado'):
+        return jsonify({"erro": "Não autorizado"}), 401
+    
+    dados = request.get_json() or {}
+    produtos = dados.get('produtos')
+    
+    if not isinstance(produtos, list) or not produtos:
+        return jsonify({"erro": "Informe a lista de produtos"}), 400
+    
+    lote = []
+    for indice, produto in enumerate(produtos):
+        if not isinstance(produto, dict) or not produto.get('nome') or not produto.get('descricao') \
+                or produto.get('preco') is None:
+            return jsonify({"erro": f"Dados incompletos no item {indice}"}), 400
+        try:
+            preco = float(produto['preco'])
+            produto_id = int(produto['id']) if produto.get('id') is not None else None
+        except (ValueError, TypeError):
+            return jsonify({"erro": f"Dados inválidos no item {indice}"}), 400
+        if preco < 0:
+            return jsonify({"erro": f"Preço deve ser positivo no item {indice}"}), 400
+        lote.append({'id': produto_id, 'nome': produto['nome'], 'descricao': produto['descricao'], 'preco': preco})
+    
+    try:
+        salvos = db.salvar_produtos_em_lote(lote)
+    except LookupError as e:
+        return jsonify({"erro": str(e)}), 404
+    
+    return jsonify({"sucesso": True, "produtos": salvos}), 200
+
 def deletar_produto(id):
     """Remove um produto"""
     if not session.get('autenticado'):
@@ -1,5 +1,6 @@
 from flask import request, jsonify, session
 from models.database_manager import db
+from models.password_hasher import SobrecargaHash
 
 def cadastrar_usuario():
     if not session.get('autenticado') or session.get('tipo') != 'admin':
@@ -21,7 +22,10 @@ def cadastrar_usuario():
         return jsonify({"erro": "Tipo de usuário inválido"}), 400
     
     # Cadastrar no banco de dados
-    sucesso, mensagem = db.criar_usuario(usuario, senha, tipo)
+    try:
+        sucesso, mensagem = db.criar_usuario(usuario, senha, tipo)
+    except SobrecargaHash:
+        return jsonify({"erro": "Servidor ocupado, tente novamente em instantes"}), 503, {'Retry-After': '1'}
     
     if sucesso:
         return jsonify({
@@ -41,11 +41,11 @@ CREATE INDEX IF NOT EXISTS idx_produto_preco ON produtos(preco);
 
 -- =============================================
 -- TABELA: pedidos
--- Descrição: Pedidos em andamento
+-- Descrição: Pedidos em andamento (ao serem entregues, são movidos para historico_pedidos)
 -- =============================================
 CREATE TABLE IF NOT EXISTS pedidos (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    itens_json TEXT NOT NULL,
+    itens_json TEXT NOT NULL DEFAULT '[]',  -- legado: itens ficam em pedido_itens
     total REAL NOT NULL CHECK(total >= 0),
     status TEXT NOT NULL DEFAULT 'Pendente'
         CHECK(status IN ('Pendente', 'Preparando', 'Pronto', 'Entregue')),
@@ -53,9 +53,13 @@ CREATE TABLE IF NOT EXISTS pedidos (
     data_entrega TIMESTAMP NULL
 );
 
-CREATE INDEX IF NOT EXISTS idx_pedido_status ON pedidos(status);
 CREATE INDEX IF NOT EXISTS idx_pedido_data ON pedidos(data_pedido);
 CREATE INDEX IF NOT EXISTS idx_pedido_total ON pedidos(total);
+-- Índice parcial do quadro de pedidos: contém apenas os pedidos ativos
+-- (substitui idx_pedido_status, que o planejador preferia mesmo sem cobrir a ordenação)
+DROP INDEX IF EXISTS idx_pedido_status;
+CREATE INDEX IF NOT EXISTS idx_pedidos_ativos ON pedidos(data_pedido)
+    WHERE status IN ('Pendente', 'Preparando', 'Pronto');
 
 -- =============================================
 -- TABELA: historico_pedidos
@@ -64,7 +68,7 @@ CREATE INDEX IF NOT EXISTS idx_pedido_total ON pedidos(total);
 CREATE TABLE IF NOT EXISTS historico_pedidos (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     pedido_id INTEGER,
-    itens_json TEXT NOT NULL,
+    itens_json TEXT NOT NULL DEFAULT '[]',  -- legado: itens ficam em pedido_itens
     total REAL NOT NULL CHECK(total >= 0),
     status TEXT NOT NULL,
     data_pedido TIMESTAMP NOT NULL,
@@ -74,6 +78,28 @@ CREATE TABLE IF NOT EXISTS historico_pedidos (
 CREATE INDEX IF NOT EXISTS idx_historico_data_pedido ON historico_pedidos(data_pedido);
 CREATE INDEX IF NOT EXISTS idx_historico_data_entrega ON historico_pedidos(data_entrega);
 CREATE INDEX IF NOT EXISTS idx_historico_total ON historico_pedidos(total);
+CREATE INDEX IF NOT EXISTS idx_historico_pedido ON historico_pedidos(pedido_id);
+-- Cobre contagem e receita por intervalo de data_entrega sem ler a tabela
+CREATE INDEX IF NOT EXISTS idx_historico_entrega_total ON historico_pedidos(data_entrega, total);
+
+-- =============================================
+-- TABELA: pedido_itens
+-- Descrição: Itens dos pedidos. A mesma linha aponta para o pedido ativo
+-- (pedido_id) e, após a entrega, para o registro do histórico (historico_id)
+-- =============================================
+CREATE TABLE IF NOT EXISTS pedido_itens (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pedido_id INTEGER NULL,
+    historico_id INTEGER NULL,
+    produto_id INTEGER NULL,
+    nome TEXT NOT NULL,
+    preco REAL NOT NULL DEFAULT 0,
+    quantidade INTEGER NOT NULL DEFAULT 1 CHECK(quantidade > 0)
+);
+
+CREATE INDEX IF NOT EXISTS idx_itens_pedido ON pedido_itens(pedido_id);
+CREATE INDEX IF NOT EXISTS idx_itens_historico ON pedido_itens(historico_id);
+CREATE INDEX IF NOT EXISTS idx_itens_produto ON pedido_itens(produto_id, historico_id);
 
 -- =============================================
 -- TABELA: lucros_diarios
@@ -91,26 +117,74 @@ CREATE TABLE IF NOT EXISTS lucros_diarios (
 CREATE INDEX IF NOT EXISTS idx_lucros_data ON lucros_diarios(data);
 CREATE INDEX IF NOT EXISTS idx_lucros_receita ON lucros_diarios(receita_total);
 
+-- Marcador de lote: enquanto tiver uma linha (só dentro da transação que arquiva um lote grande),
+-- o trigger atualizar_lucros_diarios não age e a transação soma os lucros com um upsert agrupado
+CREATE TABLE IF NOT EXISTS lucros_em_lote (
+    id INTEGER PRIMARY KEY CHECK(id = 1)
+);
+
+-- =============================================
+-- TABELA: vendas_produto_diarias
+-- Descrição: Unidades e receita entregues por produto e dia, mantidas pelos
+-- triggers de pedido_itens ao ligar um item ao histórico
+-- =============================================
+CREATE TABLE IF NOT EXISTS vendas_produto_diarias (
+    produto_id INTEGER NOT NULL,
+    data DATE NOT NULL,
+    quantidade INTEGER NOT NULL DEFAULT 0,
+    receita REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (produto_id, data)
+);
+
+-- Cobre o ranking por período (data) sem ler a tabela
+CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas_produto_diarias(data, produto_id, quantidade, receita);
+
+-- =============================================
+-- TABELA: estatisticas_live
+-- Descrição: Contadores gerais materializados (linha única), mantidos por triggers
+-- sobre historico_pedidos; 'dia' marca a que data local os números de hoje se referem
+-- =============================================
+CREATE TABLE IF NOT EXISTS estatisticas_live (
+    id INTEGER PRIMARY KEY CHECK(id = 1),
+    total_pedidos INTEGER NOT NULL DEFAULT 0 CHECK(total_pedidos >= 0),
+    receita_total REAL NOT NULL DEFAULT 0 CHECK(receita_total >= 0),
+    dia DATE NOT NULL DEFAULT (date('now', 'localtime')),
+    pedidos_hoje INTEGER NOT NULL DEFAULT 0 CHECK(pedidos_hoje >= 0),
+    receita_hoje REAL NOT NULL DEFAULT 0 CHECK(receita_hoje >= 0),
+    atualizado_em TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+INSERT OR IGNORE INTO estatisticas_live (id) VALUES (1);
+
+-- =============================================
+-- TABELA: alteracoes
+-- Descrição: Versão da última alteração de cada registro (sincronização e backups incrementais)
+-- =============================================
+CREATE TABLE IF NOT EXISTS alteracoes (
+    versao INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabela TEXT NOT NULL,
+    registro_id INTEGER NOT NULL,
+    operacao TEXT NOT NULL CHECK(operacao IN ('I', 'U', 'D')),
+    UNIQUE(tabela, registro_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_alteracoes_tabela_versao ON alteracoes(tabela, versao);
+
 -- =============================================
 -- VIEWS ÚTEIS
 -- =============================================
 
--- View: Resumo de vendas por produto
-CREATE VIEW IF NOT EXISTS vendas_por_produto AS
+-- View: Resumo de vendas por produto (a partir do rollup diário; receita = preço do item × quantidade)
+DROP VIEW IF EXISTS vendas_por_produto;
+CREATE VIEW vendas_por_produto AS
 SELECT
     p.id,
     p.nome,
     p.preco,
-    COUNT(*) as total_vendido,
-    SUM(p.preco) as receita_gerada
+    SUM(v.quantidade) as total_vendido,
+    SUM(v.receita) as receita_gerada
 FROM produtos p
-JOIN (
-    SELECT
-        json_extract(value, '$.id') as produto_id,
-        CAST(json_extract(value, '$.quantidade') AS INTEGER) as quantidade
-    FROM historico_pedidos hp,
-    json_each(hp.itens_json)
-) vendas ON p.id = vendas.produto_id
+JOIN vendas_produto_diarias v ON v.produto_id = p.id
 GROUP BY p.id, p.nome, p.preco;
 
 -- View: Estatísticas gerais
@@ -128,19 +202,189 @@ SELECT
 -- =============================================
 
 -- Trigger: Atualizar lucros diários quando pedido é entregue
-CREATE TRIGGER IF NOT EXISTS atualizar_lucros_diarios
+-- (upsert de custo constante; versões antigas recontavam o dia inteiro)
+DROP TRIGGER IF EXISTS atualizar_lucros_diarios;
+CREATE TRIGGER atualizar_lucros_diarios
+AFTER INSERT ON historico_pedidos
+WHEN NOT EXISTS (SELECT 1 FROM lucros_em_lote)
+BEGIN
+    INSERT INTO lucros_diarios (data, total_pedidos, receita_total, ticket_medio, atualizado_em)
+    VALUES (DATE(NEW.data_entrega), 1, NEW.total, NEW.total, datetime('now', 'localtime'))
+    ON CONFLICT(data) DO UPDATE SET
+        total_pedidos = total_pedidos + 1,
+        receita_total = receita_total + excluded.receita_total,
+        ticket_medio = (receita_total + excluded.receita_total) / (total_pedidos + 1),
+        atualizado_em = excluded.atualizado_em;
+END;
+
+-- Trigger: Descontar dos lucros diários o registro removido do histórico
+CREATE TRIGGER IF NOT EXISTS ajustar_lucros_diarios_remocao
+AFTER DELETE ON historico_pedidos
+BEGIN
+    UPDATE lucros_diarios SET
+        total_pedidos = total_pedidos - 1,
+        receita_total = MAX(receita_total - OLD.total, 0),
+        ticket_medio = CASE WHEN total_pedidos > 1
+            THEN MAX(receita_total - OLD.total, 0) / (total_pedidos - 1) ELSE 0 END,
+        atualizado_em = datetime('now', 'localtime')
+    WHERE data = DATE(OLD.data_entrega) AND total_pedidos > 0;
+    DELETE FROM lucros_diarios WHERE data = DATE(OLD.data_entrega) AND total_pedidos = 0;
+END;
+
+-- Triggers: Manter estatisticas_live a cada entrega ou remoção do histórico.
+-- O primeiro registro após a meia-noite (horário local) zera os números de hoje.
+CREATE TRIGGER IF NOT EXISTS atualizar_estatisticas_live
+AFTER INSERT ON historico_pedidos
+BEGIN
+    UPDATE estatisticas_live SET dia = date('now', 'localtime'), pedidos_hoje = 0, receita_hoje = 0
+    WHERE id = 1 AND dia <> date('now', 'localtime');
+    UPDATE estatisticas_live SET
+        total_pedidos = total_pedidos + 1,
+        receita_total = receita_total + NEW.total,
+        pedidos_hoje = pedidos_hoje + (DATE(NEW.data_entrega) = dia),
+        receita_hoje = receita_hoje + CASE WHEN DATE(NEW.data_entrega) = dia THEN NEW.total ELSE 0 END,
+        atualizado_em = datetime('now', 'localtime')
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ajustar_estatisticas_live_remocao
+AFTER DELETE ON historico_pedidos
+BEGIN
+    UPDATE estatisticas_live SET dia = date('now', 'localtime'), pedidos_hoje = 0, receita_hoje = 0
+    WHERE id = 1 AND dia <> date('now', 'localtime');
+    UPDATE estatisticas_live SET
+        total_pedidos = MAX(total_pedidos - 1, 0),
+        receita_total = MAX(receita_total - OLD.total, 0),
+        pedidos_hoje = MAX(pedidos_hoje - (DATE(OLD.data_entrega) = dia), 0),
+        receita_hoje = MAX(receita_hoje - CASE WHEN DATE(OLD.data_entrega) = dia THEN OLD.total ELSE 0 END, 0),
+        atualizado_em = datetime('now', 'localtime')
+    WHERE id = 1;
+END;
+
+-- Triggers: Remover itens órfãos quando o pedido ou o registro do histórico é apagado
+CREATE TRIGGER IF NOT EXISTS remover_itens_pedido
+AFTER DELETE ON pedidos
+BEGIN
+    DELETE FROM pedido_itens WHERE pedido_id = OLD.id AND historico_id IS NULL;
+    UPDATE pedido_itens SET pedido_id = NULL WHERE pedido_id = OLD.id;
+END;
+
+-- (também desconta de vendas_produto_diarias os itens do registro removido, antes de soltá-los)
+DROP TRIGGER IF EXISTS remover_itens_historico;
+CREATE TRIGGER remover_itens_historico
+AFTER DELETE ON historico_pedidos
+BEGIN
+    UPDATE vendas_produto_diarias SET
+        quantidade = vendas_produto_diarias.quantidade - i.quantidade,
+        receita = MAX(vendas_produto_diarias.receita - i.receita, 0)
+    FROM (SELECT produto_id, SUM(quantidade) AS quantidade, SUM(preco * quantidade) AS receita
+          FROM pedido_itens WHERE historico_id = OLD.id AND produto_id IS NOT NULL
+          GROUP BY produto_id) AS i
+    WHERE vendas_produto_diarias.produto_id = i.produto_id
+      AND vendas_produto_diarias.data = DATE(OLD.data_entrega);
+    DELETE FROM vendas_produto_diarias WHERE data = DATE(OLD.data_entrega) AND quantidade <= 0;
+    DELETE FROM pedido_itens WHERE historico_id = OLD.id AND pedido_id IS NULL;
+    UPDATE pedido_itens SET historico_id = NULL WHERE historico_id = OLD.id;
+END;
+
+-- Triggers: Somar em vendas_produto_diarias cada item que passa a pertencer ao histórico
+-- (na entrega o item é religado; em migrações e importações já é inserido ligado)
+CREATE TRIGGER IF NOT EXISTS registrar_venda_item
+AFTER UPDATE OF historico_id ON pedido_itens
+WHEN OLD.historico_id IS NULL AND NEW.historico_id IS NOT NULL AND NEW.produto_id IS NOT NULL
+BEGIN
+    INSERT INTO vendas_produto_diarias (produto_id, data, quantidade, receita)
+    SELECT NEW.produto_id, DATE(h.data_entrega), NEW.quantidade, NEW.preco * NEW.quantidade
+    FROM historico_pedidos h WHERE h.id = NEW.historico_id
+    ON CONFLICT(produto_id, data) DO UPDATE SET
+        quantidade = quantidade + excluded.quantidade,
+        receita = receita + excluded.receita;
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_venda_item_insercao
+AFTER INSERT ON pedido_itens
+WHEN NEW.historico_id IS NOT NULL AND NEW.produto_id IS NOT NULL
+BEGIN
+    INSERT INTO vendas_produto_diarias (produto_id, data, quantidade, receita)
+    SELECT NEW.produto_id, DATE(h.data_entrega), NEW.quantidade, NEW.preco * NEW.quantidade
+    FROM historico_pedidos h WHERE h.id = NEW.historico_id
+    ON CONFLICT(produto_id, data) DO UPDATE SET
+        quantidade = quantidade + excluded.quantidade,
+        receita = receita + excluded.receita;
+END;
+
+-- Triggers: Registrar alterações de pedidos e histórico para o feed de versões
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_pedidos_insert
+AFTER INSERT ON pedidos
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('pedidos', NEW.id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_pedidos_update
+AFTER UPDATE ON pedidos
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('pedidos', NEW.id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_pedidos_delete
+AFTER DELETE ON pedidos
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('pedidos', OLD.id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_historico_pedidos_insert
 AFTER INSERT ON historico_pedidos
 BEGIN
-    INSERT OR REPLACE INTO lucros_diarios (data, total_pedidos, receita_total, ticket_medio, atualizado_em)
-    SELECT
-        DATE(NEW.data_entrega),
-        COUNT(*) + COALESCE(ld.total_pedidos, 0),
-        NEW.total + COALESCE(ld.receita_total, 0),
-        (NEW.total + COALESCE(ld.receita_total, 0)) / (COUNT(*) + COALESCE(ld.total_pedidos, 0)),
-        CURRENT_TIMESTAMP
-    FROM historico_pedidos hp
-    LEFT JOIN lucros_diarios ld ON ld.data = DATE(NEW.data_entrega)
-    WHERE DATE(hp.data_entrega) = DATE(NEW.data_entrega);
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('historico_pedidos', NEW.id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_historico_pedidos_update
+AFTER UPDATE ON historico_pedidos
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('historico_pedidos', NEW.id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_historico_pedidos_delete
+AFTER DELETE ON historico_pedidos
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('historico_pedidos', OLD.id, 'D');
+END;
+
+-- Triggers: Registrar alterações de produtos e itens para os backups incrementais
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_produtos_insert
+AFTER INSERT ON produtos
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('produtos', NEW.id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_produtos_update
+AFTER UPDATE ON produtos
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('produtos', NEW.id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_produtos_delete
+AFTER DELETE ON produtos
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('produtos', OLD.id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_pedido_itens_insert
+AFTER INSERT ON pedido_itens
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('pedido_itens', NEW.id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_pedido_itens_update
+AFTER UPDATE ON pedido_itens
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('pedido_itens', NEW.id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS registrar_alteracao_pedido_itens_delete
+AFTER DELETE ON pedido_itens
+BEGIN
+    INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES ('pedido_itens', OLD.id, 'D');
 END;
 
 -- =============================================
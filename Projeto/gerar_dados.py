@@ -0,0 +1,300 @@
+"""Gera um banco com dados sintéticos realistas para testes de desempenho.
+
+Uso: python gerar_dados.py [--db cardapio_teste.db] [--produtos 2000] [--dias 90] [--pedidos-por-dia 1000]
+                           [--itens 1-4] [--status Entregue=0.9,Pronto=0.03,Preparando=0.04,Pendente=0.03]
+                           [--dias-abertos 1] [--semente 42] [--ate AAAA-MM-DD] [--substituir]
+
+Os pedidos se distribuem pelo dia com picos no almoço e no jantar e os produtos seguem uma
+popularidade desigual. A mistura de status vale para os últimos --dias-abertos dias; os anteriores
+estão todos entregues, no histórico. Com a mesma semente e o mesmo --ate o banco gerado é idêntico
+(sem --ate o período termina agora e o dia de hoje só tem pedidos até a hora atual).
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.migrations import aplicar_migracoes
+from models.aggregates import (suspender_gatilhos, restaurar_gatilhos, reconstruir_lucros_diarios,
+                               reconstruir_estatisticas, GATILHOS_REGISTRO_INSERCAO)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database_schema.sql')
+
+STATUS = ('Pendente', 'Preparando', 'Pronto', 'Entregue')
+MIX_PADRAO = {'Entregue': 0.90, 'Pronto': 0.03, 'Preparando': 0.04, 'Pendente': 0.03}
+
+# Categoria, faixa de preço e variações; os nomes combinam categoria, variação e tamanho
+CATEGORIAS = [
+    ('Pizza', (35.0, 75.0), ['Margherita', 'Calabresa', 'Portuguesa', 'Quatro Queijos', 'Frango com Catupiry']),
+    ('Hambúrguer', (22.0, 48.0), ['Clássico', 'Bacon', 'Cheddar', 'Vegano', 'Duplo']),
+    ('Pastel', (8.0, 16.0), ['Carne', 'Queijo', 'Pizza', 'Palmito', 'Frango']),
+    ('Salada', (18.0, 35.0), ['Caesar', 'Caprese', 'Tropical', 'Grega']),
+    ('Suco', (7.0, 14.0), ['Laranja', 'Limão', 'Maracujá', 'Morango', 'Abacaxi com Hortelã']),
+    ('Refrigerante', (5.0, 12.0), ['Cola', 'Guaraná', 'Laranja', 'Limão']),
+    ('Sobremesa', (9.0, 25.0), ['Pudim', 'Brownie', 'Petit Gâteau', 'Açaí', 'Mousse']),
+]
+TAMANHOS = ['P', 'M', 'G', 'Família']
+
+# Peso relativo de cada hora do dia (picos no almoço e no jantar)
+PESOS_HORA = [0, 0, 0, 0, 0, 0, 1, 2, 3, 4, 6, 14, 20, 14, 6, 4, 5, 8, 16, 22, 18, 10, 4, 1]
+
+TAMANHO_BLOCO = 50000
+
+def ler_mix(texto):
+    """Converte 'Entregue=0.9,Pronto=0.1' em pesos por status"""
+    mix = {}
+    for parte in filter(None, (p.strip() for p in texto.split(','))):
+        status, _, peso = parte.partition('=')
+        if status not in STATUS:
+            raise ValueError(f"Status inválido: {status}")
+        mix[status] = float(peso)
+    if sum(mix.values()) <= 0:
+        raise ValueError("A mistura de status precisa de algum peso positivo")
+    return mix
+
+def gerar_produtos(quantidade, aleatorio):
+    produtos = []
+    for i in range(quantidade):
+        categoria, (minimo, maximo), variacoes = CATEGORIAS[i % len(CATEGORIAS)]
+        variacao = variacoes[(i // len(CATEGORIAS)) % len(variacoes)]
+        tamanho = TAMANHOS[(i // (len(CATEGORIAS) * 5)) % len(TAMANHOS)]
+        nome = f"{categoria} {variacao} {tamanho}"
+        if i >= len(CATEGORIAS) * 5 * len(TAMANHOS):
+            nome += f" #{i + 1}"
+        produtos.append((i + 1, nome, f"{categoria} sabor {variacao.lower()}", round(aleatorio.uniform(minimo, maximo), 2)))
+    return produtos
+
+# Quantidade de cada item: 1 em 80% dos casos, 2 a 4 no restante
+QUANTIDADES = (1,) * 16 + (2, 2, 3, 4)
+
+def _segundos_do_dia(aleatorio, quantidade, limite):
+    """Instantes (segundos desde a meia-noite, ordenados) com a distribuição de PESOS_HORA até 'limite'"""
+    acumulado = list(accumulate(PESOS_HORA[:(limite - 1) // 3600 + 1]))
+    if not acumulado or acumulado[-1] == 0:
+        return []
+    horas = aleatorio.choices(range(len(acumulado)), cum_weights=acumulado, k=quantidade)
+    return sorted(min(hora * 3600 + aleatorio.randrange(3600), limite - 1) for hora in horas)
+
+def _hora(data, segundos):
+    """'AAAA-MM-DD HH:MM:SS' sem passar por datetime (milhões de chamadas)"""
+    return f"{data} {segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+def _blocos(produtos, dias, pedidos_por_dia, itens, mix, dias_abertos, aleatorio, ate, agora, vendas):
+    """Gera (historico, pedidos, itens) em blocos, em ordem cronológica; ids de pedido crescem com o tempo.
+
+    Os sorteios de cada dia são feitos de uma vez (choices com k) e o laço por pedido só fatia os
+    resultados. As vendas entregues são somadas em 'vendas' (dia -> quantidades e centavos por produto)
+    durante a geração: reagrupar milhões de itens no SQLite custaria mais que a carga inteira.
+    """
+    precos = [round(p[3] * 100) for p in produtos]
+    precos_reais = [p[3] for p in produtos]
+    ids = [p[0] for p in produtos]
+    nomes = [p[1] for p in produtos]
+    # Popularidade desigual (Zipf): alguns produtos vendem muito mais que os outros
+    popularidade = list(accumulate(1 / (posicao + 1) ** 0.8 for posicao in range(len(produtos))))
+    ordem = list(range(len(produtos)))
+    aleatorio.shuffle(ordem)
+    status_mix = list(mix)
+    pesos_mix = list(accumulate(mix[s] for s in status_mix))
+    faixa_itens = range(itens[0], itens[1] + 1)
+    faixa_entrega = range(600, 3000)
+    escolher = aleatorio.choices
+    
+    def vendas_do_dia(data):
+        if data not in vendas:
+            vendas[data] = ([0] * len(produtos), [0] * len(produtos))
+        return vendas[data]
+    
+    pedido_id = historico_id = 0
+    historico, ativos, linhas_itens = [], [], []
+    for deslocamento in range(dias - 1, -1, -1):
+        dia = ate - timedelta(days=deslocamento)
+        data, data_seguinte = dia.isoformat(), (dia + timedelta(days=1)).isoformat()
+        limite = 86400
+        quantidade = pedidos_por_dia
+        if dia == agora.date():
+            # Hoje: só até agora, com a fração do movimento diário que já passou
+            limite = max(agora.hour * 3600 + agora.minute * 60 + agora.second, 1)
+            quantidade = round(pedidos_por_dia * sum(PESOS_HORA[:limite // 3600]) / sum(PESOS_HORA))
+        instantes = _segundos_do_dia(aleatorio, quantidade, limite)
+        quantidade = len(instantes)
+        if not quantidade:
+            continue
+        itens_por_pedido = escolher(faixa_itens, k=quantidade)
+        total_itens = sum(itens_por_pedido)
+        sorteados = escolher(ordem, cum_weights=popularidade, k=total_itens)
+        quantidades = escolher(QUANTIDADES, k=total_itens)
+        atrasos = escolher(faixa_entrega, k=quantidade)
+        if deslocamento < dias_abertos:
+            status_dia = escolher(status_mix, cum_weights=pesos_mix, k=quantidade)
+        else:
+            status_dia = ('Entregue',) * quantidade
+        vendidos_hoje = vendas_do_dia(data)
+        vendidos_amanha = None
+        
+        posicao = 0
+        for segundos, n, atraso, status in zip(instantes, itens_por_pedido, atrasos, status_dia):
+            pedido_id += 1
+            total = 0
+            fim = posicao + n
+            if status == 'Entregue':
+                historico_id += 1
+                entrega = segundos + atraso if limite == 86400 else min(segundos + atraso, limite - 1)
+                if entrega < 86400:
+                    dia_entrega, (unidades, centavos) = data, vendidos_hoje
+                else:
+                    vendidos_amanha = vendidos_amanha or vendas_do_dia(data_seguinte)
+                    dia_entrega, (unidades, centavos) = data_seguinte, vendidos_amanha
+                    entrega -= 86400
+                for produto, quantidade_item in zip(sorteados[posicao:fim], quantidades[posicao:fim]):
+                    subtotal = precos[produto] * quantidade_item
+                    total += subtotal
+                    unidades[produto] += quantidade_item
+                    centavos[produto] += subtotal
+                    linhas_itens.append((None, historico_id, ids[produto], nomes[produto], precos_reais[produto], quantidade_item))
+                historico.append((historico_id, pedido_id, total / 100, _hora(data, segundos), _hora(dia_entrega, entrega)))
+            else:
+                for produto, quantidade_item in zip(sorteados[posicao:fim], quantidades[posicao:fim]):
+                    total += precos[produto] * quantidade_item
+                    linhas_itens.append((pedido_id, None, ids[produto], nomes[produto], precos_reais[produto], quantidade_item))
+                ativos.append((pedido_id, total / 100, status, _hora(data, segundos)))
+            posicao = fim
+            if len(historico) + len(ativos) >= TAMANHO_BLOCO:
+                yield historico, ativos, linhas_itens
+                historico, ativos, linhas_itens = [], [], []
+    yield historico, ativos, linhas_itens
+
+def _linhas_vendas(vendas, ids):
+    """Linhas de vendas_produto_diarias na ordem da chave primária (produto, dia)"""
+    dias = sorted(vendas)
+    for produto, produto_id in enumerate(ids):
+        for data in dias:
+            unidades, centavos = vendas[data]
+            if unidades[produto]:
+                yield produto_id, data, unidades[produto], centavos[produto] / 100
+
+def _suspender_indices(cursor, tabelas):
+    """Remove os índices das tabelas carregadas e retorna suas definições: recriar ordena uma vez só"""
+    marcadores = ', '.join('?' * len(tabelas))
+    cursor.execute(f"""SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({marcadores})""", tabelas)
+    indices = cursor.fetchall()
+    for nome, _ in indices:
+        cursor.execute(f"DROP INDEX {nome}")
+    return [sql for _, sql in indices]
+
+def gerar(db_path, produtos=2000, dias=90, pedidos_por_dia=1000, itens=(1, 4), mix=None, dias_abertos=1,
+          semente=42, ate=None, substituir=False):
+    """Cria db_path do zero com os dados sintéticos; retorna as contagens geradas"""
+    if os.path.exists(db_path):
+        if not substituir:
+            raise FileExistsError(f"{db_path} já existe (use --substituir)")
+        for sufixo in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + sufixo):
+                os.remove(db_path + sufixo)
+    if produtos < 1 or dias < 1 or pedidos_por_dia < 0 or not 1 <= itens[0] <= itens[1]:
+        raise ValueError("Forma inválida: produtos, dias e itens por pedido precisam ser positivos")
+    agora = datetime.now().replace(microsecond=0)
+    ate = ate or agora.date()
+    aleatorio = random.Random(semente)
+    
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+        aplicar_migracoes(conn)
+        # Arquivo novo: sem journal durante a carga (uma falha descarta o arquivo inteiro, logo abaixo)
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-262144")
+        conn.execute("PRAGMA threads=4")
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        # Agregados gravados uma vez no fim; inclusões não vão para alteracoes (banco novo, clientes
+        # começam por uma carga completa)
+        gatilhos = suspender_gatilhos(cursor)
+        registro_insercoes = suspender_gatilhos(cursor, GATILHOS_REGISTRO_INSERCAO)
+        indices = _suspender_indices(cursor, ('historico_pedidos', 'pedidos', 'pedido_itens', 'vendas_produto_diarias'))
+    
+        lista_produtos = gerar_produtos(produtos, aleatorio)
+        # Substitui os produtos de exemplo do schema
+        cursor.execute("DELETE FROM produtos")
+        # Cadastro fixo no início do período (o padrão do schema é a hora atual, que varia entre execuções)
+        cadastro = f"{(ate - timedelta(days=dias)).isoformat()} 00:00:00"
+        cursor.executemany("INSERT INTO produtos (id, nome, descricao, preco, data_cadastro) VALUES (?, ?, ?, ?, ?)",
+                           [produto + (cadastro,) for produto in lista_produtos])
+        contagens = {'produtos': produtos, 'historico': 0, 'ativos': 0, 'itens': 0}
+        vendas = {}
+        ultimo_pedido = 0
+        for historico, ativos, linhas_itens in _blocos(lista_produtos, dias, pedidos_por_dia, itens, mix or MIX_PADRAO,
+                                                       dias_abertos, aleatorio, ate, agora, vendas):
+            cursor.executemany("""INSERT INTO historico_pedidos (id, pedido_id, total, status, data_pedido, data_entrega)
+                VALUES (?, ?, ?, 'Entregue', ?, ?)""", historico)
+            cursor.executemany("INSERT INTO pedidos (id, total, status, data_pedido) VALUES (?, ?, ?, ?)", ativos)
+            cursor.executemany("""INSERT INTO pedido_itens (pedido_id, historico_id, produto_id, nome, preco, quantidade)
+                VALUES (?, ?, ?, ?, ?, ?)""", linhas_itens)
+            contagens['historico'] += len(historico)
+            contagens['ativos'] += len(ativos)
+            contagens['itens'] += len(linhas_itens)
+            ultimo_pedido = max([ultimo_pedido] + [h[1] for h in historico[-1:]] + [a[0] for a in ativos[-1:]])
+    
+        # Próximos pedidos criados pela aplicação continuam depois do último id gerado, entregue ou não
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'pedidos'")
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('pedidos', ?)", (ultimo_pedido,))
+        cursor.executemany("INSERT INTO vendas_produto_diarias (produto_id, data, quantidade, receita) VALUES (?, ?, ?, ?)",
+                           _linhas_vendas(vendas, [p[0] for p in lista_produtos]))
+        restaurar_gatilhos(cursor, indices)
+        reconstruir_lucros_diarios(cursor)
+        reconstruir_estatisticas(cursor)
+        restaurar_gatilhos(cursor, registro_insercoes)
+        restaurar_gatilhos(cursor, gatilhos)
+        cursor.execute("COMMIT")
+        conn.execute("PRAGMA journal_mode=WAL")
+    except BaseException:
+        # Sem journal o ROLLBACK não é confiável e triggers e índices estão suspensos: apaga o arquivo
+        conn.close()
+        for sufixo in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + sufixo):
+                os.remove(db_path + sufixo)
+        raise
+    conn.close()
+    return contagens
+
+def _ler_itens(texto):
+    minimo, _, maximo = texto.partition('-')
+    return int(minimo), int(maximo or minimo)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='cardapio_teste.db', help='Arquivo do banco a gerar')
+    parser.add_argument('--produtos', type=int, default=2000)
+    parser.add_argument('--dias', type=int, default=90, help='Dias de movimento, terminando em --ate')
+    parser.add_argument('--pedidos-por-dia', type=int, default=1000)
+    parser.add_argument('--itens', type=_ler_itens, default=(1, 4), help='Itens por pedido, ex.: 1-4')
+    parser.add_argument('--status', type=ler_mix, default=MIX_PADRAO,
+                        help='Mistura de status dos dias abertos, ex.: Entregue=0.9,Pronto=0.1')
+    parser.add_argument('--dias-abertos', type=int, default=1, help='Últimos dias que seguem a mistura de status')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--ate', type=date.fromisoformat, help='Último dia (AAAA-MM-DD); padrão: hoje, até agora')
+    parser.add_argument('--substituir', action='store_true', help='Apaga o arquivo se ele já existir')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    try:
+        contagens = gerar(args.db, produtos=args.produtos, dias=args.dias, pedidos_por_dia=args.pedidos_por_dia,
+                          itens=args.itens, mix=args.status, dias_abertos=args.dias_abertos, semente=args.semente,
+                          ate=args.ate, substituir=args.substituir)
+    except (FileExistsError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {args.db} gerado em {time.perf_counter() - inicio:.1f} s: {contagens['produtos']} produtos, "
+          f"{contagens['historico']} pedidos no histórico, {contagens['ativos']} em andamento, {contagens['itens']} itens")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+def reconstruir_lucros_diarios(cursor):
+    """Recalcula lucros_diarios a partir do histórico em uma única passada agrupada"""
+    cursor.execute("DELETE FROM lucros_diarios")
+    cursor.execute("""INSERT INTO lucros_diarios (data, total_pedidos, receita_total, ticket_medio, atualizado_em)
+        SELECT DATE(data_entrega), COUNT(*), SUM(total), AVG(total), datetime('now', 'localtime')
+        FROM historico_pedidos
+        GROUP BY DATE(data_entrega)""")
+    return cursor.rowcount
+
+def reconstruir_vendas_produto(cursor):
+    """Recalcula vendas_produto_diarias em uma passada agrupada sobre os itens do histórico"""
+    cursor.execute("DELETE FROM vendas_produto_diarias")
+    cursor.execute("""INSERT INTO vendas_produto_diarias (produto_id, data, quantidade, receita)
+        SELECT i.produto_id, DATE(h.data_entrega), SUM(i.quantidade), SUM(i.preco * i.quantidade)
+        FROM pedido_itens i
+        JOIN historico_pedidos h ON h.id = i.historico_id
+        WHERE i.produto_id IS NOT NULL
+        GROUP BY i.produto_id, DATE(h.data_entrega)""")
+    return cursor.rowcount
+
+def calcular_estatisticas(cursor):
+    """Calcula os contadores de estatisticas_live direto do histórico bruto"""
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(total), 0) FROM historico_pedidos")
+    total_pedidos, receita_total = cursor.fetchone()
+    cursor.execute("""SELECT date('now', 'localtime'), COUNT(*), COALESCE(SUM(total), 0) FROM historico_pedidos
+        WHERE data_entrega >= date('now', 'localtime') AND data_entrega < date('now', 'localtime', '+1 day')""")
+    dia, pedidos_hoje, receita_hoje = cursor.fetchone()
+    return {'total_pedidos': total_pedidos, 'receita_total': receita_total, 'dia': dia,
+            'pedidos_hoje': pedidos_hoje, 'receita_hoje': receita_hoje}
+
+def reconstruir_estatisticas(cursor):
+    """Regrava estatisticas_live a partir do histórico; retorna os valores gravados"""
+    valores = calcular_estatisticas(cursor)
+    cursor.execute("""INSERT OR REPLACE INTO estatisticas_live
+        (id, total_pedidos, receita_total, dia, pedidos_hoje, receita_hoje, atualizado_em)
+        VALUES (1, :total_pedidos, :receita_total, :dia, :pedidos_hoje, :receita_hoje, datetime('now', 'localtime'))""",
+        valores)
+    return valores
+
+def acumular_lucros_diarios(cursor, primeiro_id, ultimo_id):
+    """Soma em lucros_diarios, com um upsert agrupado por dia, os registros do histórico no intervalo de ids"""
+    cursor.execute("""INSERT INTO lucros_diarios (data, total_pedidos, receita_total, ticket_medio, atualizado_em)
+        SELECT DATE(data_entrega), COUNT(*), SUM(total), AVG(total), datetime('now', 'localtime')
+        FROM historico_pedidos
+        WHERE id BETWEEN ? AND ?
+        GROUP BY DATE(data_entrega)
+        ON CONFLICT(data) DO UPDATE SET
+            total_pedidos = total_pedidos + excluded.total_pedidos,
+            receita_total = receita_total + excluded.receita_total,
+            ticket_medio = (receita_total + excluded.receita_total) / (total_pedidos + excluded.total_pedidos),
+            atualizado_em = excluded.atualizado_em""", (primeiro_id, ultimo_id))
+
+
+# Triggers que mantêm tabelas agregadas; cargas em massa os suspendem e reconstroem os agregados no fim
+GATILHOS_AGREGADOS = ('atualizar_lucros_diarios', 'ajustar_lucros_diarios_remocao',
+                      'atualizar_estatisticas_live', 'ajustar_estatisticas_live_remocao',
+                      'registrar_venda_item', 'registrar_venda_item_insercao')
+
+def suspender_gatilhos(cursor, nomes=GATILHOS_AGREGADOS):
+    """Remove os triggers dentro da transação corrente e retorna suas definições para restaurar depois"""
+    marcadores = ', '.join('?' * len(nomes))
+    cursor.execute(f"SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({marcadores})", nomes)
+    definicoes = [linha[0] for linha in cursor.fetchall()]
+    for nome in nomes:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+    return definicoes
+
+def restaurar_gatilhos(cursor, definicoes):
+    for sql in definicoes:
+        cursor.execute(sql)
+
+def reconstruir_agregados(cursor):
+    """Recalcula todas as tabelas agregadas a partir das tabelas de origem"""
+    reconstruir_lucros_diarios(cursor)
+    reconstruir_estatisticas(cursor)
+    reconstruir_vendas_produto(cursor)
+
+
+# Tabelas cujas inclusões são registradas em alteracoes pelos triggers registrar_alteracao_<tabela>_insert
+TABELAS_REGISTRADAS = ('produtos', 'pedidos', 'historico_pedidos', 'pedido_itens')
+GATILHOS_REGISTRO_INSERCAO = tuple(f'registrar_alteracao_{tabela}_insert' for tabela in TABELAS_REGISTRADAS)
+
+def registrar_insercoes_em_lote(cursor, tabelas=TABELAS_REGISTRADAS):
+    """Registra em alteracoes, com uma instrução por tabela, as linhas carregadas com os triggers suspensos"""
+    for tabela in tabelas:
+        cursor.execute(f"""INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao)
+            SELECT '{tabela}', id, 'I' FROM {tabela} ORDER BY id""")
@@ -1,7 +1,137 @@
+import gzip
+import hashlib
 import json
+import re
+import sqlite3
+import time
 from datetime import datetime
 import os
-import sqlite3
+from models.connection_pool import obter_pool
+from models.migrations import migrar_itens_json, aplicar_migracoes
+from models.order_archive import arquivar_entregues
+from models.aggregates import (suspender_gatilhos, restaurar_gatilhos, reconstruir_agregados,
+                               TABELAS_REGISTRADAS, GATILHOS_REGISTRO_INSERCAO, registrar_insercoes_em_lote)
+
+# Tabelas exportadas, na ordem em que são gravadas e restauradas
+TABELAS_BACKUP = [
+    ('usuarios', "SELECT id, usuario, tipo, data_cadastro, ativo FROM usuarios"),
+    ('produtos', "SELECT * FROM produtos"),
+    ('pedidos', "SELECT * FROM pedidos"),
+    ('historico_pedidos', "SELECT * FROM historico_pedidos"),
+    ('pedido_itens', "SELECT * FROM pedido_itens"),
+    ('lucros_diarios', "SELECT * FROM lucros_diarios"),
+]
+
+# Chaves das estatísticas retornadas pela exportação
+CHAVES_ESTATISTICAS = {'usuarios': 'usuarios', 'produtos': 'produtos', 'pedidos': 'pedidos',
+                       'historico_pedidos': 'historico', 'pedido_itens': 'itens'}
+
+FORMATOS_BACKUP = ('json', 'ndjson', 'sqlite', 'incremental')
+EXTENSOES_BACKUP = ('.json', '.json.gz', '.ndjson', '.ndjson.gz', '.db')
+TAMANHO_LOTE = 1000
+
+# INSERT de cada tabela restaurada e a conversão do registro do backup em parâmetros
+RESTAURACAO = {
+    'produtos': (
+        "INSERT INTO produtos (id, nome, descricao, preco, ativo) VALUES (?, ?, ?, ?, ?)",
+        lambda p: (p.get('id'), p['nome'], p['descricao'], p['preco'], p.get('ativo', 1))),
+    'pedidos': (
+        """INSERT INTO pedidos (id, itens_json, total, status, data_pedido, data_entrega)
+        VALUES (?, ?, ?, ?, ?, ?)""",
+        lambda p: (p.get('id'), p.get('itens_json', '[]'), p['total'], p['status'],
+                   p['data_pedido'], p.get('data_entrega'))),
+    'historico_pedidos': (
+        """INSERT INTO historico_pedidos (id, pedido_id, itens_json, total, status, data_pedido, data_entrega)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        lambda h: (h.get('id'), h['pedido_id'], h.get('itens_json', '[]'), h['total'], h['status'],
+                   h['data_pedido'], h['data_entrega'])),
+    'pedido_itens': (
+        """INSERT INTO pedido_itens (id, pedido_id, historico_id, produto_id, nome, preco, quantidade)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        lambda i: (i.get('id'), i.get('pedido_id'), i.get('historico_id'), i.get('produto_id'),
+                   i['nome'], i['preco'], i['quantidade'])),
+}
+
+_ESPACOS = re.compile(r'[ \t\r\n]*')
+
+
+class LeitorJsonIncremental:
+    """Percorre um documento {"chave": valor | [elementos], ...} decodificando um elemento por vez.
+
+    Gera (chave, valor) para valores simples e (chave, elemento) para cada elemento de listas,
+    mantendo em memória apenas um bloco do arquivo.
+    """
+
+    def __init__(self, arquivo, tamanho_bloco=1 << 16):
+        self._arquivo = arquivo
+        self._tamanho_bloco = tamanho_bloco
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._fim = False
+
+    def _ler(self):
+        if self._fim:
+            return False
+        bloco = self._arquivo.read(self._tamanho_bloco)
+        if not bloco:
+            self._fim = True
+            return False
+        self._buffer = self._buffer[self._pos:] + bloco
+        self._pos = 0
+        return True
+
+    def _proximo_caractere(self):
+        """Pula espaços e retorna, sem consumir, o próximo caractere significativo"""
+        while True:
+            self._pos = _ESPACOS.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._ler():
+                raise ValueError("Backup JSON incompleto")
+
+    def _consumir(self, *esperados):
+        caractere = self._proximo_caractere()
+        if caractere not in esperados:
+            raise ValueError(f"Backup JSON inválido: '{caractere}' inesperado")
+        self._pos += 1
+        return caractere
+
+    def _decodificar(self):
+        self._proximo_caractere()
+        while True:
+            try:
+                valor, fim = self._decoder.raw_decode(self._buffer, self._pos)
+                # Um valor colado ao fim do bloco pode estar truncado (ex.: número): só aceita com folga
+                if fim < len(self._buffer) or self._fim:
+                    self._pos = fim
+                    return valor
+            except json.JSONDecodeError:
+                if self._fim:
+                    raise
+            self._ler()
+
+    def __iter__(self):
+        self._consumir('{')
+        if self._proximo_caractere() == '}':
+            return
+        while True:
+            chave = self._decodificar()
+            self._consumir(':')
+            if self._proximo_caractere() == '[':
+                self._pos += 1
+                if self._proximo_caractere() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield chave, self._decodificar()
+                        if self._consumir(',', ']') == ']':
+                            break
+            else:
+                yield chave, self._decodificar()
+            if self._consumir(',', '}') == '}':
+                return
+
 
 class BackupManager:
     def __init__(self, backup_dir='backups_json', db_path='cardapio.db'):
@@ -11,83 +141,442 @@ class BackupManager:
             os.makedirs(backup_dir)
     
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return obter_pool(self.db_path).obter()
+    
+    def _abrir_arquivo(self, arquivo, modo):
+        """Abre o arquivo de backup em texto UTF-8, com gzip quando a extensão for .gz"""
+        if arquivo.endswith('.gz'):
+            return gzip.open(arquivo, modo + 't', encoding='utf-8', compresslevel=6)
+        return open(arquivo, modo, encoding='utf-8')
+    
+    @staticmethod
+    def _iterar_linhas(cursor, tamanho_lote=TAMANHO_LOTE):
+        """Percorre o resultado da consulta em lotes com fetchmany, sem materializar a tabela"""
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            yield from linhas
+    
+    def _escrever_json(self, f, cursor, metadata, contagens):
+        # Mesmo documento de sempre, gravado registro a registro (um por linha, sem indentação)
+        f.write('{"metadata": ' + json.dumps(metadata, ensure_ascii=False))
+        for tabela, consulta in TABELAS_BACKUP:
+            f.write(f',\n"{tabela}": [')
+            separador = '\n'
+            cursor.execute(consulta)
+            for linha in self._iterar_linhas(cursor):
+                f.write(separador + json.dumps(dict(linha), ensure_ascii=False, separators=(',', ':')))
+                separador = ',\n'
+                contagens[tabela] += 1
+            f.write(']')
+        f.write('}\n')
     
-    def exportar_para_json(self, arquivo=None):
+    def _escrever_ndjson(self, f, cursor, metadata, contagens):
+        # Uma linha de cabeçalho por tabela seguida de uma linha (array de valores) por registro
+        f.write(json.dumps({'metadata': metadata}, ensure_ascii=False) + '\n')
+        for tabela, consulta in TABELAS_BACKUP:
+            cursor.execute(consulta)
+            colunas = [c[0] for c in cursor.description]
+            f.write(json.dumps({'tabela': tabela, 'colunas': colunas}, ensure_ascii=False) + '\n')
+            for linha in self._iterar_linhas(cursor):
+                f.write(json.dumps(tuple(linha), ensure_ascii=False, separators=(',', ':')) + '\n')
+                contagens[tabela] += 1
+    
+    def exportar_para_json(self, arquivo=None, formato='json', comprimir=False):
+        """Exporta o banco em streaming (memória constante); formato 'json' ou 'ndjson', opcionalmente gzip"""
+        if formato not in ('json', 'ndjson'):
+            raise ValueError(f"Formato de backup inválido: {formato}")
         if arquivo is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            arquivo = os.path.join(self.backup_dir, f"backup_{timestamp}.json")
+            extensao = f".{formato}.gz" if comprimir else f".{formato}"
+            arquivo = os.path.join(self.backup_dir, f"backup_{timestamp}{extensao}")
+        
+        metadata = {'data_backup': datetime.now().isoformat(), 'versao': '1.0', 'formato': formato}
+        contagens = {tabela: 0 for tabela, _ in TABELAS_BACKUP}
+        escrever = self._escrever_ndjson if formato == 'ndjson' else self._escrever_json
         
+        # Grava em arquivo temporário para que um backup interrompido nunca substitua um válido
+        temporario = arquivo + '.tmp' + ('.gz' if arquivo.endswith('.gz') else '')
         conn = self.get_connection()
         cursor = conn.cursor()
-        dados = {
-            'metadata': {'data_backup': datetime.now().isoformat(), 'versao': '1.0'},
-            'usuarios': [], 'produtos': [], 'pedidos': [], 'historico_pedidos': [], 'lucros_diarios': []
-        }
-        cursor.execute("SELECT id, usuario, tipo, data_cadastro, ativo FROM usuarios")
-        dados['usuarios'] = [dict(row) for row in cursor.fetchall()]
-        cursor.execute("SELECT * FROM produtos")
-        dados['produtos'] = [dict(row) for row in cursor.fetchall()]
-        cursor.execute("SELECT * FROM pedidos")
-        dados['pedidos'] = [dict(row) for row in cursor.fetchall()]
-        cursor.execute("SELECT * FROM historico_pedidos")
-        dados['historico_pedidos'] = [dict(row) for row in cursor.fetchall()]
-        cursor.execute("SELECT * FROM lucros_diarios")
-        dados['lucros_diarios'] = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        
-        with open(arquivo, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, indent=2, ensure_ascii=False)
+        try:
+            # Uma única transação de leitura: todas as tabelas vêm do mesmo instante (WAL não bloqueia escritas)
+            cursor.execute("BEGIN")
+            # Versão do registro de alterações no mesmo instante da cópia (ponto de partida dos incrementais)
+            cursor.execute("SELECT COALESCE(MAX(versao), 0) FROM alteracoes")
+            metadata['versao_alteracoes'] = cursor.fetchone()[0]
+            with self._abrir_arquivo(temporario, 'w') as f:
+                escrever(f, cursor, metadata, contagens)
+            os.replace(temporario, arquivo)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        finally:
+            conn.rollback()
+            conn.close()
         
-        stats = {
-            'usuarios': len(dados['usuarios']),
-            'produtos': len(dados['produtos']),
-            'pedidos': len(dados['pedidos']),
-            'historico': len(dados['historico_pedidos'])
-        }
+        stats = {chave: contagens[tabela] for tabela, chave in CHAVES_ESTATISTICAS.items()}
         print(f"✅ Backup criado: {arquivo}")
         return arquivo, stats
     
-    def backup_automatico(self, max_backups=10):
-        arquivo, stats = self.exportar_para_json()
-        backups = sorted([os.path.join(self.backup_dir, f) for f in os.listdir(self.backup_dir)
-                         if f.startswith('backup_') and f.endswith('.json')])
-        while len(backups) > max_backups:
-            os.remove(backups.pop(0))
-        return arquivo
+    def criar_snapshot(self, arquivo=None):
+        """Cópia binária a quente do banco com VACUUM INTO, verificada com integrity_check.
+
+        A cópia é feita dentro de uma única transação de leitura: com WAL os pedidos continuam sendo
+        gravados durante o backup, e escritas concorrentes não fazem a cópia recomeçar (como acontece
+        com a API de backup página a página).
+        """
+        if arquivo is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            arquivo = os.path.join(self.backup_dir, f"backup_{timestamp}.db")
+        temporario = arquivo + '.tmp'
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        
+        origem = self.get_connection()
+        destino = None
+        try:
+            origem.execute("VACUUM INTO ?", (temporario,))
+            destino = sqlite3.connect(temporario)
+            verificacao = destino.execute("PRAGMA integrity_check").fetchone()[0]
+            if verificacao != 'ok':
+                raise sqlite3.DatabaseError(f"Snapshot corrompido: {verificacao}")
+            # Arquivo autocontido, sem -wal/-shm ao lado
+            destino.execute("PRAGMA journal_mode=DELETE")
+            stats = {chave: destino.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                     for tabela, chave in CHAVES_ESTATISTICAS.items()}
+            destino.close()
+            os.replace(temporario, arquivo)
+        except Exception:
+            if destino is not None:
+                destino.close()
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        finally:
+            origem.close()
+        
+        print(f"✅ Snapshot criado: {arquivo}")
+        return arquivo, stats
     
-    def importar_de_json(self, arquivo):
+    def restaurar_snapshot(self, arquivo):
+        """Substitui o conteúdo do banco pelo snapshot, página a página e numa única transação"""
         if not os.path.exists(arquivo):
             raise FileNotFoundError(f"Arquivo não encontrado: {arquivo}")
-        with open(arquivo, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
+        origem = sqlite3.connect(f"file:{os.path.abspath(arquivo)}?mode=ro", uri=True)
+        try:
+            verificacao = origem.execute("PRAGMA integrity_check").fetchone()[0]
+            if verificacao != 'ok':
+                raise sqlite3.DatabaseError(f"Snapshot corrompido: {verificacao}")
+            # Conexão própria: o destino da API de backup precisa ser uma sqlite3.Connection
+            destino = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                versao = destino.execute("SELECT COALESCE(MAX(versao), 0) FROM alteracoes").fetchone()[0]
+                anteriores = {tabela: [linha[0] for linha in destino.execute(f"SELECT id FROM {tabela}")]
+                              for tabela in TABELAS_REGISTRADAS}
+                origem.backup(destino)
+                # Snapshots de versões anteriores recebem as migrações pendentes
+                aplicar_migracoes(destino)
+                self._registrar_restauracao(destino, versao, anteriores)
+            finally:
+                destino.close()
+        finally:
+            origem.close()
+        print(f"✅ Snapshot restaurado: {arquivo}")
+        return True
+    
+    @staticmethod
+    def _registrar_restauracao(conn, versao, anteriores):
+        """Mantém o feed de versões crescente após trocar o banco: o snapshot traz um registro mais antigo"""
+        cursor = conn.cursor()
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'alteracoes'", (versao,))
+        cursor.execute("""INSERT INTO sqlite_sequence (name, seq) SELECT 'alteracoes', ?
+            WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'alteracoes')""", (versao,))
+        for tabela, ids in anteriores.items():
+            presentes = {linha[0] for linha in cursor.execute(f"SELECT id FROM {tabela}")}
+            cursor.executemany("INSERT OR REPLACE INTO alteracoes (tabela, registro_id, operacao) VALUES (?, ?, 'D')",
+                               [(tabela, registro_id) for registro_id in ids if registro_id not in presentes])
+        registrar_insercoes_em_lote(cursor)
+        conn.commit()
+    
+    def listar_backups(self):
+        """Arquivos de backup do diretório, do mais antigo para o mais recente"""
+        return sorted(os.path.join(self.backup_dir, f) for f in os.listdir(self.backup_dir)
+                      if f.startswith('backup_') and f.endswith(EXTENSOES_BACKUP))
+    
+    def backup_automatico(self, max_backups=10, formato='json', comprimir=False):
+        if formato == 'incremental':
+            # A cadeia incremental tem retenção própria: compactação numa nova base
+            arquivo, stats = self.backup_incremental()
+            return arquivo
+        if formato == 'sqlite':
+            arquivo, stats = self.criar_snapshot()
+        else:
+            arquivo, stats = self.exportar_para_json(formato=formato, comprimir=comprimir)
+        self.aplicar_retencao(max_backups=max_backups)
+        return arquivo
+    
+    def aplicar_retencao(self, max_backups=10, max_idade_dias=None, max_bytes=None):
+        """Remove os backups mais antigos além dos limites de quantidade, idade e espaço; o mais recente fica sempre"""
+        backups = self.listar_backups()
+        tamanhos = {arquivo: os.path.getsize(arquivo) for arquivo in backups}
+        total = sum(tamanhos.values())
+        limite_idade = time.time() - max_idade_dias * 86400 if max_idade_dias else None
+        removidos = []
+        while len(backups) > 1:
+            mais_antigo = backups[0]
+            if not ((max_backups is not None and len(backups) > max_backups)
+                    or (limite_idade is not None and os.path.getmtime(mais_antigo) < limite_idade)
+                    or (max_bytes is not None and total > max_bytes)):
+                break
+            os.remove(mais_antigo)
+            total -= tamanhos[mais_antigo]
+            removidos.append(backups.pop(0))
+        return removidos
+    
+    def tamanho_arquivo(self, arquivo):
+        """Bytes gravados por um backup (0 quando o incremental não encontrou alterações)"""
+        return os.path.getsize(arquivo) if arquivo and os.path.exists(arquivo) else 0
+    
+    def ler_backup(self, arquivo):
+        """Gera (tabela, registro) de um backup em qualquer formato; a metadata vem como ('metadata', dict)"""
+        with self._abrir_arquivo(arquivo, 'r') as f:
+            if arquivo.endswith(('.ndjson', '.ndjson.gz')):
+                tabela, colunas = None, []
+                for linha in f:
+                    valor = json.loads(linha)
+                    if isinstance(valor, list):
+                        yield tabela, dict(zip(colunas, valor))
+                    elif 'metadata' in valor:
+                        yield 'metadata', valor['metadata']
+                    elif 'removidos' in valor:
+                        # Backups incrementais: ids apagados desde o backup anterior
+                        yield 'removidos', (valor['tabela'], valor['removidos'])
+                    else:
+                        tabela, colunas = valor['tabela'], valor['colunas']
+                return
+            yield from LeitorJsonIncremental(f)
+    
+    @staticmethod
+    def _gravar_lote(cursor, tabela, lote, substituir=False):
+        sql = RESTAURACAO[tabela][0]
+        if substituir:
+            sql = sql.replace("INSERT INTO", "INSERT OR REPLACE INTO", 1)
+        cursor.executemany(sql, lote)
+        quantidade = len(lote)
+        lote.clear()
+        return quantidade
+    
+    def _carregar(self, cursor, arquivo, restaurados, progresso, tamanho_lote, substituir):
+        """Grava em lotes os registros de um arquivo de backup; substituir=True aplica um incremental"""
+        lotes = {tabela: [] for tabela in RESTAURACAO}
+        
+        def descarregar(tabela):
+            restaurados[tabela] += self._gravar_lote(cursor, tabela, lotes[tabela], substituir)
+            if progresso:
+                progresso(tabela, restaurados[tabela])
+        
+        for tabela, registro in self.ler_backup(arquivo):
+            if tabela == 'removidos':
+                # Lotes pendentes podem conter os registros removidos: grava antes de apagar
+                for pendente, lote in lotes.items():
+                    if lote:
+                        descarregar(pendente)
+                tabela_removida, ids = registro
+                if tabela_removida in RESTAURACAO:
+                    cursor.executemany(f"DELETE FROM {tabela_removida} WHERE id = ?", [(i,) for i in ids])
+                continue
+            lote = lotes.get(tabela)
+            if lote is None:
+                continue
+            lote.append(RESTAURACAO[tabela][1](registro))
+            if len(lote) >= tamanho_lote:
+                descarregar(tabela)
+        for tabela, lote in lotes.items():
+            if lote:
+                descarregar(tabela)
+    
+    def _restaurar(self, arquivos, progresso=None, tamanho_lote=TAMANHO_LOTE):
+        """Substitui os dados pelo primeiro arquivo e aplica os seguintes como incrementais, numa transação"""
+        restaurados = {tabela: 0 for tabela in RESTAURACAO}
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
+            cursor.execute("BEGIN")
+            # Agregados são recalculados uma vez no fim em vez de linha a linha pelos triggers
+            gatilhos = suspender_gatilhos(cursor)
+            cursor.execute("DELETE FROM pedido_itens")
             cursor.execute("DELETE FROM lucros_diarios")
+            cursor.execute("DELETE FROM vendas_produto_diarias")
             cursor.execute("DELETE FROM historico_pedidos")
             cursor.execute("DELETE FROM pedidos")
             cursor.execute("DELETE FROM produtos")
             cursor.execute("DELETE FROM usuarios WHERE usuario != 'admin'")
-            for produto in dados.get('produtos', []):
-                cursor.execute("INSERT INTO produtos (nome, descricao, preco, ativo) VALUES (?, ?, ?, ?)",
-                             (produto['nome'], produto['descricao'], produto['preco'], produto.get('ativo', 1)))
-            for pedido in dados.get('pedidos', []):
-                cursor.execute("INSERT INTO pedidos (itens_json, total, status, data_pedido) VALUES (?, ?, ?, ?)",
-                             (pedido['itens_json'], pedido['total'], pedido['status'], pedido['data_pedido']))
-            for hist in dados.get('historico_pedidos', []):
-                cursor.execute("""INSERT INTO historico_pedidos (pedido_id, itens_json, total, status, 
-                    data_pedido, data_entrega) VALUES (?, ?, ?, ?, ?, ?)""",
-                    (hist['pedido_id'], hist['itens_json'], hist['total'], hist['status'], 
-                     hist['data_pedido'], hist['data_entrega']))
+            # As remoções acima ficam no registro de alterações; as inclusões são registradas em lote no fim
+            registro_insercoes = suspender_gatilhos(cursor, GATILHOS_REGISTRO_INSERCAO)
+            # Os ids são preservados para que pedido_itens continue apontando para os pedidos certos;
+            # usuários são exportados sem senha e não são restaurados
+            for indice, arquivo in enumerate(arquivos):
+                self._carregar(cursor, arquivo, restaurados, progresso, tamanho_lote, substituir=indice > 0)
+            # Backups anteriores à tabela pedido_itens trazem os itens em itens_json
+            migrar_itens_json(cursor)
+            # ... e pedidos entregues que ainda não eram arquivados
+            arquivar_entregues(cursor)
+            restaurar_gatilhos(cursor, registro_insercoes)
+            registrar_insercoes_em_lote(cursor)
+            restaurar_gatilhos(cursor, gatilhos)
+            reconstruir_agregados(cursor)
             conn.commit()
-            print(f"✅ Backup restaurado: {arquivo}")
-            return True
-        except Exception as e:
+            return restaurados
+        except Exception:
             conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def importar_de_json(self, arquivo, progresso=None, tamanho_lote=TAMANHO_LOTE):
+        """Restaura um backup (JSON ou NDJSON, gzip ou não) lendo em streaming e inserindo em lotes.
+
+        progresso, se informado, é chamado como progresso(tabela, registros_da_tabela) a cada lote gravado.
+        """
+        if not os.path.exists(arquivo):
+            raise FileNotFoundError(f"Arquivo não encontrado: {arquivo}")
+        try:
+            restaurados = self._restaurar([arquivo], progresso, tamanho_lote)
+        except Exception as e:
             print(f"❌ Erro ao importar backup: {str(e)}")
             raise
+        print(f"✅ Backup restaurado: {arquivo} ({sum(restaurados.values())} registros)")
+        return True
+    
+    # ---------- Backups incrementais ----------
+    
+    def _caminho_incremental(self, *partes):
+        return os.path.join(self.backup_dir, 'incremental', *partes)
+    
+    @staticmethod
+    def _sha256(arquivo):
+        digest = hashlib.sha256()
+        with open(arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                digest.update(bloco)
+        return digest.hexdigest()
+    
+    def ler_manifesto(self):
+        """Manifesto da cadeia incremental (base + deltas), ou None se ainda não houver"""
+        caminho = self._caminho_incremental('manifesto.json')
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _salvar_manifesto(self, manifesto):
+        caminho = self._caminho_incremental('manifesto.json')
+        with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=2, ensure_ascii=False)
+        os.replace(caminho + '.tmp', caminho)
+    
+    def compactar_incremental(self):
+        """Grava uma nova base completa, que passa a iniciar a cadeia, e descarta a cadeia anterior"""
+        os.makedirs(self._caminho_incremental(), exist_ok=True)
+        anterior = self.ler_manifesto()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        base, stats = self.exportar_para_json(self._caminho_incremental(f"base_{timestamp}.ndjson.gz"),
+                                              formato='ndjson', comprimir=True)
+        metadata = next(self.ler_backup(base))[1]
+        self._salvar_manifesto({
+            'versao': metadata['versao_alteracoes'],
+            'base': {'arquivo': os.path.basename(base), 'sha256': self._sha256(base),
+                     'versao': metadata['versao_alteracoes'], 'data': metadata['data_backup']},
+            'deltas': [],
+        })
+        if anterior:
+            for entrada in [anterior['base']] + anterior['deltas']:
+                caminho = self._caminho_incremental(entrada['arquivo'])
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+        stats['tipo'] = 'base'
+        return base, stats
+    
+    def _escrever_delta(self, f, cursor, metadata, contagens):
+        desde, versao = metadata['desde'], metadata['versao_alteracoes']
+        f.write(json.dumps({'metadata': metadata}, ensure_ascii=False) + '\n')
+        for tabela in TABELAS_REGISTRADAS:
+            cursor.execute(f"""SELECT a.registro_id FROM alteracoes a
+                WHERE a.tabela = ? AND a.versao > ? AND a.versao <= ?
+                AND NOT EXISTS (SELECT 1 FROM {tabela} t WHERE t.id = a.registro_id)""", (tabela, desde, versao))
+            while True:
+                ids = [linha[0] for linha in cursor.fetchmany(TAMANHO_LOTE)]
+                if not ids:
+                    break
+                f.write(json.dumps({'tabela': tabela, 'removidos': ids}) + '\n')
+                contagens['removidos'] += len(ids)
+            cursor.execute(f"""SELECT t.* FROM alteracoes a JOIN {tabela} t ON t.id = a.registro_id
+                WHERE a.tabela = ? AND a.versao > ? AND a.versao <= ? ORDER BY t.id""", (tabela, desde, versao))
+            colunas = [c[0] for c in cursor.description]
+            f.write(json.dumps({'tabela': tabela, 'colunas': colunas}, ensure_ascii=False) + '\n')
+            for linha in self._iterar_linhas(cursor):
+                f.write(json.dumps(tuple(linha), ensure_ascii=False, separators=(',', ':')) + '\n')
+                contagens[tabela] += 1
+    
+    def backup_incremental(self, max_deltas=48):
+        """Grava só o que mudou desde o último backup da cadeia; a cada max_deltas compacta numa nova base"""
+        manifesto = self.ler_manifesto()
+        if manifesto is None or len(manifesto['deltas']) >= max_deltas:
+            return self.compactar_incremental()
+        
+        desde = manifesto['versao']
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        arquivo = self._caminho_incremental(f"delta_{timestamp}.ndjson.gz")
+        contagens = {tabela: 0 for tabela in TABELAS_REGISTRADAS}
+        contagens['removidos'] = 0
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            cursor.execute("SELECT COALESCE(MAX(versao), 0) FROM alteracoes")
+            versao = cursor.fetchone()[0]
+            if versao > desde:
+                metadata = {'data_backup': datetime.now().isoformat(), 'versao': '1.0', 'formato': 'ndjson',
+                            'tipo': 'delta', 'desde': desde, 'versao_alteracoes': versao}
+                with self._abrir_arquivo(arquivo + '.tmp.gz', 'w') as f:
+                    self._escrever_delta(f, cursor, metadata, contagens)
+                os.replace(arquivo + '.tmp.gz', arquivo)
         finally:
+            conn.rollback()
             conn.close()
+        if versao < desde:
+            # Registro de alterações recomeçado: a cadeia não pode continuar
+            return self.compactar_incremental()
+        
+        stats = {CHAVES_ESTATISTICAS[tabela]: contagens[tabela] for tabela in TABELAS_REGISTRADAS}
+        stats['removidos'] = contagens['removidos']
+        if versao == desde:
+            stats['tipo'] = 'sem_alteracoes'
+            return None, stats
+        manifesto['deltas'].append({'arquivo': os.path.basename(arquivo), 'sha256': self._sha256(arquivo),
+                                    'desde': desde, 'versao': versao, 'data': metadata['data_backup']})
+        manifesto['versao'] = versao
+        self._salvar_manifesto(manifesto)
+        stats['tipo'] = 'delta'
+        print(f"✅ Backup incremental criado: {arquivo}")
+        return arquivo, stats
+    
+    def restaurar_incremental(self, progresso=None, tamanho_lote=TAMANHO_LOTE):
+        """Restaura a cadeia: carrega a base e aplica os deltas em ordem, após conferir os checksums"""
+        manifesto = self.ler_manifesto()
+        if manifesto is None:
+            raise FileNotFoundError("Nenhum backup incremental encontrado")
+        arquivos = []
+        for entrada in [manifesto['base']] + manifesto['deltas']:
+            caminho = self._caminho_incremental(entrada['arquivo'])
+            if not os.path.exists(caminho):
+                raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+            if self._sha256(caminho) != entrada['sha256']:
+                raise ValueError(f"Checksum inválido: {entrada['arquivo']}")
+            arquivos.append(caminho)
+        restaurados = self._restaurar(arquivos, progresso, tamanho_lote)
+        print(f"✅ Backup incremental restaurado: {len(arquivos)} arquivo(s), {sum(restaurados.values())} registros")
+        return True
@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+class AgendadorBackup:
+    """Executa backups em segundo plano, por intervalo ou horários fixos, fora das requisições HTTP"""
+
+    def __init__(self, backup_manager, intervalo=3600, horarios=None, formato='json', comprimir=False,
+                 jitter=60, backoff_inicial=30, backoff_maximo=1800,
+                 max_backups=10, max_idade_dias=None, max_bytes=None):
+        self.backup_manager = backup_manager
+        self.intervalo = intervalo
+        # Horários diários no formato 'HH:MM'; quando informados substituem o intervalo
+        self.horarios = sorted(horarios or [])
+        self.formato = formato
+        self.comprimir = comprimir
+        self.jitter = jitter
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.max_backups = max_backups
+        self.max_idade_dias = max_idade_dias
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._ocioso = threading.Event()
+        self._ocioso.set()
+        self._thread = None
+        self._executando = False
+        self._proxima = None
+        self._falhas = 0
+        self._status = {'ultima_execucao': None, 'ultima_duracao_s': None, 'ultimo_arquivo': None,
+                        'ultimo_bytes': 0, 'ultimo_erro': None, 'total_execucoes': 0, 'bytes_gravados': 0,
+                        'removidos_retencao': 0}
+
+    def _proximo_horario(self, agora):
+        if not self.horarios:
+            return agora + timedelta(seconds=self.intervalo)
+        candidatos = []
+        for horario in self.horarios:
+            hora, minuto = (int(parte) for parte in horario.split(':'))
+            candidato = agora.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+            if candidato <= agora:
+                candidato += timedelta(days=1)
+            candidatos.append(candidato)
+        return min(candidatos)
+
+    def calcular_proxima(self, agora=None):
+        """Próxima execução: horário normal ou, após falhas, backoff exponencial; mais jitter aleatório"""
+        agora = agora or datetime.now()
+        proxima = self._proximo_horario(agora)
+        if self._falhas:
+            espera = min(self.backoff_inicial * 2 ** (self._falhas - 1), self.backoff_maximo)
+            proxima = min(proxima, agora + timedelta(seconds=espera))
+        # Espalha execuções de várias instâncias para não coincidirem no mesmo instante
+        return proxima + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def _executar(self, formato=None, comprimir=None):
+        formato = formato or self.formato
+        comprimir = self.comprimir if comprimir is None else comprimir
+        inicio = time.monotonic()
+        self._status['ultima_execucao'] = datetime.now().isoformat()
+        try:
+            if formato == 'incremental':
+                arquivo, _ = self.backup_manager.backup_incremental()
+            elif formato == 'sqlite':
+                arquivo, _ = self.backup_manager.criar_snapshot()
+            else:
+                arquivo, _ = self.backup_manager.exportar_para_json(formato=formato, comprimir=comprimir)
+            removidos = self.backup_manager.aplicar_retencao(self.max_backups, self.max_idade_dias, self.max_bytes)
+            tamanho = self.backup_manager.tamanho_arquivo(arquivo)
+            self._status.update(ultimo_arquivo=arquivo, ultimo_bytes=tamanho, ultimo_erro=None)
+            self._status['bytes_gravados'] += tamanho
+            self._status['removidos_retencao'] += len(removidos)
+            self._falhas = 0
+        except Exception as e:
+            self._falhas += 1
+            self._status['ultimo_erro'] = str(e)
+            print(f"❌ Erro no backup agendado: {str(e)}")
+        finally:
+            self._status['ultima_duracao_s'] = round(time.monotonic() - inicio, 3)
+            self._status['total_execucoes'] += 1
+            with self._lock:
+                self._executando = False
+            self._ocioso.set()
+
+    def _reservar(self):
+        with self._lock:
+            if self._executando:
+                return False
+            self._executando = True
+            self._ocioso.clear()
+            return True
+
+    def executar_agora(self, formato=None, comprimir=None):
+        """Dispara um backup em outra thread e retorna imediatamente; False se já houver um em andamento"""
+        if not self._reservar():
+            return False
+        threading.Thread(target=self._executar, args=(formato, comprimir), name='backup-manual', daemon=True).start()
+        return True
+
+    def aguardar(self, timeout=None):
+        """Espera o backup em andamento terminar"""
+        return self._ocioso.wait(timeout)
+
+    def _laco(self):
+        while not self._parar.is_set():
+            self._proxima = self.calcular_proxima()
+            espera = (self._proxima - datetime.now()).total_seconds()
+            if self._parar.wait(max(espera, 0)):
+                break
+            if self._reservar():
+                self._executar()
+
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._laco, name='agendador-backup', daemon=True)
+        self._thread.start()
+        print(f"⏰ Agendador de backups iniciado ({', '.join(self.horarios) or f'a cada {self.intervalo}s'})")
+
+    def parar(self, timeout=5):
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def status(self):
+        with self._lock:
+            executando = self._executando
+        ativo = bool(self._thread and self._thread.is_alive())
+        return {
+            **self._status,
+            'agendado': ativo,
+            'executando': executando,
+            'falhas_consecutivas': self._falhas,
+            'proxima_execucao': self._proxima.isoformat() if ativo and self._proxima else None,
+            'formato': self.formato,
+            'intervalo_s': None if self.horarios else self.intervalo,
+            'horarios': self.horarios,
+            'retencao': {'max_backups': self.max_backups, 'max_idade_dias': self.max_idade_dias,
+                         'max_bytes': self.max_bytes},
+        }
@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import threading
+from collections import deque
+
+class ConexaoPool:
+    """Conexão emprestada do pool; close() devolve ao pool em vez de fechar"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, nome):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(self._conn, nome)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *args):
+        return self._conn.__exit__(*args)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                self._pool.devolver(conn)
+            finally:
+                self._pool._vagas.release()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Pool limitado de conexões SQLite compartilhado por DatabaseManager e BackupManager
+
+    No máximo tamanho_maximo conexões ficam emprestadas ao mesmo tempo; obter() espera uma
+    devolução por até busy_timeout_ms antes de falhar.
+    """
+
+    def __init__(self, db_path, tamanho_maximo=8, busy_timeout_ms=5000, cache_statements=256):
+        self.db_path = db_path
+        self.tamanho_maximo = tamanho_maximo
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_statements = cache_statements
+        self._livres = deque()
+        self._lock = threading.Lock()
+        self._vagas = threading.BoundedSemaphore(tamanho_maximo)
+
+    def _abrir(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000,
+                               cached_statements=self.cache_statements, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Configurações aplicadas uma única vez por conexão física
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def obter(self):
+        if not self._vagas.acquire(timeout=self.busy_timeout_ms / 1000):
+            raise sqlite3.OperationalError("Pool de conexões esgotado: nenhuma conexão devolvida a tempo")
+        try:
+            with self._lock:
+                conn = self._livres.pop() if self._livres else None
+            if conn is None:
+                conn = self._abrir()
+        except BaseException:
+            self._vagas.release()
+            raise
+        return ConexaoPool(self, conn)
+
+    def devolver(self, conn):
+        # Descarta transação pendente, como faria um close() de verdade
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            if len(self._livres) < self.tamanho_maximo:
+                self._livres.append(conn)
+                return
+        conn.close()
+
+    def fechar(self):
+        with self._lock:
+            livres, self._livres = list(self._livres), deque()
+        for conn in livres:
+            conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def obter_pool(db_path):
+    """Retorna o pool do arquivo de banco, criando-o se necessário"""
+    caminho = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(caminho)
+        # Arquivo removido/recriado: conexões antigas apontam para o arquivo apagado
+        if pool is not None and not os.path.exists(caminho):
+            pool.fechar()
+            pool = None
+        if pool is None:
+            pool = ConnectionPool(caminho)
+            _pools[caminho] = pool
+        return pool
+
+def fechar_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.fechar()
@@ -1,17 +1,38 @@
 import sqlite3
-import json
-import bcrypt
 import os
+import json
+import base64
+from array import array
+from datetime import datetime, date, timedelta
+from models.connection_pool import obter_pool
+from models.migrations import aplicar_migracoes
+from models.menu_cache import MenuCache
+from models.price_engine import MotorPrecos
+from models.reporting import RelatorioVendas
+from models.aggregates import (reconstruir_lucros_diarios, reconstruir_estatisticas, calcular_estatisticas,
+                               reconstruir_vendas_produto)
+from models.order_archive import arquivar_pedidos, FILTRO_ATIVOS
+from models.password_hasher import hasher as hasher_padrao, SobrecargaHash
+
+COLUNAS_PEDIDO = "id, total, status, data_pedido, data_entrega"
+COLUNAS_HISTORICO = "id, pedido_id, total, status, data_pedido, data_entrega"
 
 class DatabaseManager:
-    def __init__(self, db_path='cardapio.db'):
+    def __init__(self, db_path='cardapio.db', hasher=None):
         self.db_path = db_path
+        self.hasher = hasher or hasher_padrao
+        self.cache_cardapio = MenuCache(self.listar_produtos)
+        self.motor_precos = MotorPrecos(self.listar_produtos)
+        self.relatorio_vendas = RelatorioVendas(self._colunas_historico, self._historico_fechado)
         self._inicializar_banco()
     
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return obter_pool(self.db_path).obter()
+    
+    def invalidar_produtos(self):
+        """Descarta o cardápio em cache e o índice de preços após qualquer escrita em produtos"""
+        self.cache_cardapio.invalidar()
+        self.motor_precos.invalidar()
     
     def _inicializar_banco(self):
         conn = self.get_connection()
@@ -21,13 +42,14 @@ class DatabaseManager:
             with open(schema_path, 'r', encoding='utf-8') as f:
                 cursor.executescript(f.read())
         conn.commit()
+        aplicar_migracoes(conn)
         conn.close()
         print("✅ Banco de dados inicializado")
     
     def criar_usuario(self, usuario, senha, tipo='gerente'):
         conn = None
         try:
-            senha_hash = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            senha_hash = self.hasher.gerar_hash(senha)
             conn = self.get_connection()
             cursor = conn.cursor()
             cursor.execute("INSERT INTO usuarios (usuario, senha_hash, tipo) VALUES (?, ?, ?)", 
@@ -38,6 +60,8 @@ class DatabaseManager:
             if conn:
                 conn.rollback()
             return False, "Usuário já existe"
+        except SobrecargaHash:
+            raise
         except Exception as e:
             if conn:
                 conn.rollback()
@@ -52,10 +76,20 @@ class DatabaseManager:
         cursor.execute("SELECT senha_hash, tipo FROM usuarios WHERE usuario = ? AND ativo = 1", (usuario,))
         result = cursor.fetchone()
         conn.close()
-        if result and bcrypt.checkpw(senha.encode('utf-8'), result['senha_hash'].encode('utf-8')):
+        if result and self.hasher.verificar(senha, result['senha_hash']):
+            if self.hasher.precisa_rehash(result['senha_hash']):
+                self._atualizar_hash(usuario, result['senha_hash'], self.hasher.gerar_hash(senha))
             return True, result['tipo']
         return False, None
     
+    def _atualizar_hash(self, usuario, hash_antigo, hash_novo):
+        """Regrava o hash com o custo atual; só se ninguém trocou a senha nesse meio tempo"""
+        conn = self.get_connection()
+        conn.execute("UPDATE usuarios SET senha_hash = ? WHERE usuario = ? AND senha_hash = ?",
+                     (hash_novo, usuario, hash_antigo))
+        conn.commit()
+        conn.close()
+    
     def listar_usuarios(self):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -89,14 +123,39 @@ class DatabaseManager:
         conn.close()
         return count
     
-    def criar_produto(self, nome, descricao, preco):
+    def criar_produto(self, nome, descricao, preco, retornar_produto=False):
+        """Cria o produto; com retornar_produto=True devolve a linha gravada (INSERT ... RETURNING)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("INSERT INTO produtos (nome, descricao, preco) VALUES (?, ?, ?)", (nome, descricao, preco))
-        produto_id = cursor.lastrowid
+        cursor.execute("INSERT INTO produtos (nome, descricao, preco) VALUES (?, ?, ?) RETURNING *",
+                      (nome, descricao, preco))
+        produto = dict(cursor.fetchone())
         conn.commit()
         conn.close()
-        return produto_id
+        self.invalidar_produtos()
+        return produto if retornar_produto else produto['id']
+    
+    def obter_produto(self, produto_id):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM produtos WHERE id = ?", (produto_id,))
+        result = cursor.fetchone()
+        conn.close()
+        return dict(result) if result else None
+    
+    def obter_produtos(self, ids):
+        """Busca vários produtos por id, na ordem pedida (ids inexistentes são ignorados)"""
+        ids = list(ids)
+        encontrados = {}
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            cursor.execute(f"SELECT * FROM produtos WHERE id IN ({','.join('?' * len(lote))})", lote)
+            for row in cursor.fetchall():
+                encontrados[row['id']] = dict(row)
+        conn.close()
+        return [encontrados[i] for i in ids if i in encontrados]
     
     def listar_produtos(self, apenas_ativos=True):
         conn = self.get_connection()
@@ -109,15 +168,53 @@ class DatabaseManager:
         conn.close()
         return produtos
     
-    def atualizar_produto(self, produto_id, nome, descricao, preco):
+    def atualizar_produto(self, produto_id, nome, descricao, preco, retornar_produto=False):
+        """Atualiza o produto; com retornar_produto=True devolve a linha atualizada ou None"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("UPDATE produtos SET nome = ?, descricao = ?, preco = ? WHERE id = ?",
+        cursor.execute("UPDATE produtos SET nome = ?, descricao = ?, preco = ? WHERE id = ? RETURNING *",
                       (nome, descricao, preco, produto_id))
-        sucesso = cursor.rowcount > 0
+        result = cursor.fetchone()
+        produto = dict(result) if result else None
         conn.commit()
         conn.close()
-        return sucesso
+        self.invalidar_produtos()
+        if retornar_produto:
+            return produto
+        return produto is not None
+    
+    def salvar_produtos_em_lote(self, produtos):
+        """Cria (sem 'id') e atualiza (com 'id') vários produtos em uma única transação"""
+        novos = [(p['nome'], p['descricao'], p['preco']) for p in produtos if p.get('id') is None]
+        alterados = [(p['nome'], p['descricao'], p['preco'], p['id']) for p in produtos if p.get('id') is not None]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            if alterados:
+                cursor.executemany("UPDATE produtos SET nome = ?, descricao = ?, preco = ? WHERE id = ?", alterados)
+                if cursor.rowcount < len(alterados):
+                    ids = [a[3] for a in alterados]
+                    cursor.execute(f"SELECT id FROM produtos WHERE id IN ({','.join('?' * len(ids))})", ids)
+                    existentes = {row[0] for row in cursor.fetchall()}
+                    raise LookupError(f"Produtos não encontrados: {[i for i in ids if i not in existentes]}")
+            ids_novos = []
+            if novos:
+                cursor.executemany("INSERT INTO produtos (nome, descricao, preco) VALUES (?, ?, ?)", novos)
+                # AUTOINCREMENT em uma transação de escrita: os ids são consecutivos até o seq final
+                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'produtos'")
+                ultimo = cursor.fetchone()[0]
+                ids_novos = list(range(ultimo - len(novos) + 1, ultimo + 1))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self.invalidar_produtos()
+        
+        ids_novos = iter(ids_novos)
+        return self.obter_produtos([p['id'] if p.get('id') is not None else next(ids_novos) for p in produtos])
     
     def remover_produto(self, produto_id):
         conn = self.get_connection()
@@ -125,67 +222,201 @@ class DatabaseManager:
         cursor.execute("DELETE FROM produtos WHERE id = ?", (produto_id,))
         sucesso = cursor.rowcount > 0
         
-        # Verifica se a tabela ficou vazia
-        cursor.execute("SELECT COUNT(*) FROM produtos")
-        count = cursor.fetchone()[0]
+        # Verifica se a tabela ficou vazia (MAX(id) usa a chave primária; COUNT(*) leria a tabela inteira)
+        cursor.execute("SELECT MAX(id) FROM produtos")
+        vazia = cursor.fetchone()[0] is None
         
         # Se a tabela estiver vazia, reseta o auto-increment
-        if count == 0:
+        if vazia:
             cursor.execute("DELETE FROM sqlite_sequence WHERE name='produtos'")
             print("🔄 Tabela de produtos zerada - contador resetado para ID 1")
         
         conn.commit()
         conn.close()
+        self.invalidar_produtos()
         return sucesso
     
-    def criar_pedido(self, itens, total):
+    @staticmethod
+    def _normalizar_itens(itens):
+        """Converte os itens recebidos da API em tuplas (produto_id, nome, preco, quantidade)"""
+        linhas = []
+        for item in itens:
+            produto_id = item.get('id')
+            quantidade = int(item.get('quantidade') or 1)
+            linhas.append((int(produto_id) if produto_id is not None else None,
+                           str(item.get('nome', '')), float(item.get('preco') or 0), max(quantidade, 1)))
+        return linhas
+    
+    def _anexar_itens(self, cursor, registros, coluna='pedido_id'):
+        """Preenche registro['itens'] com uma consulta por lote de ids (sem JSON por linha)"""
+        por_id = {}
+        for registro in registros:
+            registro['itens'] = []
+            por_id[registro['id']] = registro['itens']
+        ids = list(por_id)
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            cursor.execute(f"""SELECT {coluna}, produto_id, nome, preco, quantidade FROM pedido_itens
+                WHERE {coluna} IN ({','.join('?' * len(lote))}) ORDER BY id""", lote)
+            for dono, produto_id, nome, preco, quantidade in cursor.fetchall():
+                por_id[dono].append({'id': produto_id, 'nome': nome, 'preco': preco, 'quantidade': quantidade})
+        return registros
+    
+    def criar_pedido(self, itens, total=None):
+        """Grava o pedido; sem total, preços, nomes e total vêm do motor de preços (levanta ItensInvalidos)"""
+        if total is None:
+            linhas, total = self.motor_precos.precificar(itens)
+        else:
+            linhas = self._normalizar_itens(itens)
         conn = self.get_connection()
         cursor = conn.cursor()
-        itens_json = json.dumps(itens)
-        cursor.execute("INSERT INTO pedidos (itens_json, total, status) VALUES (?, ?, 'Pendente')",
-                      (itens_json, total))
-        pedido_id = cursor.lastrowid
-        conn.commit()
-        cursor.execute("SELECT * FROM pedidos WHERE id = ?", (pedido_id,))
+        cursor.execute(f"""INSERT INTO pedidos (itens_json, total, status) VALUES ('[]', ?, 'Pendente')
+            RETURNING {COLUNAS_PEDIDO}""", (total,))
         pedido = dict(cursor.fetchone())
-        pedido['itens'] = json.loads(pedido['itens_json'])
+        cursor.executemany("""INSERT INTO pedido_itens (pedido_id, produto_id, nome, preco, quantidade)
+            VALUES (?, ?, ?, ?, ?)""", [(pedido['id'],) + linha for linha in linhas])
+        conn.commit()
         conn.close()
+        pedido['itens'] = [{'id': produto_id, 'nome': nome, 'preco': preco, 'quantidade': quantidade}
+                           for produto_id, nome, preco, quantidade in linhas]
         return pedido
     
     def listar_pedidos(self, incluir_entregues=False):
         conn = self.get_connection()
         cursor = conn.cursor()
         if incluir_entregues:
-            cursor.execute("SELECT * FROM pedidos ORDER BY data_pedido DESC")
+            cursor.execute(f"SELECT {COLUNAS_PEDIDO} FROM pedidos ORDER BY data_pedido DESC")
+            pedidos = self._anexar_itens(cursor, [dict(row) for row in cursor.fetchall()])
+            pedidos = self._mesclar_entregues(pedidos, self._historico_como_pedidos(cursor))
         else:
-            cursor.execute("SELECT * FROM pedidos WHERE status NOT IN ('Entregue', 'Cancelado') ORDER BY data_pedido DESC")
-        pedidos = []
-        for row in cursor.fetchall():
-            pedido = dict(row)
-            pedido['itens'] = json.loads(pedido['itens_json'])
-            pedidos.append(pedido)
+            # Usa o índice parcial idx_pedidos_ativos: só toca pedidos vivos
+            cursor.execute(f"SELECT {COLUNAS_PEDIDO} FROM pedidos WHERE {FILTRO_ATIVOS} ORDER BY data_pedido DESC")
+            pedidos = self._anexar_itens(cursor, [dict(row) for row in cursor.fetchall()])
         conn.close()
         return pedidos
     
+    def _historico_como_pedidos(self, cursor, ids=None):
+        """Lê registros do histórico no formato de pedido (id = pedido_id original)"""
+        if ids is None:
+            cursor.execute(f"SELECT {COLUNAS_HISTORICO} FROM historico_pedidos")
+            registros = [dict(row) for row in cursor.fetchall()]
+        else:
+            registros = []
+            for inicio in range(0, len(ids), 500):
+                lote = ids[inicio:inicio + 500]
+                cursor.execute(f"SELECT {COLUNAS_HISTORICO} FROM historico_pedidos WHERE id IN ({','.join('?' * len(lote))})", lote)
+                registros.extend(dict(row) for row in cursor.fetchall())
+        self._anexar_itens(cursor, registros, coluna='historico_id')
+        for registro in registros:
+            registro['id'] = registro.pop('pedido_id')
+        return registros
+    
+    @staticmethod
+    def _mesclar_entregues(pedidos, entregues):
+        ativos = {p['id'] for p in pedidos}
+        pedidos = pedidos + [e for e in entregues if e['id'] not in ativos]
+        pedidos.sort(key=lambda p: p['data_pedido'] or '', reverse=True)
+        return pedidos
+    
+    def _versao_atual(self, cursor):
+        cursor.execute("SELECT COALESCE(MAX(versao), 0) FROM alteracoes")
+        return cursor.fetchone()[0]
+    
+    def _ids_alterados(self, cursor, tabela, desde):
+        cursor.execute("SELECT registro_id FROM alteracoes WHERE tabela = ? AND versao > ?", (tabela, desde))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def listar_pedidos_alterados(self, desde, incluir_entregues=False):
+        """Retorna apenas os pedidos criados, alterados ou removidos após a versão informada"""
+        if desde <= 0:
+            conn = self.get_connection()
+            versao = self._versao_atual(conn.cursor())
+            conn.close()
+            pedidos = self.listar_pedidos(incluir_entregues)
+            return {'versao': versao, 'completo': True, 'pedidos': pedidos, 'removidos': []}
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        versao = self._versao_atual(cursor)
+        alterados = self._ids_alterados(cursor, 'pedidos', desde)
+        filtro = "" if incluir_entregues else f" AND {FILTRO_ATIVOS}"
+        cursor.execute(f"""SELECT {COLUNAS_PEDIDO} FROM pedidos WHERE id IN
+            (SELECT registro_id FROM alteracoes WHERE tabela = 'pedidos' AND versao > ?){filtro}
+            ORDER BY data_pedido DESC""", (desde,))
+        pedidos = self._anexar_itens(cursor, [dict(row) for row in cursor.fetchall()])
+        if incluir_entregues:
+            # Pedidos arquivados continuam visíveis, agora vindos do histórico
+            entregues = self._historico_como_pedidos(cursor, self._ids_alterados(cursor, 'historico_pedidos', desde))
+            pedidos = self._mesclar_entregues(pedidos, entregues)
+        conn.close()
+        presentes = {p['id'] for p in pedidos}
+        removidos = [pid for pid in alterados if pid not in presentes]
+        return {'versao': versao, 'completo': False, 'pedidos': pedidos, 'removidos': removidos}
+    
     def atualizar_status_pedido(self, pedido_id, novo_status):
+        """Atualiza o status; ao ser entregue, o pedido é movido para o histórico na mesma transação"""
+        pedidos = self.atualizar_status_pedidos([(pedido_id, novo_status)])
+        return pedidos[0] if pedidos else None
+    
+    def atualizar_status_pedidos(self, transicoes):
+        """Aplica várias transições (pedido_id, status) em uma única transação e retorna os pedidos encontrados.
+        Entregues são arquivados no histórico; pedidos que já estão no status pedido não são alterados."""
+        por_status = {}
+        for pedido_id, status in dict(transicoes).items():
+            por_status.setdefault(status, []).append(pedido_id)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("""UPDATE pedidos SET status = ?, 
-            data_entrega = CASE WHEN ? = 'Entregue' THEN datetime('now', 'localtime') ELSE data_entrega END 
-            WHERE id = ?""", (novo_status, novo_status, pedido_id))
-        if novo_status == 'Entregue':
-            cursor.execute("""INSERT INTO historico_pedidos (pedido_id, itens_json, total, status, data_pedido, data_entrega)
-                SELECT id, itens_json, total, status, data_pedido, data_entrega FROM pedidos WHERE id = ?""", (pedido_id,))
-        conn.commit()
-        cursor.execute("SELECT * FROM pedidos WHERE id = ?", (pedido_id,))
-        result = cursor.fetchone()
-        if result:
-            pedido = dict(result)
-            pedido['itens'] = json.loads(pedido['itens_json'])
+        try:
+            cursor.execute("BEGIN")
+            pedidos = {}
+            for status, ids in por_status.items():
+                for inicio in range(0, len(ids), 500):
+                    lote = ids[inicio:inicio + 500]
+                    cursor.execute(f"""UPDATE pedidos SET status = ?,
+                        data_entrega = CASE WHEN ? = 'Entregue' THEN datetime('now', 'localtime') ELSE data_entrega END
+                        WHERE id IN ({','.join('?' * len(lote))}) AND status <> ? RETURNING {COLUNAS_PEDIDO}""",
+                        [status, status] + lote + [status])
+                    pedidos.update((row['id'], dict(row)) for row in cursor.fetchall())
+            # Os que já estavam no status pedido voltam como estão
+            inalterados = [pedido_id for pedido_id, _ in transicoes if pedido_id not in pedidos]
+            for inicio in range(0, len(inalterados), 500):
+                lote = inalterados[inicio:inicio + 500]
+                cursor.execute(f"SELECT {COLUNAS_PEDIDO} FROM pedidos WHERE id IN ({','.join('?' * len(lote))})", lote)
+                pedidos.update((row['id'], dict(row)) for row in cursor.fetchall())
+            # Itens lidos antes do arquivamento, enquanto ainda apontam para o pedido
+            self._anexar_itens(cursor, list(pedidos.values()))
+            entregues = sorted(pedido_id for pedido_id, pedido in pedidos.items() if pedido['status'] == 'Entregue')
+            if entregues:
+                arquivar_pedidos(cursor, entregues)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
             conn.close()
-            return pedido
-        conn.close()
-        return None
+        return [pedidos[pedido_id] for pedido_id in dict.fromkeys(i for i, _ in transicoes) if pedido_id in pedidos]
+    
+    def arquivar_pedidos_entregues(self, tamanho_lote=500):
+        """Move para o histórico, em transações curtas de até tamanho_lote pedidos, os entregues que restarem em pedidos"""
+        total = 0
+        while True:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN")
+                cursor.execute("SELECT id FROM pedidos WHERE status = 'Entregue' ORDER BY id LIMIT ?", (tamanho_lote,))
+                ids = [row[0] for row in cursor.fetchall()]
+                if ids:
+                    total += arquivar_pedidos(cursor, ids)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            if len(ids) < tamanho_lote:
+                return total
     
     def deletar_pedido(self, pedido_id):
         conn = self.get_connection()
@@ -193,12 +424,14 @@ class DatabaseManager:
         cursor.execute("DELETE FROM pedidos WHERE id = ?", (pedido_id,))
         sucesso = cursor.rowcount > 0
         
-        # Verifica se a tabela ficou vazia
-        cursor.execute("SELECT COUNT(*) FROM pedidos")
-        count = cursor.fetchone()[0]
+        # Verifica se não restou pedido algum (MAX(id) usa a chave primária; COUNT(*) leria a tabela inteira).
+        # Os entregues são arquivados: com histórico, reiniciar o contador repetiria ids já usados
+        cursor.execute("""SELECT (SELECT MAX(id) FROM pedidos) IS NULL
+            AND (SELECT MAX(pedido_id) FROM historico_pedidos) IS NULL""")
+        vazia = cursor.fetchone()[0]
         
-        # Se a tabela estiver vazia, reseta o auto-increment
-        if count == 0:
+        # Se não houver pedidos nem histórico, reseta o auto-increment
+        if vazia:
             cursor.execute("DELETE FROM sqlite_sequence WHERE name='pedidos'")
             print("🔄 Tabela de pedidos zerada - contador resetado para ID 1")
         
@@ -206,41 +439,204 @@ class DatabaseManager:
         conn.close()
         return sucesso
     
-    def obter_estatisticas_gerais(self):
+    @staticmethod
+    def _ler_estatisticas(cursor):
+        # Se ainda não houve entrega hoje, os números de hoje gravados são de outro dia
+        cursor.execute("""SELECT total_pedidos, receita_total,
+                CASE WHEN dia = date('now', 'localtime') THEN pedidos_hoje ELSE 0 END as pedidos_hoje,
+                CASE WHEN dia = date('now', 'localtime') THEN receita_hoje ELSE 0 END as receita_hoje
+            FROM estatisticas_live WHERE id = 1""")
+        result = cursor.fetchone()
+        if result is None:
+            return {'total_pedidos': 0, 'receita_total': 0, 'pedidos_hoje': 0, 'receita_hoje': 0}
+        return dict(result)
+    
+    def _historico_fechado(self):
+        """Pedidos e receita (centavos) entregues antes de hoje, derivados de estatisticas_live"""
+        conn = self.get_connection()
+        stats = self._ler_estatisticas(conn.cursor())
+        conn.close()
+        return (stats['total_pedidos'] - stats['pedidos_hoje'],
+                int(round((stats['receita_total'] - stats['receita_hoje']) * 100)))
+    
+    def _colunas_historico(self, inicio, fim):
+        """Entregas em [inicio, fim) como colunas compactas: instante (segundos) e total em centavos"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) as count, COALESCE(SUM(total), 0) as receita FROM historico_pedidos")
-        result = cursor.fetchone()
-        total_pedidos = result['count']
-        receita_total = result['receita']
-        cursor.execute("""SELECT COUNT(*) as count, COALESCE(SUM(total), 0) as receita
-            FROM historico_pedidos WHERE DATE(data_entrega) = DATE('now')""")
-        result = cursor.fetchone()
-        pedidos_hoje = result['count']
-        receita_hoje = result['receita']
-        ticket_medio = receita_total / total_pedidos if total_pedidos > 0 else 0
+        cursor.row_factory = None
+        # Lido em ordem direto do índice de cobertura (data_entrega, total)
+        cursor.execute("""SELECT CAST(strftime('%s', data_entrega) AS INTEGER), CAST(ROUND(total * 100) AS INTEGER)
+            FROM historico_pedidos WHERE data_entrega >= ? AND data_entrega < ?
+            ORDER BY data_entrega""", (inicio, fim))
+        instantes, centavos = array('q'), array('q')
+        for lote in iter(lambda: cursor.fetchmany(10000), []):
+            coluna_instantes, coluna_centavos = zip(*lote)
+            instantes.extend(coluna_instantes)
+            centavos.extend(coluna_centavos)
+        conn.close()
+        return instantes, centavos
+    
+    def obter_estatisticas_gerais(self):
+        """Lê os contadores materializados em estatisticas_live (uma linha, sem percorrer o histórico)"""
+        conn = self.get_connection()
+        stats = self._ler_estatisticas(conn.cursor())
         conn.close()
+        total_pedidos = stats['total_pedidos']
+        receita_total = stats['receita_total']
+        ticket_medio = receita_total / total_pedidos if total_pedidos > 0 else 0
         return {
             'total_pedidos': total_pedidos,
             'receita_total': receita_total,
             'ticket_medio': ticket_medio,
-            'pedidos_hoje': pedidos_hoje,
-            'receita_hoje': receita_hoje
+            'pedidos_hoje': stats['pedidos_hoje'],
+            'receita_hoje': stats['receita_hoje']
         }
     
+    def verificar_estatisticas(self, corrigir=False):
+        """Compara estatisticas_live com o histórico bruto; com corrigir=True, regrava os contadores divergentes"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            # Leitura e correção na mesma transação, para não perder entregas concorrentes
+            cursor.execute("BEGIN IMMEDIATE" if corrigir else "BEGIN")
+            armazenado = self._ler_estatisticas(cursor)
+            calculado = calcular_estatisticas(cursor)
+            del calculado['dia']
+            consistente = all(abs(armazenado[chave] - valor) < 0.005 for chave, valor in calculado.items())
+            if corrigir and not consistente:
+                reconstruir_estatisticas(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return {'consistente': consistente, 'corrigido': corrigir and not consistente,
+                'armazenado': armazenado, 'calculado': calculado}
+    
     def listar_historico(self):
         """Lista todos os pedidos do histórico"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM historico_pedidos ORDER BY data_entrega DESC")
-        historico = []
-        for row in cursor.fetchall():
-            pedido = dict(row)
-            pedido['itens'] = json.loads(pedido['itens_json'])
-            historico.append(pedido)
+        cursor.execute(f"SELECT {COLUNAS_HISTORICO} FROM historico_pedidos ORDER BY data_entrega DESC")
+        historico = self._anexar_itens(cursor, [dict(row) for row in cursor.fetchall()], 'historico_id')
         conn.close()
         return historico
     
+    @staticmethod
+    def _codificar_cursor(data_entrega, registro_id):
+        bruto = json.dumps([data_entrega, registro_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def _decodificar_cursor(cursor_texto):
+        try:
+            preenchido = cursor_texto + '=' * (-len(cursor_texto) % 4)
+            data_entrega, registro_id = json.loads(base64.urlsafe_b64decode(preenchido))
+            return str(data_entrega), int(registro_id)
+        except (ValueError, TypeError):
+            raise ValueError("Cursor inválido")
+    
+    @staticmethod
+    def _normalizar_periodo(inicio, fim):
+        """Valida datas ISO; um 'fim' só com a data inclui o dia inteiro (limite exclusivo no dia seguinte)"""
+        try:
+            if inicio:
+                inicio = datetime.fromisoformat(inicio).strftime('%Y-%m-%d %H:%M:%S')
+            if fim:
+                fim_data = datetime.fromisoformat(fim)
+                if len(fim) == 10:
+                    fim_data += timedelta(days=1)
+                fim = fim_data.strftime('%Y-%m-%d %H:%M:%S')
+        except (ValueError, TypeError):
+            raise ValueError("Data inválida")
+        return inicio or None, fim or None
+    
+    def listar_historico_paginado(self, limite=50, cursor=None, inicio=None, fim=None):
+        """Página do histórico por keyset (data_entrega, id), do mais recente para o mais antigo"""
+        limite = max(1, min(int(limite), 500))
+        inicio, fim = self._normalizar_periodo(inicio, fim)
+        condicoes, parametros = [], []
+        if inicio:
+            condicoes.append("data_entrega >= ?")
+            parametros.append(inicio)
+        if fim:
+            condicoes.append("data_entrega < ?")
+            parametros.append(fim)
+        if cursor:
+            condicoes.append("(data_entrega, id) < (?, ?)")
+            parametros.extend(self._decodificar_cursor(cursor))
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        
+        conn = self.get_connection()
+        cur = conn.cursor()
+        versao = self._versao_atual(cur)
+        cur.execute(f"""SELECT {COLUNAS_HISTORICO} FROM historico_pedidos {where}
+            ORDER BY data_entrega DESC, id DESC LIMIT ?""", parametros + [limite + 1])
+        linhas = [dict(row) for row in cur.fetchall()]
+        proximo = None
+        if len(linhas) > limite:
+            linhas = linhas[:limite]
+            proximo = self._codificar_cursor(linhas[-1]['data_entrega'], linhas[-1]['id'])
+        historico = self._anexar_itens(cur, linhas, 'historico_id')
+        conn.close()
+        return {'historico': historico, 'next_cursor': proximo, 'versao': versao}
+    
+    def exportar_historico(self, inicio=None, fim=None, tamanho_lote=1000):
+        """Lotes de linhas (pedido do histórico + item) do período, da entrega mais antiga para a mais recente.
+
+        As datas são validadas na chamada; a leitura só começa quando o gerador é consumido e usa uma
+        única consulta (um instante consistente do banco) percorrida com fetchmany, com memória constante.
+        """
+        inicio, fim = self._normalizar_periodo(inicio, fim)
+        condicoes, parametros = [], []
+        if inicio:
+            condicoes.append("h.data_entrega >= ?")
+            parametros.append(inicio)
+        if fim:
+            condicoes.append("h.data_entrega < ?")
+            parametros.append(fim)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return self._iterar_exportacao(f"""SELECT h.id, h.pedido_id, h.status, h.data_pedido, h.data_entrega, h.total,
+                i.produto_id, i.nome, i.preco, i.quantidade
+            FROM historico_pedidos h
+            LEFT JOIN pedido_itens i ON i.historico_id = h.id
+            {where}
+            ORDER BY h.data_entrega, h.id, i.id""", parametros, tamanho_lote)
+    
+    def _iterar_exportacao(self, sql, parametros, tamanho_lote):
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(sql, parametros)
+            for lote in iter(lambda: cursor.fetchmany(tamanho_lote), []):
+                yield lote
+        finally:
+            # Também roda quando o cliente desconecta e o gerador é fechado
+            conn.close()
+    
+    def listar_historico_alterado(self, desde):
+        """Retorna apenas os registros do histórico incluídos ou removidos após a versão informada"""
+        if desde <= 0:
+            conn = self.get_connection()
+            versao = self._versao_atual(conn.cursor())
+            conn.close()
+            return {'versao': versao, 'completo': True, 'historico': self.listar_historico(), 'removidos': []}
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        versao = self._versao_atual(cursor)
+        alterados = self._ids_alterados(cursor, 'historico_pedidos', desde)
+        cursor.execute(f"""SELECT {COLUNAS_HISTORICO} FROM historico_pedidos WHERE id IN
+            (SELECT registro_id FROM alteracoes WHERE tabela = 'historico_pedidos' AND versao > ?)
+            ORDER BY data_entrega DESC""", (desde,))
+        historico = self._anexar_itens(cursor, [dict(row) for row in cursor.fetchall()], 'historico_id')
+        conn.close()
+        presentes = {h['id'] for h in historico}
+        removidos = [hid for hid in alterados if hid not in presentes]
+        return {'versao': versao, 'completo': False, 'historico': historico, 'removidos': removidos}
+    
     def obter_lucros_periodo(self, data_inicio=None, data_fim=None):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -253,12 +649,85 @@ class DatabaseManager:
         conn.close()
         return lucros
     
+    @staticmethod
+    def _periodo_vendas(inicio, fim):
+        """Valida datas ISO (AAAA-MM-DD) e monta o filtro de data do rollup, que é inclusivo nas duas pontas"""
+        condicoes, parametros = [], []
+        try:
+            if inicio:
+                parametros.append(date.fromisoformat(inicio).isoformat())
+                condicoes.append("v.data >= ?")
+            if fim:
+                parametros.append(date.fromisoformat(fim).isoformat())
+                condicoes.append("v.data <= ?")
+        except (ValueError, TypeError):
+            raise ValueError("Data inválida")
+        return condicoes, parametros
+    
+    def top_produtos(self, limite=10, inicio=None, fim=None, ordem='receita'):
+        """Produtos mais vendidos no período, a partir de vendas_produto_diarias"""
+        if ordem not in ('receita', 'quantidade'):
+            raise ValueError("Ordem inválida")
+        limite = max(1, min(int(limite), 100))
+        condicoes, parametros = self._periodo_vendas(inicio, fim)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""SELECT v.produto_id, p.nome, SUM(v.quantidade) as quantidade, SUM(v.receita) as receita
+            FROM vendas_produto_diarias v
+            LEFT JOIN produtos p ON p.id = v.produto_id
+            {where}
+            GROUP BY v.produto_id
+            ORDER BY {ordem} DESC, v.produto_id
+            LIMIT ?""", parametros + [limite])
+        ranking = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return ranking
+    
+    def vendas_produto(self, produto_id, inicio=None, fim=None):
+        """Vendas diárias de um produto no período, com os totais"""
+        condicoes, parametros = self._periodo_vendas(inicio, fim)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""SELECT v.data, v.quantidade, v.receita FROM vendas_produto_diarias v
+            WHERE {' AND '.join(['v.produto_id = ?'] + condicoes)}
+            ORDER BY v.data""", [produto_id] + parametros)
+        dias = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return {
+            'produto_id': produto_id,
+            'quantidade': sum(d['quantidade'] for d in dias),
+            'receita': round(sum(d['receita'] for d in dias), 2),
+            'dias': dias
+        }
+    
+    def reconstruir_vendas_produto(self):
+        """Recalcula vendas_produto_diarias a partir dos itens do histórico; retorna a quantidade de linhas"""
+        conn = self.get_connection()
+        linhas = reconstruir_vendas_produto(conn.cursor())
+        conn.commit()
+        conn.close()
+        return linhas
+    
+    def reconstruir_lucros_diarios(self):
+        """Recalcula lucros_diarios a partir do histórico; retorna a quantidade de dias"""
+        conn = self.get_connection()
+        dias = reconstruir_lucros_diarios(conn.cursor())
+        conn.commit()
+        conn.close()
+        return dias
+    
     def limpar_historico(self):
         """Limpa todos os registros do histórico de pedidos"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        # Sem histórico não há lucro nem venda a descontar: evita o ajuste linha a linha dos triggers
+        cursor.execute("DELETE FROM lucros_diarios")
+        cursor.execute("DELETE FROM vendas_produto_diarias")
         cursor.execute("DELETE FROM historico_pedidos")
         count = cursor.rowcount
+        # Histórico vazio: contadores exatamente zerados, sem resíduo de ponto flutuante
+        reconstruir_estatisticas(cursor)
         
         # Reseta o auto-increment do histórico
         cursor.execute("DELETE FROM sqlite_sequence WHERE name='historico_pedidos'")
@@ -278,14 +747,17 @@ class DatabaseManager:
         cursor.execute("DELETE FROM historico_pedidos")
         cursor.execute("DELETE FROM produtos")
         cursor.execute("DELETE FROM lucros_diarios")
+        cursor.execute("DELETE FROM vendas_produto_diarias")
+        reconstruir_estatisticas(cursor)
         
         # Resetar os contadores
-        cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('pedidos', 'historico_pedidos', 'produtos')")
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('pedidos', 'historico_pedidos', 'produtos', 'pedido_itens')")
         
         print("🔄 Todos os contadores resetados - próximos IDs serão #1")
         
         conn.commit()
         conn.close()
+        self.invalidar_produtos()
         return True
     
     def limpar_banco(self):
@@ -294,6 +766,8 @@ class DatabaseManager:
         cursor.execute("DELETE FROM pedidos")
         cursor.execute("DELETE FROM historico_pedidos")
         cursor.execute("DELETE FROM lucros_diarios")
+        cursor.execute("DELETE FROM vendas_produto_diarias")
+        reconstruir_estatisticas(cursor)
         cursor.execute("DELETE FROM usuarios WHERE usuario != 'admin'")
         conn.commit()
         conn.close()
@@ -0,0 +1,87 @@
+import json
+import queue
+import threading
+from collections import deque
+
+class EventBroker:
+    """Distribui eventos de pedidos em memória para todos os clientes SSE conectados"""
+
+    def __init__(self, tamanho_historico=1000, tamanho_fila=256, intervalo_heartbeat=15):
+        self.tamanho_fila = tamanho_fila
+        self.intervalo_heartbeat = intervalo_heartbeat
+        self._lock = threading.Lock()
+        self._assinantes = set()
+        self._recentes = deque(maxlen=tamanho_historico)
+        self._ultimo_id = 0
+
+    def publicar(self, tipo, dados):
+        """Publica um evento para todos os assinantes e guarda para retomada via Last-Event-ID"""
+        with self._lock:
+            self._ultimo_id += 1
+            evento = (self._ultimo_id, tipo, json.dumps(dados, ensure_ascii=False, default=str))
+            self._recentes.append(evento)
+            assinantes = list(self._assinantes)
+        for fila in assinantes:
+            try:
+                fila.put_nowait(evento)
+            except queue.Full:
+                # Cliente lento: descarta a fila e pede que ele se ressincronize
+                with fila.mutex:
+                    fila.queue.clear()
+                fila.put_nowait(None)
+        return evento[0]
+
+    def assinar(self, ultimo_id=None):
+        """Registra um assinante; retorna (fila, eventos perdidos a reenviar, precisa_ressincronizar)"""
+        fila = queue.Queue(maxsize=self.tamanho_fila)
+        pendentes = []
+        ressincronizar = False
+        with self._lock:
+            if ultimo_id is not None:
+                mais_antigo = self._recentes[0][0] if self._recentes else self._ultimo_id + 1
+                if ultimo_id > self._ultimo_id or ultimo_id < mais_antigo - 1:
+                    # Servidor reiniciado ou eventos já descartados do buffer
+                    ressincronizar = True
+                else:
+                    pendentes = [e for e in self._recentes if e[0] > ultimo_id]
+            self._assinantes.add(fila)
+        return fila, pendentes, ressincronizar
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._assinantes.discard(fila)
+
+    @property
+    def total_assinantes(self):
+        with self._lock:
+            return len(self._assinantes)
+
+    @staticmethod
+    def _formatar(evento):
+        evento_id, tipo, dados = evento
+        return f"id: {evento_id}\nevent: {tipo}\ndata: {dados}\n\n"
+
+    def transmitir(self, ultimo_id=None):
+        """Gerador de mensagens SSE para um cliente, com heartbeats enquanto ocioso"""
+        fila, pendentes, ressincronizar = self.assinar(ultimo_id)
+        try:
+            yield "retry: 3000\n\n"
+            if ressincronizar:
+                yield f"id: {self._ultimo_id}\nevent: ressincronizar\ndata: {{}}\n\n"
+            for evento in pendentes:
+                yield self._formatar(evento)
+            while True:
+                try:
+                    evento = fila.get(timeout=self.intervalo_heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if evento is None:
+                    yield "event: ressincronizar\ndata: {}\n\n"
+                    return
+                yield self._formatar(evento)
+        finally:
+            self.cancelar(fila)
+
+
+broker = EventBroker()
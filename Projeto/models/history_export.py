@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+import zlib
+
+# Uma linha por item: os campos do pedido se repetem em cada item dele
+COLUNAS_EXPORTACAO = ['historico_id', 'pedido_id', 'status', 'data_pedido', 'data_entrega', 'total',
+                      'produto_id', 'nome', 'preco', 'quantidade']
+
+FORMATOS_EXPORTACAO = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+
+def exportar_csv(lotes):
+    """Cabeçalho seguido de um bloco de texto CSV por lote de linhas"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS_EXPORTACAO + ['subtotal'])
+    yield buffer.getvalue()
+    for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        for linha in lote:
+            preco, quantidade = linha[8], linha[9]
+            escritor.writerow(tuple(linha) + ((round(preco * quantidade, 2) if preco is not None else None),))
+        yield buffer.getvalue()
+
+def exportar_ndjson(lotes):
+    """Um objeto JSON por pedido, com a lista de itens; as linhas de um pedido chegam consecutivas"""
+    atual = None
+    for lote in lotes:
+        partes = []
+        for linha in lote:
+            if atual is None or atual['historico_id'] != linha[0]:
+                if atual is not None:
+                    partes.append(json.dumps(atual, ensure_ascii=False, separators=(',', ':')) + '\n')
+                atual = dict(zip(COLUNAS_EXPORTACAO[:6], linha[:6]), itens=[])
+            if linha[6] is not None or linha[7] is not None:
+                atual['itens'].append(dict(zip(COLUNAS_EXPORTACAO[6:], linha[6:])))
+        if partes:
+            yield ''.join(partes)
+    if atual is not None:
+        yield json.dumps(atual, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+def comprimir_gzip(partes, nivel=6):
+    """Comprime em gzip à medida que os blocos chegam; o primeiro bloco sai na hora (Z_SYNC_FLUSH)"""
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+    primeiro = True
+    for parte in partes:
+        dados = compressor.compress(parte.encode('utf-8'))
+        if primeiro:
+            dados += compressor.flush(zlib.Z_SYNC_FLUSH)
+            primeiro = False
+        if dados:
+            yield dados
+    yield compressor.flush()
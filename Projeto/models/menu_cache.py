@@ -0,0 +1,41 @@
+import hashlib
+import json
+import threading
+
+class MenuCache:
+    """Cache em memória do cardápio público, já serializado e com ETag forte (hash do conteúdo)"""
+
+    def __init__(self, carregar):
+        self._carregar = carregar
+        self._lock = threading.Lock()
+        self._entrada = None
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def obter(self):
+        """Retorna (corpo_json_bytes, etag); só consulta o banco após uma invalidação"""
+        with self._lock:
+            if self._entrada is not None:
+                self.acertos += 1
+                return self._entrada
+            self.falhas += 1
+            corpo = json.dumps(self._carregar(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            self._entrada = (corpo, hashlib.sha256(corpo).hexdigest())
+            return self._entrada
+
+    def invalidar(self):
+        with self._lock:
+            self._entrada = None
+            self.invalidacoes += 1
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'invalidacoes': self.invalidacoes,
+                'taxa_acerto': self.acertos / consultas if consultas else 0,
+                'etag': self._entrada[1] if self._entrada else None
+            }
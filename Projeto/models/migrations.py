@@ -0,0 +1,56 @@
+from models.order_archive import arquivar_entregues
+from models.aggregates import reconstruir_estatisticas, reconstruir_vendas_produto
+
+def migrar_itens_json(cursor):
+    """Converte os blobs itens_json legados em linhas de pedido_itens (idempotente)"""
+    for tabela, coluna in (('pedidos', 'pedido_id'), ('historico_pedidos', 'historico_id')):
+        cursor.execute(f"""INSERT INTO pedido_itens ({coluna}, produto_id, nome, preco, quantidade)
+            SELECT t.id,
+                   -- Itens mais antigos guardam o produto em produto_id
+                   CAST(COALESCE(json_extract(j.value, '$.id'), json_extract(j.value, '$.produto_id')) AS INTEGER),
+                   COALESCE(json_extract(j.value, '$.nome'), ''),
+                   COALESCE(CAST(json_extract(j.value, '$.preco') AS REAL), 0),
+                   MAX(COALESCE(CAST(json_extract(j.value, '$.quantidade') AS INTEGER), 1), 1)
+            FROM {tabela} t, json_each(t.itens_json) j
+            WHERE t.itens_json NOT IN ('', '[]') AND json_valid(t.itens_json)
+            ORDER BY t.id, j.key""")
+        cursor.execute(f"""UPDATE {tabela} SET itens_json = '[]'
+            WHERE itens_json NOT IN ('', '[]') AND json_valid(itens_json)""")
+
+
+def criar_lucros_em_lote(cursor):
+    """Cria o marcador lucros_em_lote e condiciona a ele o trigger atualizar_lucros_diarios (idempotente)"""
+    cursor.execute("CREATE TABLE IF NOT EXISTS lucros_em_lote (id INTEGER PRIMARY KEY CHECK(id = 1))")
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'atualizar_lucros_diarios'")
+    linha = cursor.fetchone()
+    if linha is None or 'lucros_em_lote' in linha[0]:
+        return
+    cursor.execute("DROP TRIGGER atualizar_lucros_diarios")
+    cursor.execute(linha[0].replace("AFTER INSERT ON historico_pedidos",
+                                    "AFTER INSERT ON historico_pedidos\nWHEN NOT EXISTS (SELECT 1 FROM lucros_em_lote)", 1))
+
+
+# Migrações em ordem; a posição (1, 2, ...) é gravada em PRAGMA user_version
+MIGRACOES = [
+    migrar_itens_json,
+    arquivar_entregues,
+    reconstruir_estatisticas,
+    reconstruir_vendas_produto,
+    criar_lucros_em_lote,
+]
+
+def aplicar_migracoes(conn):
+    """Aplica, em uma transação, as migrações ainda não registradas no banco"""
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    pendentes = MIGRACOES[versao:]
+    if not pendentes:
+        return 0
+    cursor = conn.cursor()
+    # Transação explícita: migrações podem recriar triggers, e DDL fora de transação é confirmado na hora
+    if not conn.in_transaction:
+        cursor.execute("BEGIN")
+    for migracao in pendentes:
+        migracao(cursor)
+    cursor.execute(f"PRAGMA user_version = {len(MIGRACOES)}")
+    conn.commit()
+    return len(pendentes)
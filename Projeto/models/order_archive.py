@@ -0,0 +1,54 @@
+from models.aggregates import acumular_lucros_diarios
+
+# Pedidos que ainda aparecem no quadro; entregues saem de pedidos e ficam só no histórico
+STATUS_ATIVOS = ('Pendente', 'Preparando', 'Pronto')
+FILTRO_ATIVOS = "status IN ('Pendente', 'Preparando', 'Pronto')"
+
+# A partir de quantas entregas em um lote compensa trocar o upsert por linha do trigger por um upsert agrupado.
+# O trigger é desligado pelo marcador em lucros_em_lote, não por DROP/CREATE: mudar o schema no caminho da
+# requisição esvaziaria o cache de instruções de todas as conexões do pool
+LIMIAR_LUCROS_EM_LOTE = 100
+
+def arquivar_pedidos(cursor, pedido_ids):
+    """Move para o histórico os pedidos entregues informados e os remove de pedidos, na transação corrente.
+    Pedidos que já têm cópia no histórico (bancos anteriores ao arquivamento) são apenas removidos."""
+    agrupar_lucros = len(pedido_ids) >= LIMIAR_LUCROS_EM_LOTE
+    if agrupar_lucros:
+        cursor.execute("INSERT OR IGNORE INTO lucros_em_lote (id) VALUES (1)")
+    try:
+        copiados = _copiar_para_historico(cursor, pedido_ids)
+    finally:
+        if agrupar_lucros:
+            cursor.execute("DELETE FROM lucros_em_lote")
+    if agrupar_lucros and copiados:
+        historico_ids = [historico_id for historico_id, _ in copiados]
+        acumular_lucros_diarios(cursor, min(historico_ids), max(historico_ids))
+    # Os mesmos itens passam a pertencer ao registro do histórico; o trigger remover_itens_pedido solta o pedido_id
+    cursor.executemany("UPDATE pedido_itens SET historico_id = ? WHERE pedido_id = ?", copiados)
+    removidos = 0
+    for inicio in range(0, len(pedido_ids), 500):
+        lote = pedido_ids[inicio:inicio + 500]
+        cursor.execute(f"DELETE FROM pedidos WHERE id IN ({','.join('?' * len(lote))}) AND status = 'Entregue'", lote)
+        removidos += cursor.rowcount
+    return removidos
+
+def _copiar_para_historico(cursor, pedido_ids):
+    """Copia os entregues ainda sem registro no histórico; retorna pares (historico_id, pedido_id)"""
+    copiados = []
+    for inicio in range(0, len(pedido_ids), 500):
+        lote = pedido_ids[inicio:inicio + 500]
+        marcadores = ','.join('?' * len(lote))
+        cursor.execute(f"""INSERT INTO historico_pedidos (pedido_id, itens_json, total, status, data_pedido, data_entrega)
+            SELECT p.id, '[]', p.total, p.status, p.data_pedido, COALESCE(p.data_entrega, p.data_pedido)
+            FROM pedidos p
+            WHERE p.id IN ({marcadores}) AND p.status = 'Entregue'
+              AND NOT EXISTS (SELECT 1 FROM historico_pedidos h
+                              WHERE h.pedido_id = p.id AND h.data_entrega = COALESCE(p.data_entrega, p.data_pedido))
+            ORDER BY p.id RETURNING id, pedido_id""", lote)
+        copiados.extend((row[0], row[1]) for row in cursor.fetchall())
+    return copiados
+
+def arquivar_entregues(cursor):
+    """Arquiva todos os pedidos entregues que ainda estão em pedidos (migração e restauração de backups antigos)"""
+    cursor.execute("SELECT id FROM pedidos WHERE status = 'Entregue' ORDER BY id")
+    return arquivar_pedidos(cursor, [row[0] for row in cursor.fetchall()])
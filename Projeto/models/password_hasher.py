@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+class SobrecargaHash(Exception):
+    """Fila de hashing cheia por mais tempo que o permitido"""
+
+
+# Executadas nos processos do pool: precisam ser funções de módulo para serem serializáveis
+def _gerar_hash(senha, rounds):
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _verificar(senha, senha_hash):
+    try:
+        return bcrypt.checkpw(senha.encode('utf-8'), senha_hash.encode('utf-8'))
+    except ValueError:
+        # Hash malformado no banco: trata como senha incorreta
+        return False
+
+
+class PasswordHasher:
+    """Hash e verificação bcrypt em um pool de processos limitado, fora da thread da requisição.
+
+    No máximo max_concorrentes operações ficam em andamento; as demais esperam até timeout_fila
+    segundos e então recebem SobrecargaHash, em vez de enfileirar logins indefinidamente.
+    """
+
+    def __init__(self, rounds=12, processos=2, max_concorrentes=None, timeout_fila=5.0, amostras=1000):
+        self.rounds = rounds
+        self.processos = processos
+        self.max_concorrentes = max_concorrentes or processos * 2
+        self.timeout_fila = timeout_fila
+        self._vagas = threading.BoundedSemaphore(self.max_concorrentes)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._latencias = deque(maxlen=amostras)
+        self._operacoes = 0
+        self._rejeitadas = 0
+
+    def _obter_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # forkserver/spawn: fazer fork de um servidor com threads ativas não é seguro
+                metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                contexto = multiprocessing.get_context(metodo)
+                if metodo == 'forkserver':
+                    # Sem pré-carregar __main__: o servidor de fork não importa a aplicação nem abre o banco
+                    contexto.set_forkserver_preload([])
+                self._executor = ProcessPoolExecutor(max_workers=self.processos, mp_context=contexto)
+            return self._executor
+
+    def _executar(self, funcao, *args):
+        if not self._vagas.acquire(timeout=self.timeout_fila):
+            with self._lock:
+                self._rejeitadas += 1
+            raise SobrecargaHash("Muitas operações de senha simultâneas")
+        try:
+            inicio = time.perf_counter()
+            try:
+                resultado = self._obter_executor().submit(funcao, *args).result()
+            except BrokenProcessPool:
+                # Processo do pool morreu: recria o pool na próxima chamada
+                with self._lock:
+                    self._executor = None
+                raise
+            with self._lock:
+                self._operacoes += 1
+                self._latencias.append(time.perf_counter() - inicio)
+            return resultado
+        finally:
+            self._vagas.release()
+
+    def gerar_hash(self, senha):
+        return self._executar(_gerar_hash, senha, self.rounds)
+
+    def verificar(self, senha, senha_hash):
+        return self._executar(_verificar, senha, senha_hash)
+
+    def precisa_rehash(self, senha_hash):
+        """True quando o hash foi gerado com um custo diferente do configurado"""
+        try:
+            return int(senha_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def estatisticas(self):
+        with self._lock:
+            latencias = sorted(self._latencias)
+            operacoes, rejeitadas = self._operacoes, self._rejeitadas
+        def percentil(p):
+            return round(latencias[min(int(len(latencias) * p), len(latencias) - 1)] * 1000, 1) if latencias else None
+        return {
+            'rounds': self.rounds,
+            'processos': self.processos,
+            'max_concorrentes': self.max_concorrentes,
+            'operacoes': operacoes,
+            'rejeitadas': rejeitadas,
+            'latencia_media_ms': round(sum(latencias) / len(latencias) * 1000, 1) if latencias else None,
+            'latencia_p50_ms': percentil(0.5),
+            'latencia_p95_ms': percentil(0.95),
+            'latencia_max_ms': round(latencias[-1] * 1000, 1) if latencias else None,
+        }
+
+    def encerrar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+
+hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', 12)),
+    processos=int(os.environ.get('HASH_PROCESSOS', min(2, os.cpu_count() or 1))),
+    max_concorrentes=int(os.environ.get('HASH_MAX_CONCORRENTES', 0)) or None,
+    timeout_fila=float(os.environ.get('HASH_TIMEOUT_FILA', 5)),
+)
@@ -0,0 +1,94 @@
+import threading
+
+class ItensInvalidos(ValueError):
+    """Itens de pedido que não podem ser precificados; 'erros' descreve cada item recusado"""
+
+    def __init__(self, erros):
+        super().__init__('; '.join(erros))
+        self.erros = erros
+
+
+class MotorPrecos:
+    """Índice em memória dos preços dos produtos ativos; calcula totais sem consultar o banco por item"""
+
+    def __init__(self, carregar):
+        self._carregar = carregar
+        self._lock = threading.Lock()
+        self._indice = None
+        self.recargas = 0
+        self.invalidacoes = 0
+        self.itens_precificados = 0
+
+    def _obter_indice(self):
+        # Leitura sem lock no caminho quente; a recarga é serializada
+        indice = self._indice
+        if indice is not None:
+            return indice
+        with self._lock:
+            if self._indice is None:
+                # Preço guardado em centavos para somar sem erro de arredondamento
+                self._indice = {p['id']: (p['nome'], p['preco'], int(round(p['preco'] * 100)))
+                                for p in self._carregar()}
+                self.recargas += 1
+            return self._indice
+
+    def invalidar(self):
+        with self._lock:
+            self._indice = None
+            self.invalidacoes += 1
+
+    @staticmethod
+    def _ler_item(item):
+        """Extrai (produto_id, quantidade) de um item da API; levanta ValueError/TypeError se inválido"""
+        produto_id = int(item['id'])
+        quantidade = item.get('quantidade')
+        quantidade = 1 if quantidade is None else int(quantidade)
+        if quantidade < 1:
+            raise ValueError('quantidade deve ser maior que zero')
+        return produto_id, quantidade
+
+    def precificar(self, itens):
+        """Retorna (linhas, total) com linhas (produto_id, nome, preco, quantidade) e o total calculado"""
+        indice = self._obter_indice()
+        linhas = []
+        centavos = 0
+        erros = []
+        for posicao, item in enumerate(itens):
+            try:
+                produto_id, quantidade = self._ler_item(item)
+            except (KeyError, ValueError, TypeError, AttributeError):
+                erros.append(f'item {posicao}: id e quantidade devem ser inteiros positivos')
+                continue
+            produto = indice.get(produto_id)
+            if produto is None:
+                erros.append(f'item {posicao}: produto {produto_id} inexistente ou inativo')
+                continue
+            nome, preco, preco_centavos = produto
+            linhas.append((produto_id, nome, preco, quantidade))
+            centavos += preco_centavos * quantidade
+        if erros:
+            raise ItensInvalidos(erros)
+        if not linhas:
+            raise ItensInvalidos(['pedido sem itens'])
+        self.itens_precificados += len(linhas)
+        return linhas, centavos / 100
+
+    def validar_lote(self, pedidos):
+        """Valida vários pedidos de uma vez com o mesmo índice; retorna um resultado por pedido"""
+        resultados = []
+        for itens in pedidos:
+            try:
+                linhas, total = self.precificar(itens)
+                resultados.append({'valido': True, 'total': total, 'itens': len(linhas), 'erros': []})
+            except ItensInvalidos as e:
+                resultados.append({'valido': False, 'total': None, 'itens': 0, 'erros': e.erros})
+        return resultados
+
+    def estatisticas(self):
+        indice = self._indice
+        return {
+            'produtos_indexados': len(indice) if indice is not None else 0,
+            'recargas': self.recargas,
+            'invalidacoes': self.invalidacoes,
+            'itens_precificados': self.itens_precificados
+        }
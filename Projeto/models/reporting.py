@@ -0,0 +1,177 @@
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import date, timedelta
+
+GRANULARIDADES = ('hora', 'dia', 'semana', 'mes')
+LIMITE_DIAS = 3660
+LIMITE_DIAS_POR_HORA = 92
+_EPOCA = date(1970, 1, 1).toordinal()
+# Cada dia vira 48 inteiros: pedidos por hora (0-23) seguidos da receita por hora em centavos (24-47)
+_DIA_VAZIO = array('q', bytes(48 * 8))
+
+def _segundos(dia):
+    """Início do dia no mesmo relógio de strftime('%s') aplicado às datas locais do banco"""
+    return (dia.toordinal() - _EPOCA) * 86400
+
+def agrupar_por_hora(instantes, centavos, primeiro_dia, dias):
+    """Reduz colunas ordenadas por instante a um array de 48 posições por dia.
+
+    Como as colunas vêm ordenadas, cada hora é uma fatia contígua: os limites saem de bisect
+    e a soma da fatia é feita em C, sem percorrer as linhas em Python.
+    """
+    resultado = []
+    base = _segundos(primeiro_dia)
+    inicio = bisect_left(instantes, base)
+    for _ in range(dias):
+        fim_dia = bisect_left(instantes, base + 86400, inicio)
+        if fim_dia == inicio:
+            resultado.append(_DIA_VAZIO)
+            base += 86400
+            continue
+        horas = array('q', _DIA_VAZIO)
+        for hora in range(24):
+            fim = bisect_left(instantes, base + 3600, inicio, fim_dia)
+            if fim > inicio:
+                horas[hora] = fim - inicio
+                horas[24 + hora] = sum(centavos[inicio:fim])
+            inicio = fim
+            base += 3600
+        resultado.append(horas)
+        inicio = fim_dia
+    return resultado
+
+def _ponto(chave, nome, pedidos, centavos):
+    return {
+        chave: nome,
+        'pedidos': pedidos,
+        'receita': centavos / 100,
+        'ticket_medio': round(centavos / pedidos / 100, 2) if pedidos else 0
+    }
+
+
+class RelatorioVendas:
+    """Séries de receita por hora, dia, semana ou mês a partir de colunas compactas do histórico.
+
+    Os dias já fechados ficam em cache (48 inteiros por dia); só o dia corrente é lido de novo a cada
+    consulta. O cache é conferido contra os contadores de estatisticas_live e descartado se o
+    histórico anterior a hoje mudar (remoção, limpeza, restauração de backup).
+    """
+
+    def __init__(self, carregar_colunas, ler_fechados, hoje=date.today):
+        self._carregar_colunas = carregar_colunas
+        self._ler_fechados = ler_fechados
+        self._hoje = hoje
+        self._lock = threading.Lock()
+        self._dias = {}
+        self._corte = None
+        self.acertos = 0
+        self.dias_carregados = 0
+        self.linhas_carregadas = 0
+        self.invalidacoes = 0
+
+    def _carregar(self, primeiro, ultimo):
+        """Lê as entregas de primeiro a ultimo (inclusive) e agrupa por dia e hora"""
+        instantes, centavos = self._carregar_colunas(primeiro.isoformat(), (ultimo + timedelta(days=1)).isoformat())
+        dias = (ultimo - primeiro).days + 1
+        self.linhas_carregadas += len(instantes)
+        self.dias_carregados += dias
+        return agrupar_por_hora(instantes, centavos, primeiro, dias)
+
+    def _guardar(self, primeiro, ultimo):
+        dias = self._carregar(primeiro, ultimo)
+        for deslocamento, horas in enumerate(dias):
+            self._dias[primeiro.toordinal() + deslocamento] = horas
+        return dias
+
+    def _validar_cache(self, hoje):
+        pedidos, centavos = self._ler_fechados()
+        if self._corte is not None:
+            corte, pedidos_esperados, centavos_esperados = self._corte
+            if corte < hoje:
+                # Virada de dia: os dias desde a última consulta acabaram de fechar
+                for horas in self._guardar(corte, hoje - timedelta(days=1)):
+                    pedidos_esperados += sum(horas[:24])
+                    centavos_esperados += sum(horas[24:])
+            if corte > hoje or (pedidos_esperados, centavos_esperados) != (pedidos, centavos):
+                self._dias.clear()
+                self.invalidacoes += 1
+        self._corte = (hoje, pedidos, centavos)
+
+    def invalidar(self):
+        with self._lock:
+            self._dias.clear()
+            self._corte = None
+            self.invalidacoes += 1
+
+    def _dias_do_periodo(self, inicio, fim, hoje):
+        ontem = min(fim, hoje - timedelta(days=1)).toordinal()
+        faltando = [o for o in range(inicio.toordinal(), ontem + 1) if o not in self._dias]
+        if faltando:
+            # Um único intervalo cobre todos os dias ausentes; os já presentes são apenas regravados
+            self._guardar(date.fromordinal(faltando[0]), date.fromordinal(faltando[-1]))
+        self.acertos += max(ontem - inicio.toordinal() + 1, 0) - len(faltando)
+        atual = self._carregar(hoje, hoje)[0] if inicio <= hoje <= fim else _DIA_VAZIO
+        return [self._dias[o] if o < hoje.toordinal() else atual if o == hoje.toordinal() else _DIA_VAZIO
+                for o in range(inicio.toordinal(), fim.toordinal() + 1)]
+
+    def serie(self, granularidade='dia', inicio=None, fim=None):
+        """Receita, pedidos e ticket médio por período, com totais e a distribuição por hora do dia"""
+        if granularidade not in GRANULARIDADES:
+            raise ValueError("Granularidade inválida")
+        hoje = self._hoje()
+        try:
+            fim = date.fromisoformat(fim) if fim else hoje
+            inicio = date.fromisoformat(inicio) if inicio else fim - timedelta(days=29)
+        except (ValueError, TypeError):
+            raise ValueError("Data inválida")
+        if inicio > fim:
+            raise ValueError("Período inválido")
+        total_dias = (fim - inicio).days + 1
+        if total_dias > (LIMITE_DIAS_POR_HORA if granularidade == 'hora' else LIMITE_DIAS):
+            raise ValueError("Período muito longo para a granularidade")
+        
+        with self._lock:
+            self._validar_cache(hoje)
+            dias = self._dias_do_periodo(inicio, fim, hoje)
+        
+        pontos = {}
+        picos = array('q', _DIA_VAZIO)
+        for deslocamento, horas in enumerate(dias):
+            if horas is not _DIA_VAZIO:
+                for posicao in range(48):
+                    picos[posicao] += horas[posicao]
+            dia = inicio + timedelta(days=deslocamento)
+            if granularidade == 'hora':
+                for hora in range(24):
+                    pontos[f"{dia.isoformat()} {hora:02d}:00"] = [horas[hora], horas[24 + hora]]
+                continue
+            if granularidade == 'dia':
+                chave = dia.isoformat()
+            elif granularidade == 'semana':
+                chave = (dia - timedelta(days=dia.weekday())).isoformat()
+            else:
+                chave = dia.isoformat()[:7]
+            acumulado = pontos.setdefault(chave, [0, 0])
+            acumulado[0] += sum(horas[:24])
+            acumulado[1] += sum(horas[24:])
+        
+        pedidos = sum(picos[:24])
+        return {
+            'granularidade': granularidade,
+            'inicio': inicio.isoformat(),
+            'fim': fim.isoformat(),
+            'serie': [_ponto('periodo', chave, n, c) for chave, (n, c) in pontos.items()],
+            'totais': _ponto('periodo', 'total', pedidos, sum(picos[24:])),
+            'picos': [_ponto('hora', hora, picos[hora], picos[24 + hora]) for hora in range(24)],
+            'hora_pico': max(range(24), key=lambda hora: picos[hora]) if pedidos else None
+        }
+
+    def estatisticas(self):
+        return {
+            'dias_em_cache': len(self._dias),
+            'acertos': self.acertos,
+            'dias_carregados': self.dias_carregados,
+            'linhas_carregadas': self.linhas_carregadas,
+            'invalidacoes': self.invalidacoes
+        }
@@ -1,6 +1,10 @@
 import pytest
+import os
+import runpy
 from flask import session
 
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
 class TestAppRoutes:
     """Testes para as rotas do app.py"""
     
@@ -64,3 +68,39 @@ class TestAppConfiguration:
     def test_app_static_folder(self, app):
         """Testa se static_folder está configurado"""
         assert 'static' in app.static_folder
+    
+    def test_comando_reconstruir_lucros(self, runner):
+        """Testa o comando de CLI que reconstrói lucros_diarios"""
+        result = runner.invoke(args=['reconstruir-lucros'])
+        assert result.exit_code == 0
+        assert 'lucros_diarios reconstruída' in result.output
+    
+    def test_comando_reconstruir_vendas(self, runner):
+        """Testa o comando de CLI que reconstrói vendas_produto_diarias"""
+        result = runner.invoke(args=['reconstruir-vendas'])
+        assert result.exit_code == 0
+        assert 'vendas_produto_diarias reconstruída' in result.output
+    
+    def test_comando_verificar_estatisticas(self, runner):
+        """Testa o comando de CLI que confere estatisticas_live contra o histórico"""
+        result = runner.invoke(args=['verificar-estatisticas', '--corrigir'])
+        assert result.exit_code == 0
+        assert 'estatisticas_live' in result.output
+    
+    def test_processo_filho_nao_inicia_agendador(self, tmp_path, monkeypatch):
+        """Testa que processos do multiprocessing que reimportam app.py não iniciam outro agendador de backups"""
+        from controllers import backup_controller
+        monkeypatch.setenv('BACKUP_AGENDADO', '1')
+        monkeypatch.chdir(tmp_path)
+        # O que um processo do pool de hash faz ao iniciar (spawn/forkserver), antes de parent_process() existir
+        runpy.run_path(APP_PATH, run_name='__mp_main__')
+        try:
+            assert backup_controller.agendador.status()['agendado'] is False
+        finally:
+            backup_controller.agendador.parar()
+    
+    def test_comando_arquivar_pedidos(self, runner):
+        """Testa o comando de CLI que arquiva pedidos entregues"""
+        result = runner.invoke(args=['arquivar-pedidos'])
+        assert result.exit_code == 0
+        assert 'Pedidos arquivados' in result.output
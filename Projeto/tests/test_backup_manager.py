@@ -3,7 +3,12 @@ import os
 import tempfile
 import shutil
 import json
-from models.backup_manager import BackupManager
+import gzip
+import sqlite3
+import io
+import time
+import threading
+from models.backup_manager import BackupManager, LeitorJsonIncremental
 from models.database_manager import DatabaseManager
 
 @pytest.fixture
@@ -153,3 +158,420 @@ class TestBackupManager:
         
         assert arquivo == arquivo_custom
         assert os.path.exists(arquivo_custom)
+    
+    def test_importar_preserva_itens(self, temp_backup_manager):
+        """Testa se exportação e restauração preservam os itens dos pedidos"""
+        bm, db = temp_backup_manager
+        
+        itens = [{'nome': 'Item 1', 'preco': 10.00, 'quantidade': 2}]
+        pedido = db.criar_pedido(itens, 20.00)
+        db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        
+        arquivo, stats = bm.exportar_para_json()
+        assert stats['itens'] == 1
+        
+        db.resetar_contadores()
+        bm.importar_de_json(arquivo)
+        
+        assert db.listar_pedidos(incluir_entregues=True)[0]['itens'][0]['quantidade'] == 2
+        assert db.listar_historico()[0]['itens'][0]['nome'] == 'Item 1'
+    
+    def test_importar_backup_legado(self, temp_backup_manager):
+        """Testa restauração de backup antigo com itens em itens_json"""
+        bm, db = temp_backup_manager
+        
+        arquivo = os.path.join(bm.backup_dir, 'backup_legado.json')
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': {'versao': '1.0'}, 'produtos': [], 'pedidos': [],
+                       'historico_pedidos': [{'id': 1, 'pedido_id': 1, 'total': 78.0, 'status': 'Entregue',
+                                              'itens_json': json.dumps([{'nome': 'Pizza', 'preco': 35.0, 'quantidade': 2},
+                                                                        {'nome': 'Refrigerante', 'preco': 8.0}]),
+                                              'data_pedido': '2026-01-30 22:16:47',
+                                              'data_entrega': '2026-01-30 22:17:51'}]}, f)
+        
+        bm.importar_de_json(arquivo)
+        
+        itens = db.listar_historico()[0]['itens']
+        assert [(i['nome'], i['quantidade']) for i in itens] == [('Pizza', 2), ('Refrigerante', 1)]
+    
+    def test_importar_backup_legado_com_produto_id(self, temp_backup_manager):
+        """Testa se itens legados com 'produto_id' (formato dos backups em backups_json) mantêm o produto"""
+        bm, db = temp_backup_manager
+        
+        exemplo = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'backups_json', 'backup_20260130_221850.json')
+        arquivo = os.path.join(bm.backup_dir, 'backup_20260130_221850.json')
+        shutil.copy(exemplo, arquivo)
+        
+        bm.importar_de_json(arquivo)
+        
+        itens = db.listar_historico()[0]['itens']
+        assert [(i['id'], i['nome'], i['quantidade']) for i in itens] == \
+            [(1, 'Pizza Margherita', 2), (5, 'Refrigerante 2L', 1)]
+        vendas = [(v['produto_id'], v['quantidade']) for v in db.top_produtos(inicio='2026-01-30', fim='2026-01-30')]
+        assert sorted(vendas) == [(1, 2), (5, 1)]
+    
+    def test_importar_backup_com_entregues_em_pedidos(self, temp_backup_manager):
+        """Testa se backups anteriores ao arquivamento têm os entregues movidos para o histórico"""
+        bm, db = temp_backup_manager
+        
+        arquivo = os.path.join(bm.backup_dir, 'backup_antigo.json')
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': {'versao': '1.0'}, 'produtos': [],
+                       'pedidos': [{'id': 4, 'total': 12.0, 'status': 'Entregue', 'itens_json': '[]',
+                                    'data_pedido': '2026-01-30 22:00:00', 'data_entrega': '2026-01-30 22:10:00'}],
+                       'historico_pedidos': []}, f)
+        
+        bm.importar_de_json(arquivo)
+        
+        assert db.listar_pedidos() == []
+        assert [h['pedido_id'] for h in db.listar_historico()] == [4]
+        assert [(l['data'], l['total_pedidos']) for l in db.obter_lucros_periodo()] == [('2026-01-30', 1)]
+    
+    def _popular(self, db):
+        db.criar_produto('Pizza Backup', 'Calabresa', 35.00)
+        pedido = db.criar_pedido([{'nome': 'Pizza', 'preco': 35.00, 'quantidade': 2}], 70.00)
+        db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        db.criar_pedido([{'nome': 'Suco', 'preco': 8.00, 'quantidade': 1}], 8.00)
+    
+    def _restaurar_e_conferir(self, bm, db, arquivo):
+        db.resetar_contadores()
+        bm.importar_de_json(arquivo)
+        assert 'Pizza Backup' in [p['nome'] for p in db.listar_produtos(apenas_ativos=False)]
+        assert db.listar_historico()[0]['itens'][0]['quantidade'] == 2
+        ativos = db.listar_pedidos()
+        assert len(ativos) == 1 and ativos[0]['itens'][0]['nome'] == 'Suco'
+    
+    def test_exportar_json_compacto(self, temp_backup_manager):
+        """Testa que o JSON é gravado um registro por linha, sem indentação"""
+        bm, db = temp_backup_manager
+        self._popular(db)
+        
+        arquivo, stats = bm.exportar_para_json()
+        
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            conteudo = f.read()
+        assert '\n  ' not in conteudo
+        assert json.loads(conteudo)['metadata']['formato'] == 'json'
+        assert stats['historico'] == 1 and stats['itens'] == 2
+    
+    def test_exportar_importar_json_gzip(self, temp_backup_manager):
+        """Testa ida e volta de backup JSON comprimido"""
+        bm, db = temp_backup_manager
+        self._popular(db)
+        
+        arquivo, stats = bm.exportar_para_json(comprimir=True)
+        
+        assert arquivo.endswith('.json.gz')
+        with gzip.open(arquivo, 'rt', encoding='utf-8') as f:
+            assert len(json.load(f)['pedidos']) == stats['pedidos']
+        self._restaurar_e_conferir(bm, db, arquivo)
+    
+    def test_exportar_importar_ndjson(self, temp_backup_manager):
+        """Testa ida e volta de backup NDJSON, com e sem gzip"""
+        bm, db = temp_backup_manager
+        self._popular(db)
+        
+        for comprimir in (False, True):
+            arquivo, stats = bm.exportar_para_json(formato='ndjson', comprimir=comprimir)
+            assert stats['itens'] == 2
+            self._restaurar_e_conferir(bm, db, arquivo)
+    
+    def test_ler_backup_ndjson(self, temp_backup_manager):
+        """Testa leitura registro a registro do NDJSON"""
+        bm, db = temp_backup_manager
+        self._popular(db)
+        
+        arquivo, _ = bm.exportar_para_json(formato='ndjson')
+        
+        registros = list(bm.ler_backup(arquivo))
+        assert registros[0][0] == 'metadata'
+        produtos = {r['nome']: r for t, r in registros if t == 'produtos'}
+        assert produtos['Pizza Backup']['preco'] == 35.00
+    
+    def test_exportar_formato_invalido(self, temp_backup_manager):
+        """Testa que formato desconhecido é rejeitado sem criar arquivo"""
+        bm, _ = temp_backup_manager
+        
+        with pytest.raises(ValueError):
+            bm.exportar_para_json(formato='xml')
+        assert os.listdir(bm.backup_dir) == []
+    
+    def test_backup_automatico_limpeza_todos_formatos(self, temp_backup_manager):
+        """Testa que a retenção considera backups JSON, NDJSON e comprimidos"""
+        bm, _ = temp_backup_manager
+        for nome in ('backup_20240101_000000.json', 'backup_20240102_000000.json.gz',
+                     'backup_20240103_000000.ndjson', 'backup_20240104_000000.ndjson.gz'):
+            open(os.path.join(bm.backup_dir, nome), 'w').close()
+        
+        arquivo = bm.backup_automatico(max_backups=2, formato='ndjson', comprimir=True)
+        
+        assert bm.listar_backups() == [os.path.join(bm.backup_dir, 'backup_20240104_000000.ndjson.gz'), arquivo]
+    
+    def test_leitor_json_incremental(self):
+        """Testa o parser incremental com documento indentado e blocos pequenos"""
+        documento = {'metadata': {'versao': '1.0'}, 'vazia': [], 'numero': 12345,
+                     'produtos': [{'id': 1, 'nome': 'Pão "francês"', 'preco': 0.5}, {'id': 22, 'preco': 10}]}
+        texto = json.dumps(documento, indent=2, ensure_ascii=False)
+        
+        for tamanho_bloco in (1, 5, 1 << 16):
+            pares = list(LeitorJsonIncremental(io.StringIO(texto), tamanho_bloco=tamanho_bloco))
+            assert pares == [('metadata', {'versao': '1.0'}), ('numero', 12345),
+                             ('produtos', documento['produtos'][0]), ('produtos', documento['produtos'][1])]
+    
+    def test_leitor_json_incremental_incompleto(self):
+        """Testa que documento truncado gera erro"""
+        with pytest.raises(ValueError):
+            list(LeitorJsonIncremental(io.StringIO('{"produtos": [{"id": 1}, {"id"')))
+    
+    def test_importar_reconstroi_lucros_e_informa_progresso(self, temp_backup_manager):
+        """Testa restauração em lotes com progresso e lucros recalculados no fim"""
+        bm, db = temp_backup_manager
+        for i in range(5):
+            pedido = db.criar_pedido([{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}], 10.00)
+            db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        arquivo, _ = bm.exportar_para_json()
+        db.resetar_contadores()
+        
+        chamadas = []
+        bm.importar_de_json(arquivo, progresso=lambda tabela, total: chamadas.append((tabela, total)),
+                            tamanho_lote=2)
+        
+        assert ('historico_pedidos', 4) in chamadas and ('historico_pedidos', 5) in chamadas
+        assert db.obter_lucros_periodo()[0]['total_pedidos'] == 5
+        conn = db.get_connection()
+        gatilhos = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        conn.close()
+        assert {'atualizar_lucros_diarios', 'ajustar_lucros_diarios_remocao'} <= gatilhos
+    
+    def test_importar_invalido_preserva_banco(self, temp_backup_manager):
+        """Testa que falha no meio da restauração não altera dados nem triggers"""
+        bm, db = temp_backup_manager
+        db.criar_produto('Produto Mantido', 'Desc', 10.00)
+        arquivo = os.path.join(bm.backup_dir, 'backup_truncado.json')
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            f.write('{"metadata": {}, "produtos": [{"id": 1, "nome": "X", "descricao": "", "preco": 1}, {"id"')
+        
+        with pytest.raises(ValueError):
+            bm.importar_de_json(arquivo)
+        
+        assert any(p['nome'] == 'Produto Mantido' for p in db.listar_produtos(apenas_ativos=False))
+        pedido = db.criar_pedido([{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}], 10.00)
+        db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        assert db.obter_lucros_periodo()[0]['total_pedidos'] == 1
+    
+    def test_importar_registra_alteracoes(self, temp_backup_manager):
+        """Testa que o feed de versões enxerga pedidos removidos e restaurados"""
+        bm, db = temp_backup_manager
+        pedido = db.criar_pedido([{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}], 10.00)
+        arquivo, _ = bm.exportar_para_json(formato='ndjson')
+        extra = db.criar_pedido([{'nome': 'Extra', 'preco': 5.00, 'quantidade': 1}], 5.00)
+        versao = db.listar_pedidos_alterados(0)['versao']
+        
+        bm.importar_de_json(arquivo)
+        
+        delta = db.listar_pedidos_alterados(versao)
+        assert [p['id'] for p in delta['pedidos']] == [pedido['id']]
+        assert delta['removidos'] == [extra['id']]
+    
+    def test_criar_snapshot(self, temp_backup_manager):
+        """Testa backup binário a quente verificado"""
+        bm, db = temp_backup_manager
+        self._popular(db)
+        
+        arquivo, stats = bm.criar_snapshot()
+        
+        assert arquivo.endswith('.db') and os.path.basename(arquivo).startswith('backup_')
+        assert stats['historico'] == 1 and stats['itens'] == 2
+        assert not os.path.exists(arquivo + '-wal')
+        conn = sqlite3.connect(arquivo)
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        assert conn.execute("SELECT COUNT(*) FROM produtos WHERE nome = 'Pizza Backup'").fetchone()[0] == 1
+        conn.close()
+    
+    def test_criar_snapshot_com_escritas_concorrentes(self, temp_backup_manager):
+        """Testa que o snapshot termina enquanto outra conexão continua gravando pedidos"""
+        bm, db = temp_backup_manager
+        db.salvar_produtos_em_lote([{'nome': f'Produto {i}', 'descricao': 'x' * 200, 'preco': 10.0} for i in range(5000)])
+        parar = threading.Event()
+        
+        def gravar():
+            conn = sqlite3.connect(db.db_path, timeout=5)
+            while not parar.is_set():
+                conn.execute("INSERT INTO pedidos (total, status) VALUES (10.0, 'Pendente')")
+                conn.commit()
+                time.sleep(0.001)
+            conn.close()
+        
+        escritor = threading.Thread(target=gravar, daemon=True)
+        escritor.start()
+        resultado = []
+        copia = threading.Thread(target=lambda: resultado.append(bm.criar_snapshot()), daemon=True)
+        try:
+            copia.start()
+            copia.join(timeout=30)
+        finally:
+            parar.set()
+            escritor.join(timeout=5)
+        
+        assert resultado, "snapshot não terminou com escritas concorrentes"
+        arquivo, stats = resultado[0]
+        assert stats['produtos'] >= 5000
+        conn = sqlite3.connect(arquivo)
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        conn.close()
+    
+    def test_restaurar_snapshot(self, temp_backup_manager):
+        """Testa restauração de snapshot, incluindo usuários, mantendo o banco em WAL"""
+        bm, db = temp_backup_manager
+        self._popular(db)
+        db.criar_usuario('gerente_snap', 'senha123', 'gerente')
+        arquivo, _ = bm.criar_snapshot()
+        db.resetar_contadores()
+        db.remover_usuario('gerente_snap')
+        
+        assert bm.restaurar_snapshot(arquivo) is True
+        
+        assert db.verificar_login('gerente_snap', 'senha123')
+        assert db.listar_historico()[0]['itens'][0]['quantidade'] == 2
+        conn = db.get_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        conn.close()
+    
+    def test_restaurar_snapshot_mantem_versoes_crescentes(self, temp_backup_manager):
+        """Testa que o feed de versões continua avançando após restaurar um snapshot"""
+        bm, db = temp_backup_manager
+        pedido = db.criar_pedido([{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}], 10.00)
+        arquivo, _ = bm.criar_snapshot()
+        extra = db.criar_pedido([{'nome': 'Extra', 'preco': 5.00, 'quantidade': 1}], 5.00)
+        versao = db.listar_pedidos_alterados(0)['versao']
+        
+        bm.restaurar_snapshot(arquivo)
+        
+        delta = db.listar_pedidos_alterados(versao)
+        assert delta['versao'] > versao
+        assert [p['id'] for p in delta['pedidos']] == [pedido['id']]
+        assert delta['removidos'] == [extra['id']]
+    
+    def test_backup_automatico_snapshot_retencao(self, temp_backup_manager):
+        """Testa que snapshots entram na mesma retenção dos backups JSON"""
+        bm, _ = temp_backup_manager
+        for nome in ('backup_20240101_000000.json', 'backup_20240102_000000.db'):
+            open(os.path.join(bm.backup_dir, nome), 'w').close()
+        
+        arquivo = bm.backup_automatico(max_backups=2, formato='sqlite')
+        
+        assert arquivo.endswith('.db')
+        assert bm.listar_backups() == [os.path.join(bm.backup_dir, 'backup_20240102_000000.db'), arquivo]
+    
+    def test_restaurar_snapshot_inexistente(self, temp_backup_manager):
+        """Testa restauração de snapshot inexistente"""
+        bm, _ = temp_backup_manager
+        
+        with pytest.raises(FileNotFoundError):
+            bm.restaurar_snapshot('nao_existe.db')
+    
+    def _estado(self, db):
+        produtos = sorted((p['id'], p['nome'], p['preco']) for p in db.listar_produtos(apenas_ativos=False))
+        pedidos = sorted((p['id'], p['status'], tuple((i['nome'], i['quantidade']) for i in p['itens']))
+                         for p in db.listar_pedidos(incluir_entregues=True))
+        historico = sorted((h['id'], h['total'], tuple(i['nome'] for i in h['itens'])) for h in db.listar_historico())
+        stats = db.obter_estatisticas_gerais()
+        return (produtos, pedidos, historico, [(l['data'], l['total_pedidos']) for l in db.obter_lucros_periodo()],
+                (stats['total_pedidos'], stats['receita_total'], stats['pedidos_hoje']))
+    
+    def test_backup_incremental_base_e_delta(self, temp_backup_manager):
+        """Testa que a cadeia começa com uma base e depois grava só as alterações"""
+        bm, db = temp_backup_manager
+        self._popular(db)
+        
+        base, stats = bm.backup_incremental()
+        assert stats['tipo'] == 'base' and os.path.basename(base).startswith('base_')
+        
+        arquivo, stats = bm.backup_incremental()
+        assert arquivo is None and stats['tipo'] == 'sem_alteracoes'
+        
+        db.criar_pedido([{'nome': 'Novo', 'preco': 5.00, 'quantidade': 3}], 15.00)
+        arquivo, stats = bm.backup_incremental()
+        
+        assert stats['tipo'] == 'delta'
+        assert stats['pedidos'] == 1 and stats['itens'] == 1 and stats['produtos'] == 0
+        manifesto = bm.ler_manifesto()
+        assert [d['arquivo'] for d in manifesto['deltas']] == [os.path.basename(arquivo)]
+        assert manifesto['deltas'][0]['desde'] == manifesto['base']['versao']
+    
+    def test_restaurar_incremental_reproduz_estado(self, temp_backup_manager):
+        """Testa que base + deltas reproduzem inclusões, alterações e remoções"""
+        bm, db = temp_backup_manager
+        self._popular(db)
+        bm.backup_incremental()
+        
+        produto_id = db.criar_produto('Temporário', 'Desc', 3.00)
+        pedido = db.criar_pedido([{'nome': 'Suco', 'preco': 8.00, 'quantidade': 2}], 16.00)
+        bm.backup_incremental()
+        db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        db.remover_produto(produto_id)
+        ativo = db.listar_pedidos()[0]
+        db.deletar_pedido(ativo['id'])
+        bm.backup_incremental()
+        esperado = self._estado(db)
+        
+        db.resetar_contadores()
+        assert bm.restaurar_incremental() is True
+        
+        assert self._estado(db) == esperado
+    
+    def test_restaurar_incremental_checksum_invalido(self, temp_backup_manager):
+        """Testa que um delta alterado impede a restauração sem tocar no banco"""
+        bm, db = temp_backup_manager
+        bm.backup_incremental()
+        db.criar_produto('Produto Delta', 'Desc', 3.00)
+        arquivo, _ = bm.backup_incremental()
+        with open(arquivo, 'ab') as f:
+            f.write(b'x')
+        
+        with pytest.raises(ValueError):
+            bm.restaurar_incremental()
+        
+        assert any(p['nome'] == 'Produto Delta' for p in db.listar_produtos(apenas_ativos=False))
+    
+    def test_backup_incremental_compacta(self, temp_backup_manager):
+        """Testa que, atingido o limite de deltas, a cadeia é compactada numa nova base"""
+        bm, db = temp_backup_manager
+        primeira_base, _ = bm.backup_incremental()
+        for i in range(2):
+            db.criar_produto(f'Produto {i}', 'Desc', 1.00)
+            bm.backup_incremental(max_deltas=2)
+        db.criar_produto('Produto 3', 'Desc', 1.00)
+        
+        nova_base, stats = bm.backup_incremental(max_deltas=2)
+        
+        assert stats['tipo'] == 'base'
+        manifesto = bm.ler_manifesto()
+        assert manifesto['deltas'] == [] and manifesto['base']['arquivo'] == os.path.basename(nova_base)
+        assert sorted(os.listdir(bm._caminho_incremental())) == [os.path.basename(nova_base), 'manifesto.json']
+    
+    def test_restaurar_incremental_sem_cadeia(self, temp_backup_manager):
+        """Testa restauração incremental sem manifesto"""
+        bm, _ = temp_backup_manager
+        
+        with pytest.raises(FileNotFoundError):
+            bm.restaurar_incremental()
+    
+    def test_aplicar_retencao_por_idade_e_tamanho(self, temp_backup_manager):
+        """Testa retenção por idade e por espaço total, preservando o backup mais recente"""
+        bm, _ = temp_backup_manager
+        nomes = ['backup_20240101_000000.json', 'backup_20240102_000000.json', 'backup_20240103_000000.json']
+        for i, nome in enumerate(nomes):
+            caminho = os.path.join(bm.backup_dir, nome)
+            with open(caminho, 'w') as f:
+                f.write('x' * 100)
+            os.utime(caminho, (0, 0) if i == 0 else None)
+        
+        removidos = bm.aplicar_retencao(max_backups=None, max_idade_dias=30)
+        assert [os.path.basename(r) for r in removidos] == [nomes[0]]
+        
+        removidos = bm.aplicar_retencao(max_backups=None, max_bytes=150)
+        assert [os.path.basename(r) for r in removidos] == [nomes[1]]
+        
+        assert bm.aplicar_retencao(max_backups=None, max_bytes=1) == []
+        assert [os.path.basename(b) for b in bm.listar_backups()] == [nomes[2]]
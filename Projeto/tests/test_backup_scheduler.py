@@ -0,0 +1,79 @@
+import pytest
+import os
+import tempfile
+import shutil
+import time
+from datetime import datetime
+from models.backup_manager import BackupManager
+from models.backup_scheduler import AgendadorBackup
+from models.database_manager import DatabaseManager
+
+@pytest.fixture
+def backup_manager_temp():
+    """Cria um BackupManager sobre um banco temporário"""
+    temp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(temp_dir, 'test.db')
+    DatabaseManager(db_path=db_path)
+    yield BackupManager(backup_dir=os.path.join(temp_dir, 'backups'), db_path=db_path)
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestAgendadorBackup:
+    """Testes para AgendadorBackup"""
+    
+    def test_proxima_por_intervalo(self, backup_manager_temp):
+        """Testa próxima execução por intervalo, com jitter limitado"""
+        agendador = AgendadorBackup(backup_manager_temp, intervalo=600, jitter=30)
+        agora = datetime(2024, 1, 15, 10, 0, 0)
+        
+        segundos = (agendador.calcular_proxima(agora) - agora).total_seconds()
+        
+        assert 600 <= segundos <= 630
+    
+    def test_proxima_por_horarios(self, backup_manager_temp):
+        """Testa próxima execução em horários fixos, passando para o dia seguinte"""
+        agendador = AgendadorBackup(backup_manager_temp, horarios=['15:30', '03:00'], jitter=0)
+        
+        assert agendador.calcular_proxima(datetime(2024, 1, 15, 10, 0)) == datetime(2024, 1, 15, 15, 30)
+        assert agendador.calcular_proxima(datetime(2024, 1, 15, 16, 0)) == datetime(2024, 1, 16, 3, 0)
+    
+    def test_executar_agora_atualiza_status(self, backup_manager_temp):
+        """Testa backup disparado em segundo plano e o status resultante"""
+        agendador = AgendadorBackup(backup_manager_temp, comprimir=True)
+        
+        assert agendador.executar_agora() is True
+        assert agendador.aguardar(timeout=10)
+        
+        status = agendador.status()
+        assert status['ultimo_arquivo'].endswith('.json.gz')
+        assert status['ultimo_bytes'] == os.path.getsize(status['ultimo_arquivo'])
+        assert status['total_execucoes'] == 1 and status['ultimo_erro'] is None
+    
+    def test_falha_aplica_backoff(self, backup_manager_temp):
+        """Testa que falhas consecutivas antecipam a nova tentativa com backoff exponencial"""
+        agendador = AgendadorBackup(backup_manager_temp, intervalo=3600, formato='xml',
+                                    jitter=0, backoff_inicial=10, backoff_maximo=25)
+        agora = datetime(2024, 1, 15, 10, 0, 0)
+        esperas = []
+        for _ in range(3):
+            agendador.executar_agora()
+            agendador.aguardar(timeout=10)
+            esperas.append((agendador.calcular_proxima(agora) - agora).total_seconds())
+        
+        assert esperas == [10, 20, 25]
+        assert agendador.status()['falhas_consecutivas'] == 3
+        assert 'inválido' in agendador.status()['ultimo_erro']
+    
+    def test_agendador_em_segundo_plano(self, backup_manager_temp):
+        """Testa que o agendador executa sozinho e para quando solicitado"""
+        agendador = AgendadorBackup(backup_manager_temp, intervalo=0.05, jitter=0, max_backups=2)
+        agendador.iniciar()
+        limite = time.time() + 10
+        while agendador.status()['total_execucoes'] < 3 and time.time() < limite:
+            time.sleep(0.05)
+        agendador.parar()
+        
+        status = agendador.status()
+        assert status['total_execucoes'] >= 3
+        assert status['agendado'] is False
+        assert len(backup_manager_temp.listar_backups()) <= 2
@@ -0,0 +1,165 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sqlite3
+import threading
+from models.connection_pool import ConnectionPool, obter_pool
+from models.database_manager import DatabaseManager
+from models.backup_manager import BackupManager
+
+@pytest.fixture
+def temp_pool():
+    """Cria um pool sobre um banco temporário"""
+    temp_dir = tempfile.mkdtemp()
+    pool = ConnectionPool(os.path.join(temp_dir, 'test.db'), tamanho_maximo=2)
+    
+    yield pool
+    
+    pool.fechar()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def temp_dir_pool():
+    """Cria um diretório temporário para pools com configuração própria"""
+    temp_dir = tempfile.mkdtemp()
+    
+    yield temp_dir
+    
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestConnectionPool:
+    """Testes para ConnectionPool"""
+    
+    def test_configuracao_wal(self, temp_pool):
+        """Testa se as conexões saem configuradas com WAL e synchronous NORMAL"""
+        conn = temp_pool.obter()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        conn.close()
+    
+    def test_reutiliza_conexao(self, temp_pool):
+        """Testa se close() devolve a conexão ao pool para reuso"""
+        conn = temp_pool.obter()
+        fisica = conn._conn
+        conn.close()
+        
+        conn2 = temp_pool.obter()
+        assert conn2._conn is fisica
+        conn2.close()
+    
+    def test_limite_de_conexoes_livres(self, temp_pool):
+        """Testa se o pool guarda no máximo tamanho_maximo conexões ociosas"""
+        conexoes = [temp_pool.obter() for _ in range(2)]
+        for conn in conexoes:
+            conn.close()
+        conexoes = [temp_pool.obter() for _ in range(2)]
+        for conn in conexoes:
+            conn.close()
+        assert len(temp_pool._livres) == 2
+    
+    def test_limite_de_conexoes_emprestadas(self, temp_dir_pool):
+        """Testa se obter() falha quando tamanho_maximo conexões já estão emprestadas"""
+        pool = ConnectionPool(os.path.join(temp_dir_pool, 'test.db'), tamanho_maximo=2, busy_timeout_ms=100)
+        conexoes = [pool.obter() for _ in range(2)]
+        with pytest.raises(sqlite3.OperationalError):
+            pool.obter()
+        
+        conexoes[0].close()
+        conexoes[0].close()
+        conexoes[0] = pool.obter()
+        for conn in conexoes:
+            conn.close()
+        pool.fechar()
+    
+    def test_espera_conexao_devolvida(self, temp_pool):
+        """Testa se obter() aguarda a devolução de uma conexão quando o pool está cheio"""
+        conexoes = [temp_pool.obter() for _ in range(2)]
+        obtidas = []
+        
+        def obter():
+            conn = temp_pool.obter()
+            obtidas.append(conn._conn)
+            conn.close()
+        
+        thread = threading.Thread(target=obter)
+        thread.start()
+        thread.join(timeout=0.2)
+        assert thread.is_alive()
+        
+        fisica = conexoes[0]._conn
+        conexoes[0].close()
+        thread.join(timeout=2)
+        assert obtidas == [fisica]
+        conexoes[1].close()
+    
+    def test_descarta_transacao_pendente(self, temp_pool):
+        """Testa se alterações não confirmadas são descartadas ao devolver a conexão"""
+        conn = temp_pool.obter()
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.close()
+        
+        conn = temp_pool.obter()
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+        conn.close()
+    
+    def test_conexao_fechada(self, temp_pool):
+        """Testa uso de conexão já devolvida"""
+        conn = temp_pool.obter()
+        conn.close()
+        with pytest.raises(Exception):
+            conn.cursor()
+    
+    def test_leitor_nao_bloqueia_escritor(self, temp_pool):
+        """Testa se uma leitura aberta não impede a escrita (WAL)"""
+        conn = temp_pool.obter()
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+        
+        leitor = temp_pool.obter()
+        leitor.execute("BEGIN")
+        assert leitor.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+        
+        erros = []
+        def escrever():
+            try:
+                escritor = temp_pool.obter()
+                escritor.execute("INSERT INTO t VALUES (2)")
+                escritor.commit()
+                escritor.close()
+            except Exception as e:
+                erros.append(e)
+        
+        thread = threading.Thread(target=escrever)
+        thread.start()
+        thread.join(timeout=2)
+        
+        assert not erros
+        # O leitor continua vendo o snapshot antigo
+        assert leitor.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+        leitor.close()
+        conn.close()
+    
+    def test_pool_compartilhado(self):
+        """Testa se DatabaseManager e BackupManager usam o mesmo pool"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            db_path = os.path.join(temp_dir, 'test.db')
+            DatabaseManager(db_path=db_path)
+            BackupManager(backup_dir=os.path.join(temp_dir, 'backups'), db_path=db_path)
+            
+            conn = obter_pool(db_path).obter()
+            fisica = conn._conn
+            conn.close()
+            
+            bm_conn = BackupManager(backup_dir=os.path.join(temp_dir, 'backups'), db_path=db_path).get_connection()
+            assert bm_conn._conn is fisica
+            bm_conn.close()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
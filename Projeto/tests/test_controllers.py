@@ -1,5 +1,7 @@
 import pytest
+import gzip
 import json
+import os
 from flask import session
 
 class TestAuthController:
@@ -161,6 +163,26 @@ class TestProductController:
         data = json.loads(response.data)
         assert isinstance(data, list)
     
+    def test_listar_produtos_etag(self, client):
+        """Testa resposta 304 quando o cardápio não mudou"""
+        response = client.get('/api/produtos')
+        etag = response.headers.get('ETag')
+        assert etag
+        
+        response = client.get('/api/produtos', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+    
+    def test_listar_produtos_etag_muda_apos_escrita(self, client):
+        """Testa se criar produto invalida o cache do cardápio"""
+        from models.database_manager import db
+        etag = client.get('/api/produtos').headers.get('ETag')
+        db.criar_produto('Produto Cache', 'Desc', 12.00)
+        
+        response = client.get('/api/produtos', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert any(p['nome'] == 'Produto Cache' for p in json.loads(response.data))
+    
     def test_criar_produto_autenticado(self, authenticated_client):
         """Testa criação de produto autenticado"""
         response = authenticated_client.post('/api/produtos',
@@ -248,6 +270,34 @@ class TestProductController:
         
         assert response.status_code == 404
     
+    def test_salvar_produtos_em_lote(self, authenticated_client):
+        """Testa criação e atualização de produtos em lote"""
+        from models.database_manager import db
+        produto_id = db.criar_produto('Produto Lote', 'Desc', 10.00)
+        
+        response = authenticated_client.post('/api/produtos/lote',
+                                             json={'produtos': [
+                                                 {'id': produto_id, 'nome': 'Lote Atualizado', 'descricao': 'Desc', 'preco': 11.00},
+                                                 {'nome': 'Lote Novo', 'descricao': 'Desc', 'preco': 0}]})
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [p['nome'] for p in data['produtos']] == ['Lote Atualizado', 'Lote Novo']
+    
+    def test_salvar_produtos_em_lote_invalido(self, authenticated_client):
+        """Testa lote com item inválido ou produto inexistente"""
+        response = authenticated_client.post('/api/produtos/lote', json={'produtos': [{'nome': 'Sem preço'}]})
+        assert response.status_code == 400
+        
+        response = authenticated_client.post('/api/produtos/lote',
+                                             json={'produtos': [{'id': 999999, 'nome': 'X', 'descricao': 'Y', 'preco': 1}]})
+        assert response.status_code == 404
+    
+    def test_salvar_produtos_em_lote_sem_autenticacao(self, client):
+        """Testa lote sem autenticação"""
+        response = client.post('/api/produtos/lote', json={'produtos': []})
+        assert response.status_code == 401
+    
     def test_deletar_produto(self, authenticated_client):
         """Testa deleção de produto"""
         from models.database_manager import db
@@ -262,15 +312,50 @@ class TestOrderController:
     
     def test_criar_pedido_autenticado(self, authenticated_client):
         """Testa criação de pedido"""
+        from models.database_manager import db
+        produto_id = db.criar_produto('Item Pedido', 'Desc', 10.00)
         response = authenticated_client.post('/api/pedidos',
-                                            json={'itens': [{'nome': 'Item 1', 'preco': 10.00, 'quantidade': 2}],
-                                                  'total': 20.00},
+                                            json={'itens': [{'id': produto_id, 'quantidade': 2}],
+                                                  'total': 1.00},
                                             content_type='application/json')
         
         assert response.status_code == 201
         data = json.loads(response.data)
         assert data['sucesso'] is True
         assert 'pedido' in data
+        # O total informado pelo cliente é ignorado
+        assert data['pedido']['total'] == 20.00
+    
+    def test_criar_pedido_produto_inexistente(self, authenticated_client):
+        """Testa criação de pedido com produto inexistente"""
+        response = authenticated_client.post('/api/pedidos',
+                                            json={'itens': [{'id': 999999, 'quantidade': 1}]},
+                                            content_type='application/json')
+        
+        assert response.status_code == 400
+        assert json.loads(response.data)['detalhes']
+    
+    def test_validar_pedidos(self, authenticated_client):
+        """Testa validação de vários pedidos sem gravá-los"""
+        from models.database_manager import db
+        produto_id = db.criar_produto('Item Validar', 'Desc', 7.50)
+        total_pedidos = len(db.listar_pedidos())
+        response = authenticated_client.post('/api/pedidos/validar',
+                                            json={'pedidos': [{'itens': [{'id': produto_id, 'quantidade': 2}]},
+                                                              {'itens': [{'id': 999999}]}]},
+                                            content_type='application/json')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['validos'] == 1
+        assert data['invalidos'] == 1
+        assert data['resultados'][0]['total'] == 15.00
+        assert len(db.listar_pedidos()) == total_pedidos
+    
+    def test_validar_pedidos_sem_autenticacao(self, client):
+        """Testa validação de pedidos sem autenticação"""
+        response = client.post('/api/pedidos/validar', json={'pedidos': []}, content_type='application/json')
+        assert response.status_code == 401
     
     def test_criar_pedido_sem_autenticacao(self, client):
         """Testa criação de pedido sem autenticação"""
@@ -288,6 +373,98 @@ class TestOrderController:
         
         assert response.status_code == 400
     
+    def test_atualizar_status_pedidos_em_lote(self, authenticated_client):
+        """Testa atualização de status de vários pedidos em uma requisição"""
+        from models.database_manager import db
+        ids = [db.criar_pedido([{'nome': 'Item Lote', 'preco': 5.00}], 5.00)['id'] for _ in range(2)]
+        
+        response = authenticated_client.put('/api/pedidos/status', json={'ids': ids + [999999], 'status': 'Pronto'})
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [p['status'] for p in data['pedidos']] == ['Pronto', 'Pronto']
+        assert data['nao_encontrados'] == [999999]
+        
+        response = authenticated_client.put('/api/pedidos/status',
+                                           json={'transicoes': [{'id': ids[0], 'status': 'Entregue'},
+                                                                {'id': ids[1], 'status': 'Preparando'}]})
+        assert response.status_code == 200
+        assert [p['status'] for p in json.loads(response.data)['pedidos']] == ['Entregue', 'Preparando']
+    
+    def test_atualizar_status_pedidos_invalido(self, authenticated_client):
+        """Testa lote com status inválido"""
+        response = authenticated_client.put('/api/pedidos/status', json={'ids': [1], 'status': 'Voando'})
+        assert response.status_code == 400
+        response = authenticated_client.put('/api/pedidos/status', json={'ids': []})
+        assert response.status_code == 400
+    
+    def test_atualizar_status_pedidos_sem_autenticacao(self, client):
+        """Testa atualização em lote sem autenticação"""
+        response = client.put('/api/pedidos/status', json={'ids': [1], 'status': 'Pronto'})
+        assert response.status_code == 401
+    
+    def test_exportar_historico_csv(self, authenticated_client):
+        """Testa a exportação do histórico em CSV"""
+        response = authenticated_client.get('/api/pedidos/historico/export?formato=csv&inicio=2026-01-01')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        assert 'historico.csv' in response.headers['Content-Disposition']
+        assert response.data.decode('utf-8').startswith('historico_id,pedido_id')
+    
+    def test_exportar_historico_ndjson_gzip(self, authenticated_client):
+        """Testa a exportação em NDJSON comprimida"""
+        response = authenticated_client.get('/api/pedidos/historico/export?formato=ndjson&gzip=true')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/gzip'
+        gzip.decompress(response.data)
+    
+    def test_exportar_historico_invalido(self, authenticated_client):
+        """Testa formato e data inválidos na exportação"""
+        assert authenticated_client.get('/api/pedidos/historico/export?formato=xml').status_code == 400
+        assert authenticated_client.get('/api/pedidos/historico/export?fim=ontem').status_code == 400
+    
+    def test_exportar_historico_como_gerente(self, authenticated_gerente):
+        """Testa exportação do histórico como gerente (deve falhar)"""
+        response = authenticated_gerente.get('/api/pedidos/historico/export')
+        assert response.status_code == 403
+    
+    def test_serie_relatorio(self, authenticated_client):
+        """Testa a série de receita por período"""
+        response = authenticated_client.get('/api/relatorios/serie?granularidade=semana&inicio=2026-01-01&fim=2026-03-31')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['granularidade'] == 'semana'
+        assert len(data['picos']) == 24
+        
+        response = authenticated_client.get('/api/relatorios/serie?granularidade=ano')
+        assert response.status_code == 400
+    
+    def test_serie_relatorio_como_gerente(self, authenticated_gerente):
+        """Testa série de receita como gerente (deve falhar)"""
+        response = authenticated_gerente.get('/api/relatorios/serie')
+        assert response.status_code == 403
+    
+    def test_top_produtos(self, authenticated_client):
+        """Testa o ranking de produtos vendidos"""
+        response = authenticated_client.get('/api/vendas/produtos/top?limite=5&inicio=2026-01-01')
+        assert response.status_code == 200
+        assert isinstance(json.loads(response.data), list)
+        
+        response = authenticated_client.get('/api/vendas/produtos/top?fim=ontem')
+        assert response.status_code == 400
+    
+    def test_top_produtos_como_gerente(self, authenticated_gerente):
+        """Testa ranking de produtos como gerente (deve falhar)"""
+        response = authenticated_gerente.get('/api/vendas/produtos/top')
+        assert response.status_code == 403
+    
+    def test_vendas_produto(self, authenticated_client):
+        """Testa a série diária de vendas de um produto"""
+        response = authenticated_client.get('/api/vendas/produtos/1?inicio=2026-01-01&fim=2026-12-31')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['produto_id'] == 1
+        assert 'dias' in data
+    
     def test_listar_pedidos_autenticado(self, authenticated_client):
         """Testa listagem de pedidos"""
         response = authenticated_client.get('/api/pedidos')
@@ -295,6 +472,25 @@ class TestOrderController:
         data = json.loads(response.data)
         assert isinstance(data, list)
     
+    def test_listar_pedidos_incremental(self, authenticated_client):
+        """Testa sincronização incremental de pedidos com ?since="""
+        response = authenticated_client.get('/api/pedidos?since=0')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['completo'] is True
+        
+        from models.database_manager import db
+        pedido = db.criar_pedido([{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}], 10.00)
+        
+        response = authenticated_client.get(f"/api/pedidos?since={data['versao']}")
+        delta = json.loads(response.data)
+        assert [p['id'] for p in delta['pedidos']] == [pedido['id']]
+    
+    def test_listar_pedidos_versao_invalida(self, authenticated_client):
+        """Testa sincronização com versão inválida"""
+        response = authenticated_client.get('/api/pedidos?since=abc')
+        assert response.status_code == 400
+    
     def test_listar_pedidos_sem_autenticacao(self, client):
         """Testa listagem sem autenticação"""
         response = client.get('/api/pedidos')
@@ -314,6 +510,32 @@ class TestOrderController:
         data = json.loads(response.data)
         assert data['status'] == 'Preparando'
     
+    def test_stream_pedidos(self, authenticated_client):
+        """Testa stream SSE retomando a partir do Last-Event-ID"""
+        from models.event_broker import broker
+        from models.database_manager import db
+        ultimo = broker.publicar('ping_teste', {})
+        pedido = db.criar_pedido([{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}], 10.00)
+        authenticated_client.put(f'/api/pedidos/{pedido["id"]}/status', json={'status': 'Pronto'})
+        
+        response = authenticated_client.get('/api/pedidos/stream', headers={'Last-Event-ID': str(ultimo)},
+                                            buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        
+        stream = iter(response.response)
+        next(stream)
+        mensagem = next(stream)
+        mensagem = mensagem.decode() if isinstance(mensagem, bytes) else mensagem
+        assert 'event: status_alterado' in mensagem
+        assert '"Pronto"' in mensagem
+        response.close()
+    
+    def test_stream_pedidos_sem_autenticacao(self, client):
+        """Testa stream SSE sem autenticação"""
+        response = client.get('/api/pedidos/stream')
+        assert response.status_code == 401
+    
     def test_atualizar_status_pedido_status_invalido(self, authenticated_client):
         """Testa atualização com status inválido"""
         from models.database_manager import db
@@ -356,6 +578,28 @@ class TestOrderController:
         data = json.loads(response.data)
         assert isinstance(data, list)
     
+    def test_listar_historico_incremental(self, authenticated_client):
+        """Testa sincronização incremental do histórico com ?since="""
+        response = authenticated_client.get('/api/pedidos/historico?since=0')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert 'versao' in data
+        assert isinstance(data['historico'], list)
+    
+    def test_listar_historico_paginado(self, authenticated_client):
+        """Testa paginação do histórico via API"""
+        response = authenticated_client.get('/api/pedidos/historico?limite=5')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data['historico']) <= 5
+        assert 'next_cursor' in data
+    
+    def test_listar_historico_paginado_invalido(self, authenticated_client):
+        """Testa paginação com parâmetros inválidos"""
+        assert authenticated_client.get('/api/pedidos/historico?limite=abc').status_code == 400
+        assert authenticated_client.get('/api/pedidos/historico?cursor=xyz').status_code == 400
+        assert authenticated_client.get('/api/pedidos/historico?inicio=ontem').status_code == 400
+    
     def test_listar_historico_sem_autenticacao(self, client):
         """Testa listagem de histórico sem autenticação"""
         response = client.get('/api/pedidos/historico')
@@ -402,6 +646,16 @@ class TestOrderController:
 class TestBackupController:
     """Testes para backup_controller"""
     
+    @pytest.fixture(autouse=True)
+    def backups_temporarios(self, tmp_path, monkeypatch):
+        """Backups e retenção do agendador em um diretório temporário, longe de backups_json/ do projeto"""
+        from controllers import backup_controller
+        from models.backup_manager import BackupManager
+        monkeypatch.setattr(backup_controller, 'backup_manager',
+                            BackupManager(backup_dir=str(tmp_path / 'backups'), db_path=backup_controller.db.db_path))
+        monkeypatch.setattr(backup_controller, 'agendador', backup_controller._criar_agendador())
+        return backup_controller.backup_manager
+    
     def test_criar_backup_como_admin(self, authenticated_client):
         """Testa criação de backup como admin"""
         response = authenticated_client.post('/api/backup')
@@ -422,10 +676,50 @@ class TestBackupController:
     
     def test_backup_automatico_como_admin(self, authenticated_client):
         """Testa backup automático como admin"""
+        from controllers.backup_controller import agendador
         response = authenticated_client.post('/api/backup/automatico')
-        assert response.status_code == 200
+        assert response.status_code == 202
         data = json.loads(response.data)
         assert data['sucesso'] is True
+        assert agendador.aguardar(timeout=10)
+    
+    def test_status_backup(self, authenticated_client):
+        """Testa status do agendador após um backup disparado pela API"""
+        from controllers.backup_controller import agendador
+        authenticated_client.post('/api/backup/automatico')
+        agendador.aguardar(timeout=10)
+        
+        response = authenticated_client.get('/api/backup/status')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['ultima_execucao'] is not None
+        assert data['ultimo_bytes'] > 0 and data['ultima_duracao_s'] >= 0
+        assert data['executando'] is False
+    
+    def test_status_backup_como_gerente(self, authenticated_gerente):
+        """Testa que gerente não vê o status dos backups"""
+        response = authenticated_gerente.get('/api/backup/status')
+        assert response.status_code == 403
+    
+    def test_criar_backup_snapshot(self, authenticated_client):
+        """Testa criação de snapshot binário pela API"""
+        response = authenticated_client.post('/api/backup', json={'formato': 'sqlite'})
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['arquivo'].endswith('.db')
+    
+    def test_criar_backup_incremental(self, authenticated_client, backups_temporarios):
+        """Testa criação de backup incremental pela API"""
+        response = authenticated_client.post('/api/backup', json={'formato': 'incremental'})
+        assert response.status_code == 200
+        assert json.loads(response.data)['estatisticas']['tipo'] == 'base'
+        assert json.loads(response.data)['arquivo'].startswith(backups_temporarios.backup_dir)
+    
+    def test_criar_backup_formato_invalido(self, authenticated_client):
+        """Testa criação de backup com formato desconhecido"""
+        response = authenticated_client.post('/api/backup', json={'formato': 'xml'})
+        assert response.status_code == 400
     
     def test_restaurar_backup_sem_arquivo(self, authenticated_client):
         """Testa restauração sem arquivo"""
@@ -433,3 +727,23 @@ class TestBackupController:
                                              json={},
                                              content_type='application/json')
         assert response.status_code == 400
+
+
+class TestMetricsController:
+    """Testes para metrics_controller"""
+    
+    def test_obter_metricas_como_admin(self, authenticated_client):
+        """Testa métricas do cache do cardápio"""
+        authenticated_client.get('/api/produtos')
+        response = authenticated_client.get('/api/metricas')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert 'acertos' in data['cache_cardapio']
+        assert 'falhas' in data['cache_cardapio']
+        assert 'latencia_p95_ms' in data['hash_senhas']
+        assert 'produtos_indexados' in data['motor_precos']
+    
+    def test_obter_metricas_como_gerente(self, authenticated_gerente):
+        """Testa métricas como gerente (deve falhar)"""
+        response = authenticated_gerente.get('/api/metricas')
+        assert response.status_code == 403
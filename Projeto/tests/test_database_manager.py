@@ -4,6 +4,7 @@ import tempfile
 import shutil
 import json
 from models.database_manager import DatabaseManager
+from models.price_engine import ItensInvalidos
 
 @pytest.fixture
 def temp_db():
@@ -219,6 +220,20 @@ class TestDatabaseManager:
         sucesso = temp_db.deletar_pedido(9999)
         assert sucesso is False
     
+    def test_deletar_ultimo_ativo_nao_reutiliza_id_arquivado(self, temp_db):
+        """Testa que apagar o último pedido ativo não reinicia o contador quando há histórico"""
+        entregue = temp_db.criar_pedido([{'id': 1, 'quantidade': 1}])
+        temp_db.atualizar_status_pedido(entregue['id'], 'Entregue')
+        apagado = temp_db.criar_pedido([{'id': 1, 'quantidade': 1}])
+        assert temp_db.deletar_pedido(apagado['id']) is True
+        
+        novo = temp_db.criar_pedido([{'id': 2, 'quantidade': 1}])
+        assert novo['id'] > apagado['id']
+        temp_db.atualizar_status_pedido(novo['id'], 'Entregue')
+        ids = [p['id'] for p in temp_db.listar_pedidos(incluir_entregues=True)]
+        assert sorted(ids) == [entregue['id'], novo['id']]
+        assert temp_db.obter_estatisticas_gerais()['total_pedidos'] == 2
+    
     def test_obter_estatisticas_gerais(self, temp_db):
         """Testa obtenção de estatísticas gerais"""
         # Cria alguns pedidos e marca como entregue
@@ -327,3 +342,564 @@ class TestDatabaseManager:
         todos_produtos = temp_db.listar_produtos(apenas_ativos=False)
         
         assert len(todos_produtos) >= len(produtos_ativos)
+    
+    def test_listar_pedidos_alterados_completo(self, temp_db):
+        """Testa sincronização inicial (since=0) devolvendo todos os pedidos"""
+        itens = [{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}]
+        temp_db.criar_pedido(itens, 10.00)
+        temp_db.criar_pedido(itens, 10.00)
+        
+        delta = temp_db.listar_pedidos_alterados(0)
+        
+        assert delta['completo'] is True
+        assert len(delta['pedidos']) == 2
+        assert delta['versao'] > 0
+    
+    def test_listar_pedidos_alterados_incremental(self, temp_db):
+        """Testa se o delta traz apenas pedidos criados, alterados ou removidos"""
+        itens = [{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}]
+        pedido1 = temp_db.criar_pedido(itens, 10.00)
+        pedido2 = temp_db.criar_pedido(itens, 10.00)
+        pedido3 = temp_db.criar_pedido(itens, 10.00)
+        versao = temp_db.listar_pedidos_alterados(0)['versao']
+        
+        # Sem mudanças, delta vazio
+        delta = temp_db.listar_pedidos_alterados(versao)
+        assert delta['pedidos'] == []
+        assert delta['removidos'] == []
+        assert delta['versao'] == versao
+        
+        temp_db.atualizar_status_pedido(pedido1['id'], 'Preparando')
+        temp_db.atualizar_status_pedido(pedido2['id'], 'Entregue')
+        temp_db.deletar_pedido(pedido3['id'])
+        pedido4 = temp_db.criar_pedido(itens, 10.00)
+        
+        delta = temp_db.listar_pedidos_alterados(versao)
+        
+        assert delta['completo'] is False
+        assert delta['versao'] > versao
+        assert sorted(p['id'] for p in delta['pedidos']) == sorted([pedido1['id'], pedido4['id']])
+        assert sorted(delta['removidos']) == sorted([pedido2['id'], pedido3['id']])
+    
+    def test_listar_historico_alterado(self, temp_db):
+        """Testa delta do histórico após entrega e limpeza"""
+        itens = [{'nome': 'Item', 'preco': 10.00, 'quantidade': 1}]
+        versao = temp_db.listar_historico_alterado(0)['versao']
+        
+        pedido = temp_db.criar_pedido(itens, 10.00)
+        temp_db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        
+        delta = temp_db.listar_historico_alterado(versao)
+        assert len(delta['historico']) == 1
+        assert delta['historico'][0]['pedido_id'] == pedido['id']
+        
+        versao = delta['versao']
+        temp_db.limpar_historico()
+        delta = temp_db.listar_historico_alterado(versao)
+        assert delta['historico'] == []
+        assert len(delta['removidos']) == 1
+    
+    def test_criar_pedido_itens_normalizados(self, temp_db):
+        """Testa se os itens do pedido são gravados em pedido_itens"""
+        produto_id = temp_db.criar_produto('Pizza', 'Desc', 30.00)
+        itens = [{'id': produto_id, 'nome': 'Pizza', 'preco': 30.00, 'quantidade': 2},
+                 {'nome': 'Suco', 'preco': 5.00}]
+        pedido = temp_db.criar_pedido(itens, 65.00)
+        
+        conn = temp_db.get_connection()
+        linhas = conn.execute("SELECT produto_id, nome, quantidade FROM pedido_itens WHERE pedido_id = ? ORDER BY id",
+                              (pedido['id'],)).fetchall()
+        itens_json = conn.execute("SELECT itens_json FROM pedidos WHERE id = ?", (pedido['id'],)).fetchone()[0]
+        conn.close()
+        
+        assert [tuple(l) for l in linhas] == [(produto_id, 'Pizza', 2), (None, 'Suco', 1)]
+        assert itens_json == '[]'
+        assert temp_db.listar_pedidos()[0]['itens'] == pedido['itens']
+    
+    def test_itens_preservados_no_historico(self, temp_db):
+        """Testa se os itens continuam no histórico após apagar o pedido entregue"""
+        itens = [{'nome': 'Item', 'preco': 10.00, 'quantidade': 3}]
+        pedido = temp_db.criar_pedido(itens, 30.00)
+        temp_db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        temp_db.deletar_pedido(pedido['id'])
+        
+        historico = temp_db.listar_historico()
+        assert historico[0]['itens'][0]['quantidade'] == 3
+        
+        temp_db.limpar_historico()
+        conn = temp_db.get_connection()
+        restantes = conn.execute("SELECT COUNT(*) FROM pedido_itens").fetchone()[0]
+        conn.close()
+        assert restantes == 0
+    
+    def test_migrar_itens_json_legado(self, temp_db):
+        """Testa conversão de pedidos antigos com itens em itens_json"""
+        from models.migrations import migrar_itens_json
+        conn = temp_db.get_connection()
+        conn.execute("INSERT INTO historico_pedidos (pedido_id, itens_json, total, status, data_pedido, data_entrega) "
+                     "VALUES (7, ?, 25.00, 'Entregue', '2026-01-01 12:00:00', '2026-01-01 12:30:00')",
+                     (json.dumps([{'id': 1, 'nome': 'Pizza Margherita', 'preco': 25.00, 'quantidade': 1}]),))
+        migrar_itens_json(conn.cursor())
+        conn.commit()
+        conn.close()
+        
+        historico = temp_db.listar_historico()
+        assert historico[0]['itens'] == [{'id': 1, 'nome': 'Pizza Margherita', 'preco': 25.00, 'quantidade': 1}]
+        
+        conn = temp_db.get_connection()
+        vendas = conn.execute("SELECT total_vendido FROM vendas_por_produto WHERE id = 1").fetchone()
+        conn.close()
+        assert vendas['total_vendido'] == 1
+    
+    def _inserir_historico(self, temp_db, datas):
+        conn = temp_db.get_connection()
+        conn.executemany("INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega) "
+                         "VALUES (?, 10.00, 'Entregue', ?, ?)", [(i + 1, d, d) for i, d in enumerate(datas)])
+        conn.commit()
+        conn.close()
+    
+    def test_listar_historico_paginado(self, temp_db):
+        """Testa paginação por cursor percorrendo todo o histórico sem repetir registros"""
+        datas = [f'2026-01-{dia:02d} 12:00:00' for dia in range(1, 8)] + ['2026-01-07 12:00:00']
+        self._inserir_historico(temp_db, datas)
+        
+        vistos, cursor = [], None
+        while True:
+            pagina = temp_db.listar_historico_paginado(limite=3, cursor=cursor)
+            vistos.extend(h['id'] for h in pagina['historico'])
+            cursor = pagina['next_cursor']
+            if cursor is None:
+                break
+        
+        assert len(vistos) == len(datas)
+        assert len(set(vistos)) == len(datas)
+        assert vistos[:2] == [8, 7]
+    
+    def test_listar_historico_paginado_periodo(self, temp_db):
+        """Testa filtro por período com fim inclusivo para datas sem horário"""
+        self._inserir_historico(temp_db, ['2026-01-01 10:00:00', '2026-01-02 23:59:00', '2026-01-03 00:00:00'])
+        
+        pagina = temp_db.listar_historico_paginado(inicio='2026-01-02', fim='2026-01-02')
+        
+        assert [h['data_entrega'] for h in pagina['historico']] == ['2026-01-02 23:59:00']
+        assert pagina['next_cursor'] is None
+    
+    def test_listar_historico_paginado_cursor_invalido(self, temp_db):
+        """Testa cursor inválido"""
+        with pytest.raises(ValueError):
+            temp_db.listar_historico_paginado(cursor='nao-e-um-cursor')
+    
+    def test_criar_produto_retornando(self, temp_db):
+        """Testa criação de produto devolvendo a linha gravada"""
+        produto = temp_db.criar_produto('Pizza', 'Calabresa', 35.90, retornar_produto=True)
+        assert produto['nome'] == 'Pizza'
+        assert produto['ativo'] == 1
+        assert temp_db.obter_produto(produto['id']) == produto
+    
+    def test_atualizar_produto_retornando(self, temp_db):
+        """Testa atualização de produto devolvendo a linha atualizada"""
+        produto_id = temp_db.criar_produto('Produto', 'Desc', 10.00)
+        produto = temp_db.atualizar_produto(produto_id, 'Novo', 'Desc', 12.00, retornar_produto=True)
+        assert produto['nome'] == 'Novo'
+        assert temp_db.atualizar_produto(9999, 'X', 'Y', 1.00, retornar_produto=True) is None
+    
+    def test_obter_produtos(self, temp_db):
+        """Testa busca de vários produtos por id mantendo a ordem"""
+        id1 = temp_db.criar_produto('A', 'Desc', 1.00)
+        id2 = temp_db.criar_produto('B', 'Desc', 2.00)
+        
+        produtos = temp_db.obter_produtos([id2, 9999, id1])
+        assert [p['id'] for p in produtos] == [id2, id1]
+        assert temp_db.obter_produto(9999) is None
+    
+    def test_salvar_produtos_em_lote(self, temp_db):
+        """Testa criação e atualização de vários produtos em uma transação"""
+        existente = temp_db.criar_produto('Antigo', 'Desc', 5.00)
+        
+        salvos = temp_db.salvar_produtos_em_lote([
+            {'nome': 'Novo 1', 'descricao': 'Desc', 'preco': 10.00},
+            {'id': existente, 'nome': 'Atualizado', 'descricao': 'Desc', 'preco': 6.00},
+            {'nome': 'Novo 2', 'descricao': 'Desc', 'preco': 20.00},
+        ])
+        
+        assert [p['nome'] for p in salvos] == ['Novo 1', 'Atualizado', 'Novo 2']
+        assert salvos[1]['id'] == existente
+        assert temp_db.obter_produto(salvos[2]['id'])['preco'] == 20.00
+    
+    def test_salvar_produtos_em_lote_atomico(self, temp_db):
+        """Testa se um id inexistente desfaz todo o lote"""
+        antes = len(temp_db.listar_produtos(apenas_ativos=False))
+        
+        with pytest.raises(LookupError):
+            temp_db.salvar_produtos_em_lote([
+                {'nome': 'Novo', 'descricao': 'Desc', 'preco': 10.00},
+                {'id': 9999, 'nome': 'X', 'descricao': 'Desc', 'preco': 1.00},
+            ])
+        
+        assert len(temp_db.listar_produtos(apenas_ativos=False)) == antes
+    
+    def _lucros(self, temp_db):
+        conn = temp_db.get_connection()
+        linhas = [dict(r) for r in conn.execute(
+            "SELECT data, total_pedidos, receita_total, ticket_medio FROM lucros_diarios ORDER BY data")]
+        conn.close()
+        return linhas
+    
+    def test_lucros_diarios_incrementais(self, temp_db):
+        """Testa que cada entrega soma exatamente um pedido ao dia"""
+        self._inserir_historico(temp_db, ['2024-01-15 10:00:00', '2024-01-15 11:00:00',
+                                          '2024-01-15 12:00:00', '2024-01-16 09:00:00'])
+        
+        lucros = self._lucros(temp_db)
+        assert [(l['data'], l['total_pedidos'], l['receita_total']) for l in lucros] == [
+            ('2024-01-15', 3, 30.00), ('2024-01-16', 1, 10.00)]
+        assert lucros[0]['ticket_medio'] == 10.00
+    
+    def test_lucros_diarios_ajustados_na_remocao(self, temp_db):
+        """Testa que remover registros do histórico desconta o dia e apaga dias vazios"""
+        self._inserir_historico(temp_db, ['2024-01-15 10:00:00', '2024-01-15 11:00:00',
+                                          '2024-01-16 09:00:00'])
+        conn = temp_db.get_connection()
+        conn.execute("DELETE FROM historico_pedidos WHERE data_entrega IN ('2024-01-15 10:00:00', '2024-01-16 09:00:00')")
+        conn.commit()
+        conn.close()
+        
+        lucros = self._lucros(temp_db)
+        assert [(l['data'], l['total_pedidos'], l['receita_total']) for l in lucros] == [('2024-01-15', 1, 10.00)]
+    
+    def test_limpar_historico_zera_lucros(self, temp_db):
+        """Testa que limpar o histórico remove os lucros diários"""
+        self._inserir_historico(temp_db, ['2024-01-15 10:00:00', '2024-01-16 09:00:00'])
+        temp_db.limpar_historico()
+        
+        assert self._lucros(temp_db) == []
+    
+    def test_reconstruir_lucros_diarios(self, temp_db):
+        """Testa que a reconstrução corrige lucros_diarios inconsistentes"""
+        self._inserir_historico(temp_db, ['2024-01-15 10:00:00', '2024-01-15 11:00:00',
+                                          '2024-01-16 09:00:00'])
+        conn = temp_db.get_connection()
+        conn.execute("UPDATE lucros_diarios SET total_pedidos = 99, receita_total = 1")
+        conn.commit()
+        conn.close()
+        
+        dias = temp_db.reconstruir_lucros_diarios()
+        
+        assert dias == 2
+        lucros = self._lucros(temp_db)
+        assert [(l['data'], l['total_pedidos'], l['receita_total']) for l in lucros] == [
+            ('2024-01-15', 2, 20.00), ('2024-01-16', 1, 10.00)]
+    
+    def test_criar_pedido_precos_do_servidor(self, temp_db):
+        """Testa se, sem total, o pedido usa os preços atuais dos produtos"""
+        produto_id = temp_db.criar_produto('Pizza Motor', 'Desc', 30.00)
+        pedido = temp_db.criar_pedido([{'id': produto_id, 'preco': 1.00, 'quantidade': 2}])
+        
+        assert pedido['total'] == 60.00
+        assert pedido['itens'] == [{'id': produto_id, 'nome': 'Pizza Motor', 'preco': 30.00, 'quantidade': 2}]
+        
+        # Escrita em produtos atualiza o índice de preços
+        temp_db.atualizar_produto(produto_id, 'Pizza Motor', 'Desc', 35.00)
+        assert temp_db.criar_pedido([{'id': produto_id}])['total'] == 35.00
+        
+        temp_db.remover_produto(produto_id)
+        with pytest.raises(ItensInvalidos):
+            temp_db.criar_pedido([{'id': produto_id}])
+    
+    def test_atualizar_status_pedidos_em_lote(self, temp_db):
+        """Testa várias transições em uma transação, com cópia para o histórico e lucros do dia"""
+        pedidos = [temp_db.criar_pedido([{'nome': 'Item', 'preco': 10.00}], 10.00 + i) for i in range(3)]
+        ids = [p['id'] for p in pedidos]
+        
+        atualizados = temp_db.atualizar_status_pedidos([(ids[0], 'Entregue'), (ids[1], 'Entregue'),
+                                                        (ids[2], 'Preparando'), (9999, 'Pronto')])
+        
+        assert [(p['id'], p['status']) for p in atualizados] == [
+            (ids[0], 'Entregue'), (ids[1], 'Entregue'), (ids[2], 'Preparando')]
+        assert atualizados[0]['itens'][0]['nome'] == 'Item'
+        historico = temp_db.listar_historico()
+        assert sorted(h['pedido_id'] for h in historico) == ids[:2]
+        assert [(l['total_pedidos'], l['receita_total']) for l in self._lucros(temp_db)] == [(2, 21.00)]
+        
+        # Repetir a entrega não duplica o histórico
+        temp_db.atualizar_status_pedidos([(ids[0], 'Entregue')])
+        assert len(temp_db.listar_historico()) == 2
+    
+    def test_atualizar_status_pedidos_lote_grande(self, temp_db):
+        """Testa que o upsert agrupado de lucros dá o mesmo resultado do trigger por linha"""
+        from models.order_archive import LIMIAR_LUCROS_EM_LOTE
+        quantidade = LIMIAR_LUCROS_EM_LOTE + 5
+        ids = [temp_db.criar_pedido([{'nome': 'Item', 'preco': 2.00}], 2.00)['id'] for _ in range(quantidade)]
+        temp_db.atualizar_status_pedido(ids[0], 'Entregue')
+        conn = temp_db.get_connection()
+        versao_schema = conn.execute("PRAGMA schema_version").fetchone()[0]
+        conn.close()
+        
+        temp_db.atualizar_status_pedidos([(pedido_id, 'Entregue') for pedido_id in ids[1:]])
+        
+        assert [(l['total_pedidos'], l['receita_total']) for l in self._lucros(temp_db)] == [(quantidade, quantidade * 2.00)]
+        conn = temp_db.get_connection()
+        # Sem DDL no caminho da requisição: o cache de instruções das conexões do pool continua válido
+        assert conn.execute("PRAGMA schema_version").fetchone()[0] == versao_schema
+        assert conn.execute("SELECT COUNT(*) FROM lucros_em_lote").fetchone()[0] == 0
+        sem_historico = conn.execute("SELECT COUNT(*) FROM pedido_itens WHERE historico_id IS NULL").fetchone()[0]
+        conn.close()
+        assert sem_historico == 0
+        
+        # Entregas avulsas seguintes voltam a ser contadas pelo trigger
+        avulso = temp_db.criar_pedido([{'nome': 'Item', 'preco': 2.00}], 2.00)
+        temp_db.atualizar_status_pedido(avulso['id'], 'Entregue')
+        assert self._lucros(temp_db)[0]['total_pedidos'] == quantidade + 1
+    
+    def test_migracao_lucros_em_lote(self, temp_db):
+        """Testa a migração de bancos cujo trigger de lucros ainda não conhece o marcador de lote"""
+        from models.migrations import criar_lucros_em_lote
+        conn = temp_db.get_connection()
+        cursor = conn.cursor()
+        sql = cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'atualizar_lucros_diarios'").fetchone()[0]
+        cursor.execute("DROP TRIGGER atualizar_lucros_diarios")
+        cursor.execute(sql.replace("WHEN NOT EXISTS (SELECT 1 FROM lucros_em_lote)", ""))
+        cursor.execute("DROP TABLE lucros_em_lote")
+        
+        criar_lucros_em_lote(cursor)
+        criar_lucros_em_lote(cursor)
+        conn.commit()
+        novo = cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'atualizar_lucros_diarios'").fetchone()[0]
+        conn.close()
+        assert novo.count('lucros_em_lote') == 1
+        
+        from models.order_archive import LIMIAR_LUCROS_EM_LOTE
+        ids = [temp_db.criar_pedido([{'nome': 'Item', 'preco': 2.00}], 2.00)['id'] for _ in range(LIMIAR_LUCROS_EM_LOTE)]
+        temp_db.atualizar_status_pedidos([(pedido_id, 'Entregue') for pedido_id in ids])
+        assert self._lucros(temp_db)[0]['total_pedidos'] == LIMIAR_LUCROS_EM_LOTE
+    
+    def test_entrega_arquiva_pedido(self, temp_db):
+        """Testa se o pedido entregue sai de pedidos e continua visível via histórico"""
+        pedido = temp_db.criar_pedido([{'nome': 'Item', 'preco': 10.00, 'quantidade': 3}], 30.00)
+        entregue = temp_db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        
+        assert entregue['itens'][0]['quantidade'] == 3
+        conn = temp_db.get_connection()
+        restantes = conn.execute("SELECT COUNT(*) FROM pedidos").fetchone()[0]
+        conn.close()
+        assert restantes == 0
+        assert temp_db.listar_pedidos() == []
+        
+        todos = temp_db.listar_pedidos(incluir_entregues=True)
+        assert [(p['id'], p['status'], p['itens'][0]['quantidade']) for p in todos] == [(pedido['id'], 'Entregue', 3)]
+        assert temp_db.listar_historico()[0]['itens'][0]['nome'] == 'Item'
+        assert temp_db.atualizar_status_pedido(pedido['id'], 'Entregue') is None
+    
+    def _inserir_entregues_legados(self, temp_db):
+        """Simula um banco anterior ao arquivamento: entregues ainda em pedidos, um deles já copiado"""
+        conn = temp_db.get_connection()
+        conn.execute("""INSERT INTO pedidos (id, total, status, data_pedido, data_entrega) VALUES
+            (1, 10.00, 'Entregue', '2026-01-01 12:00:00', '2026-01-01 12:30:00'),
+            (2, 20.00, 'Entregue', '2026-01-01 13:00:00', '2026-01-01 13:30:00'),
+            (3, 5.00, 'Pendente', '2026-01-01 14:00:00', NULL)""")
+        conn.execute("""INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+            VALUES (1, 10.00, 'Entregue', '2026-01-01 12:00:00', '2026-01-01 12:30:00')""")
+        conn.execute("INSERT INTO pedido_itens (pedido_id, nome, quantidade) VALUES (2, 'Suco', 2), (3, 'Pizza', 1)")
+        conn.commit()
+        conn.close()
+    
+    def _contar(self, temp_db):
+        conn = temp_db.get_connection()
+        pedidos = [row[0] for row in conn.execute("SELECT id FROM pedidos ORDER BY id")]
+        historico = [row[0] for row in conn.execute("SELECT pedido_id FROM historico_pedidos ORDER BY pedido_id")]
+        conn.close()
+        return pedidos, historico
+    
+    def test_migracao_arquiva_entregues(self, temp_db):
+        """Testa a migração que move entregues antigos para o histórico sem duplicar cópias existentes"""
+        from models.migrations import aplicar_migracoes, MIGRACOES
+        self._inserir_entregues_legados(temp_db)
+        conn = temp_db.get_connection()
+        conn.execute("PRAGMA user_version = 1")
+        assert aplicar_migracoes(conn) == len(MIGRACOES) - 1
+        conn.close()
+        
+        assert self._contar(temp_db) == ([3], [1, 2])
+        historico = {h['pedido_id']: h for h in temp_db.listar_historico()}
+        assert historico[2]['itens'][0]['nome'] == 'Suco'
+        assert [(l['total_pedidos'], l['receita_total']) for l in self._lucros(temp_db)] == [(2, 30.00)]
+    
+    def test_arquivar_pedidos_entregues_em_lotes(self, temp_db):
+        """Testa o arquivamento em lotes dos entregues que restaram em pedidos"""
+        self._inserir_entregues_legados(temp_db)
+        
+        assert temp_db.arquivar_pedidos_entregues(tamanho_lote=1) == 2
+        assert self._contar(temp_db) == ([3], [1, 2])
+        assert temp_db.arquivar_pedidos_entregues() == 0
+    
+    def test_quadro_usa_indice_parcial(self, temp_db):
+        """Testa se a consulta do quadro usa o índice parcial de pedidos ativos"""
+        from models.order_archive import FILTRO_ATIVOS
+        conn = temp_db.get_connection()
+        plano = ' '.join(row[3] for row in conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT id FROM pedidos WHERE {FILTRO_ATIVOS} ORDER BY data_pedido DESC"))
+        conn.close()
+        assert 'idx_pedidos_ativos' in plano
+    
+    def _gravar_estatisticas(self, temp_db, sql, parametros=()):
+        conn = temp_db.get_connection()
+        conn.execute(sql, parametros)
+        conn.commit()
+        conn.close()
+    
+    def test_estatisticas_incrementais(self, temp_db):
+        """Testa se entregas e limpeza do histórico atualizam estatisticas_live"""
+        for total in (10.00, 30.00):
+            pedido = temp_db.criar_pedido([{'nome': 'Item', 'preco': total}], total)
+            temp_db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        # Entrega de outro dia (ex.: importação) conta no total, mas não em hoje
+        self._gravar_estatisticas(temp_db, """INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+            VALUES (99, 5.00, 'Entregue', '2020-01-01 10:00:00', '2020-01-01 10:30:00')""")
+        
+        stats = temp_db.obter_estatisticas_gerais()
+        assert (stats['total_pedidos'], stats['receita_total'], stats['ticket_medio']) == (3, 45.00, 15.00)
+        assert (stats['pedidos_hoje'], stats['receita_hoje']) == (2, 40.00)
+        assert temp_db.verificar_estatisticas()['consistente'] is True
+        
+        temp_db.limpar_historico()
+        stats = temp_db.obter_estatisticas_gerais()
+        assert (stats['total_pedidos'], stats['receita_total'], stats['pedidos_hoje']) == (0, 0, 0)
+    
+    def test_estatisticas_virada_do_dia(self, temp_db):
+        """Testa se os números de hoje zeram após a meia-noite e recomeçam na primeira entrega"""
+        self._gravar_estatisticas(temp_db, """UPDATE estatisticas_live SET total_pedidos = 5, receita_total = 50,
+            dia = date('now', 'localtime', '-1 day'), pedidos_hoje = 5, receita_hoje = 50""")
+        stats = temp_db.obter_estatisticas_gerais()
+        assert (stats['total_pedidos'], stats['pedidos_hoje'], stats['receita_hoje']) == (5, 0, 0)
+        
+        pedido = temp_db.criar_pedido([{'nome': 'Item', 'preco': 8.00}], 8.00)
+        temp_db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        stats = temp_db.obter_estatisticas_gerais()
+        assert (stats['total_pedidos'], stats['pedidos_hoje'], stats['receita_hoje']) == (6, 1, 8.00)
+    
+    def test_verificar_estatisticas_corrige(self, temp_db):
+        """Testa se a verificação detecta divergência e reconstrói a partir do histórico"""
+        pedido = temp_db.criar_pedido([{'nome': 'Item', 'preco': 12.00}], 12.00)
+        temp_db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        self._gravar_estatisticas(temp_db, "UPDATE estatisticas_live SET total_pedidos = 40, receita_total = 1")
+        
+        resultado = temp_db.verificar_estatisticas()
+        assert resultado['consistente'] is False
+        assert resultado['corrigido'] is False
+        assert temp_db.obter_estatisticas_gerais()['total_pedidos'] == 40
+        
+        assert temp_db.verificar_estatisticas(corrigir=True)['corrigido'] is True
+        stats = temp_db.obter_estatisticas_gerais()
+        assert (stats['total_pedidos'], stats['receita_total'], stats['pedidos_hoje']) == (1, 12.00, 1)
+        assert temp_db.verificar_estatisticas()['consistente'] is True
+    
+    def _vendas(self, temp_db):
+        conn = temp_db.get_connection()
+        linhas = [tuple(r) for r in conn.execute(
+            "SELECT produto_id, quantidade, receita FROM vendas_produto_diarias ORDER BY produto_id, data")]
+        conn.close()
+        return linhas
+    
+    def _entregar(self, temp_db, itens):
+        pedido = temp_db.criar_pedido(itens)
+        temp_db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        return pedido
+    
+    def test_exportar_historico(self, temp_db):
+        """Testa a exportação em lotes, com itens, em ordem de entrega e filtrada por período"""
+        conn = temp_db.get_connection()
+        conn.executemany("""INSERT INTO historico_pedidos (id, pedido_id, total, status, data_pedido, data_entrega)
+            VALUES (?, ?, ?, 'Entregue', ?, ?)""", [(1, 1, 20.0, '2026-01-02 12:00:00', '2026-01-02 12:00:00'),
+                                                     (2, 2, 10.0, '2026-01-01 12:00:00', '2026-01-01 12:00:00')])
+        conn.executemany("""INSERT INTO pedido_itens (historico_id, produto_id, nome, preco, quantidade)
+            VALUES (?, ?, 'Item', 10.0, ?)""", [(1, 1, 1), (1, 2, 1), (2, 1, 1)])
+        conn.commit()
+        conn.close()
+        
+        lotes = list(temp_db.exportar_historico(tamanho_lote=2))
+        assert [len(lote) for lote in lotes] == [2, 1]
+        assert [(linha[0], linha[6]) for lote in lotes for linha in lote] == [(2, 1), (1, 1), (1, 2)]
+        
+        filtrado = [linha for lote in temp_db.exportar_historico(inicio='2026-01-02', fim='2026-01-02') for linha in lote]
+        assert {linha[0] for linha in filtrado} == {1}
+        
+        with pytest.raises(ValueError):
+            temp_db.exportar_historico(inicio='ontem')
+    
+    def test_relatorio_vendas_com_banco(self, temp_db):
+        """Testa a série lida do histórico real, incluindo a entrega de hoje"""
+        conn = temp_db.get_connection()
+        conn.execute("""INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+            VALUES (1, 12.34, 'Entregue', datetime('now', 'localtime', '-3 days'), datetime('now', 'localtime', '-3 days'))""")
+        conn.commit()
+        conn.close()
+        produto = temp_db.criar_produto('Pizza Série', 'Desc', 20.00)
+        pedido = temp_db.criar_pedido([{'id': produto, 'quantidade': 1}])
+        temp_db.atualizar_status_pedido(pedido['id'], 'Entregue')
+        
+        serie = temp_db.relatorio_vendas.serie('dia')
+        assert len(serie['serie']) == 30
+        assert serie['serie'][-1]['pedidos'] == 1
+        assert serie['serie'][-4]['receita'] == 12.34
+        assert serie['totais']['receita'] == 32.34
+        
+        temp_db.limpar_historico()
+        assert temp_db.relatorio_vendas.serie('dia')['totais']['pedidos'] == 0
+    
+    def test_vendas_produto_incrementais(self, temp_db):
+        """Testa se a entrega soma unidades e receita (preço × quantidade) por produto e dia"""
+        pizza = temp_db.criar_produto('Pizza Rollup', 'Desc', 30.00)
+        suco = temp_db.criar_produto('Suco Rollup', 'Desc', 5.00)
+        self._entregar(temp_db, [{'id': pizza, 'quantidade': 2}, {'id': suco, 'quantidade': 3}])
+        self._entregar(temp_db, [{'id': pizza, 'quantidade': 1}])
+        temp_db.criar_pedido([{'id': pizza, 'quantidade': 9}])
+        
+        assert self._vendas(temp_db) == [(pizza, 3, 90.00), (suco, 3, 15.00)]
+        conn = temp_db.get_connection()
+        view = conn.execute("SELECT total_vendido, receita_gerada FROM vendas_por_produto WHERE id = ?", (pizza,)).fetchone()
+        conn.close()
+        assert tuple(view) == (3, 90.00)
+    
+    def test_vendas_produto_remocao_e_reconstrucao(self, temp_db):
+        """Testa o desconto ao remover do histórico e a reconstrução em uma passada"""
+        pizza = temp_db.criar_produto('Pizza Rollup', 'Desc', 30.00)
+        self._entregar(temp_db, [{'id': pizza, 'quantidade': 2}])
+        self._entregar(temp_db, [{'id': pizza, 'quantidade': 1}])
+        
+        conn = temp_db.get_connection()
+        conn.execute("DELETE FROM historico_pedidos WHERE id = (SELECT MIN(id) FROM historico_pedidos)")
+        conn.commit()
+        conn.close()
+        assert self._vendas(temp_db) == [(pizza, 1, 30.00)]
+        
+        incremental = self._vendas(temp_db)
+        assert temp_db.reconstruir_vendas_produto() == 1
+        assert self._vendas(temp_db) == incremental
+        
+        temp_db.limpar_historico()
+        assert self._vendas(temp_db) == []
+    
+    def test_top_produtos_e_vendas_por_periodo(self, temp_db):
+        """Testa o ranking e a série diária por produto a partir do rollup"""
+        conn = temp_db.get_connection()
+        conn.executemany("""INSERT INTO historico_pedidos (id, pedido_id, total, status, data_pedido, data_entrega)
+            VALUES (?, ?, 0, 'Entregue', ?, ?)""", [(1, 1, '2026-01-01 12:00:00', '2026-01-01 12:00:00'),
+                                                     (2, 2, '2026-01-02 12:00:00', '2026-01-02 12:00:00')])
+        conn.executemany("""INSERT INTO pedido_itens (historico_id, produto_id, nome, preco, quantidade)
+            VALUES (?, ?, 'Item', ?, ?)""", [(1, 1, 10.00, 5), (1, 2, 40.00, 1), (2, 1, 10.00, 1), (2, 3, 2.00, 10)])
+        conn.commit()
+        conn.close()
+        
+        assert [p['produto_id'] for p in temp_db.top_produtos()] == [1, 2, 3]
+        assert [p['produto_id'] for p in temp_db.top_produtos(ordem='quantidade')] == [3, 1, 2]
+        assert [(p['produto_id'], p['receita']) for p in temp_db.top_produtos(limite=1, inicio='2026-01-02')] == [(3, 20.00)]
+        
+        vendas = temp_db.vendas_produto(1, inicio='2026-01-01', fim='2026-01-01')
+        assert (vendas['quantidade'], vendas['receita']) == (5, 50.00)
+        assert [d['data'] for d in temp_db.vendas_produto(1)['dias']] == ['2026-01-01', '2026-01-02']
+        
+        with pytest.raises(ValueError):
+            temp_db.top_produtos(inicio='01/01/2026')
+        with pytest.raises(ValueError):
+            temp_db.top_produtos(ordem='nome')
+
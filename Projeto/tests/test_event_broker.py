@@ -0,0 +1,79 @@
+import pytest
+import json
+from models.event_broker import EventBroker
+
+@pytest.fixture
+def broker():
+    """Cria um broker isolado para cada teste"""
+    return EventBroker(tamanho_historico=3, tamanho_fila=2, intervalo_heartbeat=0.01)
+
+
+class TestEventBroker:
+    """Testes para EventBroker"""
+    
+    def test_publicar_para_assinantes(self, broker):
+        """Testa se todos os assinantes recebem o evento"""
+        fila1, _, _ = broker.assinar()
+        fila2, _, _ = broker.assinar()
+        
+        evento_id = broker.publicar('criado', {'id': 1})
+        
+        for fila in (fila1, fila2):
+            recebido = fila.get_nowait()
+            assert recebido[0] == evento_id
+            assert recebido[1] == 'criado'
+            assert json.loads(recebido[2]) == {'id': 1}
+    
+    def test_cancelar_assinatura(self, broker):
+        """Testa remoção de assinante"""
+        fila, _, _ = broker.assinar()
+        assert broker.total_assinantes == 1
+        broker.cancelar(fila)
+        assert broker.total_assinantes == 0
+    
+    def test_retomar_com_ultimo_id(self, broker):
+        """Testa reenvio dos eventos posteriores ao Last-Event-ID"""
+        broker.publicar('criado', {'id': 1})
+        ultimo = broker.publicar('criado', {'id': 2})
+        broker.publicar('deletado', {'id': 1})
+        
+        _, pendentes, ressincronizar = broker.assinar(ultimo_id=ultimo)
+        
+        assert ressincronizar is False
+        assert [e[1] for e in pendentes] == ['deletado']
+    
+    def test_retomar_eventos_descartados(self, broker):
+        """Testa pedido de ressincronização quando o buffer já descartou eventos"""
+        for i in range(5):
+            broker.publicar('criado', {'id': i})
+        
+        _, pendentes, ressincronizar = broker.assinar(ultimo_id=1)
+        assert ressincronizar is True
+        assert pendentes == []
+    
+    def test_retomar_apos_reinicio(self, broker):
+        """Testa Last-Event-ID maior que o último evento (servidor reiniciado)"""
+        _, _, ressincronizar = broker.assinar(ultimo_id=50)
+        assert ressincronizar is True
+    
+    def test_cliente_lento(self, broker):
+        """Testa se fila cheia é substituída por aviso de ressincronização"""
+        fila, _, _ = broker.assinar()
+        for i in range(3):
+            broker.publicar('criado', {'id': i})
+        assert fila.get_nowait() is None
+    
+    def test_transmitir_formato_sse(self, broker):
+        """Testa formato das mensagens, heartbeat e encerramento da assinatura"""
+        ultimo = broker.publicar('criado', {'id': 1})
+        broker.publicar('status_alterado', {'id': 1, 'status': 'Pronto'})
+        
+        stream = broker.transmitir(ultimo_id=ultimo)
+        assert next(stream).startswith('retry:')
+        mensagem = next(stream)
+        assert mensagem.startswith(f'id: {ultimo + 1}\nevent: status_alterado\ndata: ')
+        assert next(stream) == ': ping\n\n'
+        assert broker.total_assinantes == 1
+        
+        stream.close()
+        assert broker.total_assinantes == 0
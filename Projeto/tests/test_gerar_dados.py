@@ -0,0 +1,101 @@
+import pytest
+import os
+import sqlite3
+import tempfile
+import shutil
+from datetime import date
+from gerar_dados import gerar, ler_mix
+from models.aggregates import reconstruir_vendas_produto, reconstruir_lucros_diarios, calcular_estatisticas
+
+ATE = date(2026, 1, 31)
+
+@pytest.fixture
+def temp_dir():
+    caminho = tempfile.mkdtemp()
+    yield caminho
+    shutil.rmtree(caminho)
+
+def _despejar(db_path, tabela):
+    conn = sqlite3.connect(db_path)
+    linhas = conn.execute(f"SELECT * FROM {tabela} ORDER BY 1, 2").fetchall()
+    conn.close()
+    return linhas
+
+class TestGerarDados:
+    """Testes para o gerador de dados sintéticos"""
+    
+    def test_forma_do_banco(self, temp_dir):
+        """Testa as contagens pedidas, os dias abertos e o status dos pedidos em andamento"""
+        db_path = os.path.join(temp_dir, 'gerado.db')
+        contagens = gerar(db_path, produtos=50, dias=10, pedidos_por_dia=300, itens=(2, 3),
+                          mix={'Entregue': 0.5, 'Pendente': 0.5}, dias_abertos=2, ate=ATE)
+        
+        assert contagens['historico'] + contagens['ativos'] == 3000
+        assert 2 * 3000 <= contagens['itens'] <= 3 * 3000
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM produtos").fetchone()[0] == 50
+        assert conn.execute("SELECT DISTINCT status FROM pedidos").fetchall() == [('Pendente',)]
+        assert conn.execute("SELECT MIN(data_pedido) FROM pedidos").fetchone()[0] >= '2026-01-30'
+        assert conn.execute("SELECT MIN(data_pedido) >= '2026-01-22', MAX(data_pedido) < '2026-02-01' FROM historico_pedidos").fetchone() == (1, 1)
+        assert conn.execute("SELECT COUNT(*) FROM pedido_itens WHERE historico_id IS NULL AND pedido_id IS NULL").fetchone()[0] == 0
+        assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'pedidos'").fetchone()[0] == 3000
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        conn.close()
+    
+    def test_agregados_consistentes(self, temp_dir):
+        """Testa se os agregados gravados batem com a reconstrução a partir do histórico"""
+        db_path = os.path.join(temp_dir, 'gerado.db')
+        gerar(db_path, produtos=30, dias=5, pedidos_por_dia=200, ate=ATE)
+        vendas = _despejar(db_path, 'vendas_produto_diarias')
+        lucros = [linha[1:5] for linha in _despejar(db_path, 'lucros_diarios')]
+        
+        conn = sqlite3.connect(db_path)
+        estatisticas = conn.execute("SELECT total_pedidos, receita_total FROM estatisticas_live").fetchone()
+        calculadas = calcular_estatisticas(conn.cursor())
+        reconstruir_vendas_produto(conn.cursor())
+        reconstruir_lucros_diarios(conn.cursor())
+        conn.commit()
+        conn.close()
+        
+        assert [(p, d, q, round(r, 2)) for p, d, q, r in vendas] == \
+               [(p, d, q, round(r, 2)) for p, d, q, r in _despejar(db_path, 'vendas_produto_diarias')]
+        assert lucros == [linha[1:5] for linha in _despejar(db_path, 'lucros_diarios')]
+        assert estatisticas == (calculadas['total_pedidos'], calculadas['receita_total'])
+    
+    def test_deterministico(self, temp_dir):
+        """Testa se a mesma semente gera o mesmo banco e outra semente não"""
+        caminhos = [os.path.join(temp_dir, f'{nome}.db') for nome in ('a', 'b', 'c')]
+        for caminho, semente in zip(caminhos, (7, 7, 8)):
+            gerar(caminho, produtos=20, dias=3, pedidos_por_dia=100, semente=semente, ate=ATE)
+        
+        for tabela in ('produtos', 'historico_pedidos', 'pedido_itens'):
+            assert _despejar(caminhos[0], tabela) == _despejar(caminhos[1], tabela)
+        assert _despejar(caminhos[0], 'historico_pedidos') != _despejar(caminhos[2], 'historico_pedidos')
+    
+    def test_nao_sobrescreve_sem_substituir(self, temp_dir):
+        """Testa que um banco existente só é apagado com substituir=True"""
+        db_path = os.path.join(temp_dir, 'gerado.db')
+        gerar(db_path, produtos=5, dias=1, pedidos_por_dia=10, ate=ATE)
+        with pytest.raises(FileExistsError):
+            gerar(db_path, produtos=5, dias=1, pedidos_por_dia=10, ate=ATE)
+        assert gerar(db_path, produtos=5, dias=1, pedidos_por_dia=20, ate=ATE, substituir=True)['historico'] <= 20
+    
+    def test_falha_apaga_banco_parcial(self, temp_dir, monkeypatch):
+        """Testa que uma falha no meio da carga não deixa um banco incompleto para trás"""
+        import gerar_dados
+        def falhar(cursor):
+            raise sqlite3.OperationalError("disk I/O error")
+        monkeypatch.setattr(gerar_dados, 'reconstruir_estatisticas', falhar)
+        db_path = os.path.join(temp_dir, 'gerado.db')
+        with pytest.raises(sqlite3.OperationalError):
+            gerar(db_path, produtos=5, dias=2, pedidos_por_dia=10, ate=ATE)
+        assert not os.path.exists(db_path)
+        
+        monkeypatch.undo()
+        assert gerar(db_path, produtos=5, dias=2, pedidos_por_dia=10, ate=ATE)['produtos'] == 5
+    
+    def test_ler_mix(self):
+        """Testa a leitura da mistura de status da linha de comando"""
+        assert ler_mix('Entregue=0.9, Pronto=0.1') == {'Entregue': 0.9, 'Pronto': 0.1}
+        with pytest.raises(ValueError):
+            ler_mix('Cancelado=1')
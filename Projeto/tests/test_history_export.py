@@ -0,0 +1,50 @@
+import csv
+import gzip
+import io
+import json
+from models.history_export import exportar_csv, exportar_ndjson, comprimir_gzip
+
+LOTES = [
+    [(1, 10, 'Entregue', '2026-03-01 10:00:00', '2026-03-01 10:30:00', 65.0, 1, 'Pizza', 30.0, 2),
+     (1, 10, 'Entregue', '2026-03-01 10:00:00', '2026-03-01 10:30:00', 65.0, 2, 'Suco', 5.0, 1)],
+    [(2, 11, 'Entregue', '2026-03-01 11:00:00', '2026-03-01 11:20:00', 0.0, None, None, None, None)],
+]
+
+class TestExportacaoHistorico:
+    """Testes para a exportação do histórico em CSV e NDJSON"""
+    
+    def test_csv_uma_linha_por_item(self):
+        """Testa o cabeçalho, uma linha por item e o subtotal"""
+        linhas = list(csv.reader(io.StringIO(''.join(exportar_csv(iter(LOTES))))))
+        
+        assert linhas[0][:2] == ['historico_id', 'pedido_id']
+        assert linhas[0][-1] == 'subtotal'
+        assert len(linhas) == 4
+        assert linhas[1][6:] == ['1', 'Pizza', '30.0', '2', '60.0']
+        assert linhas[3][6:] == ['', '', '', '', '']
+    
+    def test_csv_cabecalho_antes_dos_dados(self):
+        """Testa que o cabeçalho sai antes de qualquer leitura do banco"""
+        def lotes():
+            raise AssertionError('banco lido antes do cabeçalho')
+            yield
+        assert next(exportar_csv(lotes())).startswith('historico_id,')
+    
+    def test_ndjson_um_objeto_por_pedido(self):
+        """Testa que os itens de um pedido são agrupados mesmo divididos entre lotes"""
+        lotes = [[LOTES[0][0]], [LOTES[0][1]] + LOTES[1]]
+        pedidos = [json.loads(linha) for linha in ''.join(exportar_ndjson(iter(lotes))).splitlines()]
+        
+        assert [p['historico_id'] for p in pedidos] == [1, 2]
+        assert [i['nome'] for i in pedidos[0]['itens']] == ['Pizza', 'Suco']
+        assert pedidos[1]['itens'] == []
+        assert pedidos[0]['total'] == 65.0
+    
+    def test_gzip_em_streaming(self):
+        """Testa que o gzip descomprime no conteúdo original e que o primeiro bloco já é decodificável"""
+        partes = list(exportar_csv(iter(LOTES)))
+        blocos = list(comprimir_gzip(iter(partes)))
+        
+        assert gzip.decompress(b''.join(blocos)).decode('utf-8') == ''.join(partes)
+        parcial = gzip.GzipFile(fileobj=io.BytesIO(blocos[0])).read1(1024)
+        assert parcial.decode('utf-8') == partes[0]
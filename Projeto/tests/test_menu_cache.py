@@ -0,0 +1,40 @@
+import pytest
+import json
+from models.menu_cache import MenuCache
+
+class TestMenuCache:
+    """Testes para MenuCache"""
+    
+    def test_consulta_banco_apenas_uma_vez(self):
+        """Testa se consultas seguidas não recarregam o cardápio"""
+        chamadas = []
+        cache = MenuCache(lambda: chamadas.append(1) or [{'id': 1, 'nome': 'Pizza'}])
+        
+        corpo, etag = cache.obter()
+        corpo2, etag2 = cache.obter()
+        
+        assert len(chamadas) == 1
+        assert json.loads(corpo) == [{'id': 1, 'nome': 'Pizza'}]
+        assert etag == etag2
+        assert cache.estatisticas()['acertos'] == 1
+        assert cache.estatisticas()['falhas'] == 1
+    
+    def test_invalidar(self):
+        """Testa se a invalidação força recarga e muda a ETag quando o conteúdo muda"""
+        produtos = [{'id': 1, 'preco': 10.0}]
+        cache = MenuCache(lambda: list(produtos))
+        _, etag = cache.obter()
+        
+        produtos[0] = {'id': 1, 'preco': 12.0}
+        assert cache.obter()[1] == etag
+        
+        cache.invalidar()
+        assert cache.obter()[1] != etag
+        assert cache.estatisticas()['invalidacoes'] == 1
+    
+    def test_etag_depende_so_do_conteudo(self):
+        """Testa se o mesmo conteúdo gera a mesma ETag após invalidação"""
+        cache = MenuCache(lambda: [{'id': 1}])
+        _, etag = cache.obter()
+        cache.invalidar()
+        assert cache.obter()[1] == etag
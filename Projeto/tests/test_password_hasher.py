@@ -0,0 +1,81 @@
+import pytest
+import os
+import tempfile
+import shutil
+from models.password_hasher import PasswordHasher, SobrecargaHash
+from models.database_manager import DatabaseManager
+
+@pytest.fixture
+def hasher():
+    """Hasher com custo baixo para os testes"""
+    h = PasswordHasher(rounds=4, processos=1)
+    yield h
+    h.encerrar()
+
+
+class TestPasswordHasher:
+    """Testes para PasswordHasher"""
+    
+    def test_gerar_e_verificar(self, hasher):
+        """Testa hash e verificação no pool de processos"""
+        senha_hash = hasher.gerar_hash('segredo123')
+        
+        assert senha_hash.startswith('$2b$04$')
+        assert hasher.verificar('segredo123', senha_hash) is True
+        assert hasher.verificar('errada', senha_hash) is False
+    
+    def test_verificar_hash_malformado(self, hasher):
+        """Testa que hash inválido no banco conta como senha incorreta"""
+        assert hasher.verificar('admin123', 'nao-e-bcrypt') is False
+    
+    def test_precisa_rehash(self, hasher):
+        """Testa detecção de custo diferente do configurado"""
+        assert hasher.precisa_rehash('$2b$04$' + 'a' * 53) is False
+        assert hasher.precisa_rehash('$2b$12$' + 'a' * 53) is True
+        assert hasher.precisa_rehash('invalido') is True
+    
+    def test_estatisticas_de_latencia(self, hasher):
+        """Testa métricas de latência das operações"""
+        hasher.gerar_hash('a')
+        hasher.gerar_hash('b')
+        
+        stats = hasher.estatisticas()
+        
+        assert stats['operacoes'] == 2 and stats['rounds'] == 4
+        assert stats['latencia_p50_ms'] > 0
+        assert stats['latencia_max_ms'] >= stats['latencia_media_ms']
+    
+    def test_sobrecarga_rejeita_apos_timeout(self):
+        """Testa que, sem vaga no limite de concorrência, a espera expira com SobrecargaHash"""
+        limitado = PasswordHasher(rounds=4, processos=1, max_concorrentes=1, timeout_fila=0.05)
+        # Ocupa a única vaga, como faria um hash longo em andamento
+        limitado._vagas.acquire()
+        try:
+            with pytest.raises(SobrecargaHash):
+                limitado.verificar('senha', '$2b$04$' + 'a' * 53)
+        finally:
+            limitado._vagas.release()
+        
+        assert limitado.verificar('senha', '$2b$04$' + 'a' * 53) is False
+        assert limitado.estatisticas()['rejeitadas'] == 1
+        limitado.encerrar()
+    
+    def test_rehash_no_login(self, hasher):
+        """Testa que o login regrava o hash quando o custo configurado muda"""
+        temp_dir = tempfile.mkdtemp()
+        db_path = os.path.join(temp_dir, 'test.db')
+        novo_custo = PasswordHasher(rounds=5, processos=1)
+        try:
+            DatabaseManager(db_path=db_path, hasher=hasher).criar_usuario('caixa1', 'senha123', 'gerente')
+            db = DatabaseManager(db_path=db_path, hasher=novo_custo)
+            
+            assert db.verificar_login('caixa1', 'senha123') == (True, 'gerente')
+            
+            conn = db.get_connection()
+            senha_hash = conn.execute("SELECT senha_hash FROM usuarios WHERE usuario = 'caixa1'").fetchone()[0]
+            conn.close()
+            assert senha_hash.startswith('$2b$05$')
+            assert db.verificar_login('caixa1', 'senha123') == (True, 'gerente')
+        finally:
+            novo_custo.encerrar()
+            shutil.rmtree(temp_dir, ignore_errors=True)
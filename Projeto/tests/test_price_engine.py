@@ -0,0 +1,59 @@
+import pytest
+from models.price_engine import MotorPrecos, ItensInvalidos
+
+PRODUTOS = [{'id': 1, 'nome': 'Pizza', 'preco': 30.10},
+            {'id': 2, 'nome': 'Suco', 'preco': 0.10}]
+
+class TestMotorPrecos:
+    """Testes para MotorPrecos"""
+    
+    def test_precificar(self):
+        """Testa se o total e os itens vêm do índice de preços"""
+        motor = MotorPrecos(lambda: PRODUTOS)
+        linhas, total = motor.precificar([{'id': 1, 'quantidade': 2}, {'id': '2', 'nome': 'X', 'preco': 999}])
+        
+        assert linhas == [(1, 'Pizza', 30.10, 2), (2, 'Suco', 0.10, 1)]
+        assert total == 60.30
+    
+    def test_soma_em_centavos(self):
+        """Testa se o total não acumula erro de ponto flutuante"""
+        motor = MotorPrecos(lambda: PRODUTOS)
+        _, total = motor.precificar([{'id': 2}] * 3)
+        assert total == 0.30
+    
+    def test_carrega_indice_uma_vez(self):
+        """Testa se o banco só é consultado de novo após invalidar"""
+        chamadas = []
+        motor = MotorPrecos(lambda: chamadas.append(1) or PRODUTOS)
+        motor.precificar([{'id': 1}])
+        motor.precificar([{'id': 2}])
+        assert len(chamadas) == 1
+        
+        motor.invalidar()
+        motor.precificar([{'id': 1}])
+        assert len(chamadas) == 2
+        assert motor.estatisticas()['recargas'] == 2
+    
+    def test_itens_invalidos(self):
+        """Testa se produto inexistente e quantidade inválida são recusados com o motivo"""
+        motor = MotorPrecos(lambda: PRODUTOS)
+        with pytest.raises(ItensInvalidos) as erro:
+            motor.precificar([{'id': 1}, {'id': 99}, {'id': 1, 'quantidade': 0}, {'nome': 'Sem id'}])
+        
+        assert len(erro.value.erros) == 3
+        assert 'produto 99' in erro.value.erros[0]
+    
+    def test_pedido_vazio(self):
+        """Testa se um pedido sem itens é recusado"""
+        with pytest.raises(ItensInvalidos):
+            MotorPrecos(lambda: PRODUTOS).precificar([])
+    
+    def test_validar_lote(self):
+        """Testa a validação de vários pedidos com um único índice"""
+        motor = MotorPrecos(lambda: PRODUTOS)
+        resultados = motor.validar_lote([[{'id': 1}], [{'id': 99}], [{'id': 2, 'quantidade': 5}]])
+        
+        assert [r['valido'] for r in resultados] == [True, False, True]
+        assert resultados[0]['total'] == 30.10
+        assert resultados[2]['total'] == 0.50
+        assert resultados[1]['erros']
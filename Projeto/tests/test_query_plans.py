@@ -0,0 +1,173 @@
+import pytest
+import os
+import re
+import sqlite3
+import tempfile
+import shutil
+from models.connection_pool import obter_pool
+from models.database_manager import DatabaseManager
+
+# Tabelas que crescem com o uso; uma consulta quente não pode percorrê-las por inteiro
+TABELAS_GRANDES = {'pedidos', 'historico_pedidos', 'pedido_itens', 'alteracoes', 'vendas_produto_diarias'}
+
+# Métodos que não estão no caminho quente: leem tudo de propósito, tocam tabelas pequenas
+# ou dependem de bcrypt. Todo método novo precisa entrar aqui ou em OPERACOES_QUENTES.
+FORA_DO_CAMINHO_QUENTE = {
+    'get_connection', 'invalidar_produtos', 'criar_usuario', 'verificar_login', 'listar_usuarios',
+    'remover_usuario', 'get_tipo_usuario', 'contar_admins', 'criar_produto', 'listar_produtos',
+    'salvar_produtos_em_lote', 'remover_produto', 'listar_historico', 'reconstruir_lucros_diarios',
+    'limpar_historico', 'resetar_contadores', 'limpar_banco', 'arquivar_pedidos_entregues',
+    'verificar_estatisticas', 'reconstruir_vendas_produto',
+}
+
+OPERACOES_QUENTES = [
+    ('listar_pedidos', lambda db, d: db.listar_pedidos()),
+    ('listar_pedidos_alterados', lambda db, d: db.listar_pedidos_alterados(d['versao'])),
+    ('criar_pedido', lambda db, d: db.criar_pedido([{'id': d['produto'], 'quantidade': 2}])),
+    ('atualizar_status_pedido', lambda db, d: db.atualizar_status_pedido(d['ativos'][0], 'Preparando')),
+    ('atualizar_status_pedido', lambda db, d: db.atualizar_status_pedido(d['ativos'][1], 'Entregue')),
+    ('atualizar_status_pedidos', lambda db, d: db.atualizar_status_pedidos(
+        [(d['ativos'][2], 'Pronto'), (d['ativos'][3], 'Entregue'), (d['ativos'][4], 'Entregue')])),
+    ('deletar_pedido', lambda db, d: db.deletar_pedido(d['ativos'][5])),
+    ('obter_estatisticas_gerais', lambda db, d: db.obter_estatisticas_gerais()),
+    ('listar_historico_paginado', lambda db, d: db.listar_historico_paginado(limite=50)),
+    ('listar_historico_paginado', lambda db, d: db.listar_historico_paginado(limite=50, cursor=d['cursor'])),
+    ('listar_historico_paginado', lambda db, d: db.listar_historico_paginado(inicio='2025-03-01', fim='2025-03-07')),
+    ('exportar_historico', lambda db, d: list(db.exportar_historico(inicio='2025-03-01', fim='2025-03-07'))),
+    ('listar_historico_alterado', lambda db, d: db.listar_historico_alterado(d['versao'])),
+    ('obter_lucros_periodo', lambda db, d: db.obter_lucros_periodo()),
+    ('obter_lucros_periodo', lambda db, d: db.obter_lucros_periodo('2025-03-01', '2025-03-31')),
+    ('top_produtos', lambda db, d: db.top_produtos(inicio='2025-03-01', fim='2025-03-31')),
+    ('vendas_produto', lambda db, d: db.vendas_produto(d['produto'], inicio='2025-03-01', fim='2025-03-31')),
+    ('relatorio_vendas.serie', lambda db, d: db.relatorio_vendas.serie('hora', '2025-03-01', '2025-03-07')),
+    ('relatorio_vendas.serie', lambda db, d: db.relatorio_vendas.serie('mes', '2025-01-01', '2025-06-30')),
+    ('obter_produto', lambda db, d: db.obter_produto(d['produto'])),
+    ('obter_produtos', lambda db, d: db.obter_produtos([d['produto'], d['produto'] + 1])),
+    ('atualizar_produto', lambda db, d: db.atualizar_produto(d['produto'], 'Produto', 'Desc', 12.00)),
+]
+
+def _popular(db, historico=20000, ativos=2000):
+    """Banco com meses de histórico, itens e registro de alterações, como em produção"""
+    conn = db.get_connection()
+    conn.executemany("INSERT INTO produtos (nome, descricao, preco) VALUES (?, '', ?)",
+                     [(f'Produto {i}', 5.0 + i % 30) for i in range(200)])
+    conn.executemany("""INSERT INTO historico_pedidos (pedido_id, total, status, data_pedido, data_entrega)
+        VALUES (?, ?, 'Entregue', datetime('2025-01-01', ? || ' minutes'), datetime('2025-01-01', ? || ' minutes'))""",
+        [(i + 1, 10.0 + i % 50, i * 15, i * 15 + 20) for i in range(historico)])
+    conn.executemany("""INSERT INTO pedido_itens (historico_id, produto_id, nome, preco, quantidade)
+        VALUES (?, ?, 'Produto', 10.0, 1)""", [(i // 2 + 1, i % 200 + 1) for i in range(historico * 2)])
+    conn.executemany("INSERT INTO pedidos (total, status) VALUES (?, ?)",
+                     [(20.0, ('Pendente', 'Preparando', 'Pronto')[i % 3]) for i in range(ativos)])
+    conn.executemany("INSERT INTO pedido_itens (pedido_id, produto_id, nome, preco, quantidade) VALUES (?, ?, 'Produto', 10.0, 2)",
+                     [(i + 1, i % 200 + 1) for i in range(ativos)])
+    conn.commit()
+    conn.close()
+
+@pytest.fixture(scope='module')
+def banco_grande():
+    temp_dir = tempfile.mkdtemp()
+    db = DatabaseManager(db_path=os.path.join(temp_dir, 'grande.db'))
+    _popular(db)
+    conn = db.get_connection()
+    ativos = [row[0] for row in conn.execute("SELECT id FROM pedidos ORDER BY id LIMIT 10")]
+    produto = conn.execute("SELECT MIN(id) FROM produtos").fetchone()[0]
+    conn.close()
+    dados = {'ativos': ativos, 'produto': produto,
+             'versao': db.listar_pedidos_alterados(0)['versao'] - 10,
+             'cursor': db.listar_historico_paginado(limite=100)['next_cursor']}
+    yield db, dados
+    shutil.rmtree(temp_dir)
+
+def _capturar(db, chamada, dados):
+    """Executa a chamada registrando cada instrução SQL enviada ao SQLite"""
+    instrucoes = []
+    rastreadas = []
+    pool = obter_pool(db.db_path)
+    obter_original = pool.obter
+    # Rastreia no pool, e não em db.get_connection, para cobrir toda conexão emprestada pela chamada
+    def obter_com_rastreio():
+        conn = obter_original()
+        conn.set_trace_callback(instrucoes.append)
+        rastreadas.append(conn._conn)
+        return conn
+    pool.obter = obter_com_rastreio
+    try:
+        chamada(db, dados)
+    finally:
+        del pool.obter
+        for conn in rastreadas:
+            try:
+                conn.set_trace_callback(None)
+            except sqlite3.ProgrammingError:
+                pass
+    return [sql for sql in instrucoes if re.match(r'\s*(SELECT|UPDATE|DELETE|INSERT\b.*\bSELECT\b)', sql, re.S | re.I)]
+
+def _indices_parciais(conn):
+    return {linha[1] for tabela in TABELAS_GRANDES
+            for linha in conn.execute(f"PRAGMA index_list({tabela})") if linha[4]}
+
+def _varreduras(conn, sql):
+    """Linhas do plano que percorrem uma tabela grande inteira. São aceitos SCAN de índice parcial
+    (só contém as linhas vivas) e SCAN por índice com LIMIT (a leitura para no limite)."""
+    parciais = _indices_parciais(conn)
+    problemas = []
+    for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        detalhe = linha[3]
+        encontrado = re.match(r'SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?', detalhe)
+        if not encontrado or encontrado.group(1) not in TABELAS_GRANDES:
+            continue
+        indice = encontrado.group(2)
+        if indice in parciais or (indice and re.search(r'\bLIMIT\b', sql, re.I)):
+            continue
+        problemas.append(detalhe)
+    return problemas
+
+
+class TestPlanosDeConsulta:
+    """Regressão de planos de consulta (EXPLAIN QUERY PLAN) em um banco grande"""
+    
+    @pytest.mark.parametrize('metodo,chamada', OPERACOES_QUENTES, ids=[f'{m}-{i}' for i, (m, _) in enumerate(OPERACOES_QUENTES)])
+    def test_consulta_quente_sem_varredura(self, banco_grande, metodo, chamada):
+        """Testa que nenhuma instrução de uma operação quente percorre uma tabela grande inteira"""
+        db, dados = banco_grande
+        instrucoes = _capturar(db, chamada, dados)
+        assert instrucoes, f'{metodo} não executou consultas'
+        
+        conn = sqlite3.connect(db.db_path)
+        problemas = {sql: _varreduras(conn, sql) for sql in instrucoes}
+        conn.close()
+        assert {sql: p for sql, p in problemas.items() if p} == {}
+    
+    def test_gatilhos_sem_varredura(self, banco_grande):
+        """Testa as instruções de cada trigger, com NEW/OLD trocados por valores"""
+        db, _ = banco_grande
+        conn = sqlite3.connect(db.db_path)
+        problemas = {}
+        for nome, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall():
+            corpo = re.search(r'\bBEGIN\b(.*)\bEND\b', sql, re.S | re.I).group(1)
+            for instrucao in filter(str.strip, corpo.split(';')):
+                instrucao = re.sub(r'\b(NEW|OLD)\.\w+', "'2025-01-01 12:00:00'", instrucao)
+                varreduras = _varreduras(conn, instrucao)
+                if varreduras:
+                    problemas[f'{nome}: {instrucao.strip()[:80]}'] = varreduras
+        conn.close()
+        assert problemas == {}
+    
+    def test_captura_todas_as_conexoes(self, banco_grande):
+        """Testa que a captura rastreia cada conexão emprestada, inclusive as obtidas direto do pool"""
+        db, dados = banco_grande
+        def duas_conexoes(db, dados):
+            primeira, segunda = db.get_connection(), obter_pool(db.db_path).obter()
+            primeira.execute("SELECT 1 FROM pedidos LIMIT 1").fetchall()
+            segunda.execute("SELECT 2 FROM pedidos LIMIT 1").fetchall()
+            primeira.close()
+            segunda.close()
+        
+        instrucoes = _capturar(db, duas_conexoes, dados)
+        assert instrucoes == ["SELECT 1 FROM pedidos LIMIT 1", "SELECT 2 FROM pedidos LIMIT 1"]
+    
+    def test_todos_os_metodos_classificados(self):
+        """Testa que todo método público do DatabaseManager é coberto pela suíte ou declarado fora do caminho quente"""
+        publicos = {nome for nome in dir(DatabaseManager) if not nome.startswith('_') and callable(getattr(DatabaseManager, nome))}
+        cobertos = {metodo for metodo, _ in OPERACOES_QUENTES} | FORA_DO_CAMINHO_QUENTE
+        assert publicos - cobertos == set()
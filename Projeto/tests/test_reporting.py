@@ -0,0 +1,118 @@
+import calendar
+import pytest
+from array import array
+from datetime import date, datetime
+from models.reporting import RelatorioVendas, agrupar_por_hora
+
+ENTREGAS = [('2026-03-02 09:15:00', 10.00), ('2026-03-02 09:40:00', 20.50), ('2026-03-02 20:00:00', 5.00),
+            ('2026-03-04 12:00:00', 30.00), ('2026-03-09 12:30:00', 14.10), ('2026-04-01 00:00:00', 1.00)]
+
+class HistoricoFalso:
+    """Histórico em memória com as mesmas colunas que o DatabaseManager entrega ao relatório"""
+    
+    def __init__(self, entregas, hoje):
+        self.entregas = list(entregas)
+        self.hoje = hoje
+        self.cargas = []
+    
+    def colunas(self, inicio, fim):
+        self.cargas.append((inicio, fim))
+        linhas = sorted(e for e in self.entregas if inicio <= e[0] < fim)
+        return (array('q', (calendar.timegm(datetime.fromisoformat(d).timetuple()) for d, _ in linhas)),
+                array('q', (round(t * 100) for _, t in linhas)))
+    
+    def fechados(self):
+        anteriores = [t for d, t in self.entregas if d < self.hoje.isoformat()]
+        return len(anteriores), round(sum(anteriores) * 100)
+    
+    def relatorio(self):
+        return RelatorioVendas(self.colunas, self.fechados, hoje=lambda: self.hoje)
+
+
+class TestRelatorioVendas:
+    """Testes para RelatorioVendas"""
+    
+    def test_agrupar_por_hora(self):
+        """Testa a redução das colunas ordenadas em pedidos e centavos por hora de cada dia"""
+        historico = HistoricoFalso(ENTREGAS, date(2026, 5, 1))
+        instantes, centavos = historico.colunas('2026-03-02', '2026-03-04')
+        dias = agrupar_por_hora(instantes, centavos, date(2026, 3, 2), 2)
+        
+        assert (dias[0][9], dias[0][24 + 9]) == (2, 3050)
+        assert (dias[0][20], dias[0][24 + 20]) == (1, 500)
+        assert sum(dias[1]) == 0
+    
+    def test_serie_por_granularidade(self):
+        """Testa os totais por dia, semana (segunda-feira) e mês, com ticket médio"""
+        relatorio = HistoricoFalso(ENTREGAS, date(2026, 5, 1)).relatorio()
+        
+        por_dia = relatorio.serie('dia', '2026-03-02', '2026-03-04')
+        assert [(p['periodo'], p['pedidos'], p['receita']) for p in por_dia['serie']] == [
+            ('2026-03-02', 3, 35.50), ('2026-03-03', 0, 0), ('2026-03-04', 1, 30.00)]
+        assert por_dia['serie'][0]['ticket_medio'] == 11.83
+        
+        por_semana = relatorio.serie('semana', '2026-03-01', '2026-03-15')
+        assert [(p['periodo'], p['pedidos']) for p in por_semana['serie']] == [
+            ('2026-02-23', 0), ('2026-03-02', 4), ('2026-03-09', 1)]
+        
+        por_mes = relatorio.serie('mes', '2026-03-01', '2026-04-30')
+        assert [(p['periodo'], p['receita']) for p in por_mes['serie']] == [('2026-03', 79.60), ('2026-04', 1.00)]
+        assert por_mes['totais']['pedidos'] == 6
+    
+    def test_serie_por_hora_e_picos(self):
+        """Testa a série horária e a distribuição por hora do dia"""
+        relatorio = HistoricoFalso(ENTREGAS, date(2026, 5, 1)).relatorio()
+        serie = relatorio.serie('hora', '2026-03-02', '2026-03-09')
+        
+        assert len(serie['serie']) == 8 * 24
+        assert serie['serie'][9] == {'periodo': '2026-03-02 09:00', 'pedidos': 2, 'receita': 30.50, 'ticket_medio': 15.25}
+        assert (serie['picos'][12]['pedidos'], serie['picos'][12]['receita']) == (2, 44.10)
+        assert serie['hora_pico'] == 9
+    
+    def test_dias_fechados_em_cache(self):
+        """Testa que só o dia corrente volta ao banco nas consultas seguintes"""
+        historico = HistoricoFalso(ENTREGAS, date(2026, 3, 9))
+        relatorio = historico.relatorio()
+        relatorio.serie('dia', '2026-03-01', '2026-03-09')
+        assert historico.cargas == [('2026-03-01', '2026-03-09'), ('2026-03-09', '2026-03-10')]
+        
+        historico.entregas.append(('2026-03-09 18:00:00', 7.00))
+        serie = relatorio.serie('dia', '2026-03-01', '2026-03-09')
+        assert historico.cargas[2:] == [('2026-03-09', '2026-03-10')]
+        assert serie['serie'][-1]['pedidos'] == 2
+        assert relatorio.estatisticas()['acertos'] == 8
+    
+    def test_virada_de_dia(self):
+        """Testa que na virada só o dia que fechou é carregado e o cache é mantido"""
+        historico = HistoricoFalso(ENTREGAS, date(2026, 3, 4))
+        relatorio = historico.relatorio()
+        relatorio.serie('dia', '2026-03-01', '2026-03-04')
+        
+        historico.hoje = date(2026, 3, 5)
+        serie = relatorio.serie('dia', '2026-03-01', '2026-03-05')
+        assert historico.cargas[2:] == [('2026-03-04', '2026-03-05'), ('2026-03-05', '2026-03-06')]
+        assert serie['totais']['pedidos'] == 4
+        assert relatorio.estatisticas()['invalidacoes'] == 0
+    
+    def test_invalida_quando_historico_fechado_muda(self):
+        """Testa que remover entregas de dias fechados descarta o cache"""
+        historico = HistoricoFalso(ENTREGAS, date(2026, 5, 1))
+        relatorio = historico.relatorio()
+        relatorio.serie('mes', '2026-03-01', '2026-04-30')
+        
+        historico.entregas = [e for e in historico.entregas if not e[0].startswith('2026-03-02')]
+        serie = relatorio.serie('mes', '2026-03-01', '2026-04-30')
+        assert serie['totais']['pedidos'] == 3
+        assert relatorio.estatisticas()['invalidacoes'] == 1
+    
+    def test_parametros_invalidos(self):
+        """Testa granularidade, datas e períodos recusados"""
+        relatorio = HistoricoFalso(ENTREGAS, date(2026, 5, 1)).relatorio()
+        with pytest.raises(ValueError):
+            relatorio.serie('ano')
+        with pytest.raises(ValueError):
+            relatorio.serie('dia', inicio='02/03/2026')
+        with pytest.raises(ValueError):
+            relatorio.serie('dia', '2026-03-09', '2026-03-01')
+        with pytest.raises(ValueError):
+            relatorio.serie('hora', '2026-01-01', '2026-12-31')
@@ -154,14 +154,15 @@ async function finalizarPedido() {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 credentials: 'include',
+                // O servidor recalcula preços e total a partir do id de cada produto
                 body: JSON.stringify({
-                    itens: pedido,
-                    total: total
+                    itens: pedido.map(item => ({ id: item.id, quantidade: 1 }))
                 })
             });
 
             if (response.ok) {
-                alert('✅ Pedido finalizado com sucesso!\n\nTotal: R$ ' + total.toFixed(2) + '\n\n📋 O pedido foi enviado para a área de gerenciamento.');
+                const data = await response.json();
+                alert('✅ Pedido finalizado com sucesso!\n\nTotal: R$ ' + data.pedido.total.toFixed(2) + '\n\n📋 O pedido foi enviado para a área de gerenciamento.');
                 pedido = [];
                 atualizarPedido();
             } else {
@@ -49,11 +49,28 @@ async function verificarAuth() {
     }
 }
 
+// Estado local sincronizado incrementalmente com o servidor
+let versaoPedidos = 0;
+const pedidosAtivos = new Map();
+let versaoHistorico = 0;
+const historicoPedidos = new Map();
+const LIMITE_HISTORICO = 10;
+
+// Aplica um delta (?since=) sobre o estado local; retorna true se algo mudou
+function aplicarDelta(estado, delta, chave) {
+    if (delta.completo) {
+        estado.clear();
+    }
+    delta.removidos.forEach(id => estado.delete(id));
+    delta[chave].forEach(registro => estado.set(registro.id, registro));
+    return delta.completo || delta.removidos.length > 0 || delta[chave].length > 0;
+}
+
 // Carregar pedidos
 async function carregarPedidos() {
     try {
         console.log('🔄 Carregando pedidos...');
-        const response = await fetch(`${apiUrl}/api/pedidos`, {
+        const response = await fetch(`${apiUrl}/api/pedidos?since=${versaoPedidos}`, {
             credentials: 'include'
         });
 
@@ -65,17 +82,65 @@ async function carregarPedidos() {
             return;
         }
 
-        const pedidos = await response.json();
-        console.log('📦 Pedidos recebidos:', pedidos);
-        console.log('📊 Total de pedidos:', pedidos.length);
-
-        exibirPedidos(pedidos);
-        atualizarEstatisticas(pedidos);
+        const delta = await response.json();
+        versaoPedidos = delta.versao;
+        if (aplicarDelta(pedidosAtivos, delta, 'pedidos')) {
+            renderizarPedidos();
+        }
     } catch (error) {
         console.error('❌ Erro ao carregar pedidos:', error);
     }
 }
 
+// Renderizar pedidos a partir do estado local
+function renderizarPedidos() {
+    const pedidos = [...pedidosAtivos.values()].sort((a, b) =>
+        (b.data_pedido || '').localeCompare(a.data_pedido || '') || b.id - a.id);
+    console.log('📊 Total de pedidos:', pedidos.length);
+
+    exibirPedidos(pedidos);
+    atualizarEstatisticas(pedidos);
+}
+
+// Receber alterações em tempo real (Server-Sent Events)
+function conectarStream() {
+    if (!window.EventSource) {
+        return false;
+    }
+
+    const fonte = new EventSource(`${apiUrl}/api/pedidos/stream`, { withCredentials: true });
+
+    fonte.addEventListener('criado', (evento) => {
+        const pedido = JSON.parse(evento.data);
+        pedidosAtivos.set(pedido.id, pedido);
+        renderizarPedidos();
+    });
+
+    fonte.addEventListener('status_alterado', (evento) => {
+        const pedido = JSON.parse(evento.data);
+        if (pedido.status === 'Entregue' || pedido.status === 'Cancelado') {
+            pedidosAtivos.delete(pedido.id);
+            carregarHistorico();
+        } else {
+            pedidosAtivos.set(pedido.id, pedido);
+        }
+        renderizarPedidos();
+    });
+
+    fonte.addEventListener('deletado', (evento) => {
+        pedidosAtivos.delete(JSON.parse(evento.data).id);
+        renderizarPedidos();
+    });
+
+    // Eventos perdidos (buffer do servidor esgotado): busca o delta
+    fonte.addEventListener('ressincronizar', () => {
+        carregarPedidos();
+        carregarHistorico();
+    });
+
+    return true;
+}
+
 // Exibir pedidos
 function exibirPedidos(pedidos) {
     console.log('🎨 Exibindo pedidos na interface...');
@@ -219,7 +284,11 @@ async function cancelarPedido(id) {
 async function carregarHistorico() {
     try {
         console.log('📜 Carregando histórico...');
-        const response = await fetch(`${apiUrl}/api/pedidos/historico`, {
+        // Primeira carga: só a página mais recente; depois, apenas o delta
+        const url = versaoHistorico
+            ? `${apiUrl}/api/pedidos/historico?since=${versaoHistorico}`
+            : `${apiUrl}/api/pedidos/historico?limite=${LIMITE_HISTORICO}`;
+        const response = await fetch(url, {
             credentials: 'include'
         });
 
@@ -228,10 +297,23 @@ async function carregarHistorico() {
             return;
         }
 
-        const historico = await response.json();
+        const delta = await response.json();
+        if (!versaoHistorico) {
+            delta.completo = true;
+            delta.removidos = [];
+        }
+        versaoHistorico = delta.versao;
+        if (!aplicarDelta(historicoPedidos, delta, 'historico')) {
+            return;
+        }
+
+        const historico = [...historicoPedidos.values()].sort((a, b) =>
+            (b.data_entrega || '').localeCompare(a.data_entrega || '') || b.id - a.id);
+        // Mantém em memória apenas os registros exibidos
+        historico.slice(LIMITE_HISTORICO).forEach(pedido => historicoPedidos.delete(pedido.id));
         console.log('📊 Histórico recebido:', historico.length, 'pedidos');
 
-        exibirHistorico(historico);
+        exibirHistorico(historico.slice(0, LIMITE_HISTORICO));
     } catch (error) {
         console.error('❌ Erro ao carregar histórico:', error);
     }
@@ -375,10 +457,11 @@ async function logout() {
     if (autenticado) {
         carregarPedidos();
         carregarHistorico();
-        // Atualizar a cada 10 segundos
+        // Com SSE a sincronização periódica é só uma rede de segurança
+        const intervalo = conectarStream() ? 60000 : 10000;
         setInterval(() => {
             carregarPedidos();
             carregarHistorico();
-        }, 10000);
+        }, intervalo);
     }
 })();
\ No newline at end of file